@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ArtisansConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'artisans'
+
+    def ready(self):
+        # Import signals when app is ready
+        import artisans.signals
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from artisans.models import Artisan, ArtisanReview
+from artisans.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuild Artisan rating_sum, review_count and rating from the review table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of artisans rebuilt per transaction (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        self.stdout.write("🔁 Rebuilding artisan rating aggregates...")
+
+        ids = Artisan.objects.order_by("pk").values_list("pk", flat=True)
+        last_id = 0
+        total = 0
+
+        while True:
+            batch = list(ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                total += rebuild_rating_aggregates(
+                    Artisan.objects.filter(pk__gte=batch[0], pk__lte=batch[-1]),
+                    ArtisanReview,
+                )
+
+            last_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt rating aggregates for {total} artisans."))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:32
+
+from math import floor
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of core.utils.geo.grid_cell as of this migration
+GRID_CELL_DEG = 0.1
+
+
+def grid_cell(lat, lng, size=GRID_CELL_DEG):
+    if lat is None or lng is None:
+        return None
+    return f"{floor(lat / size)}:{floor(lng / size)}"
+
+
+def backfill_geo_cell(apps, schema_editor):
+    Artisan = apps.get_model("artisans", "Artisan")
+    batch = []
+    qs = Artisan.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+    for artisan in qs.only("id", "latitude", "longitude").iterator(chunk_size=2000):
+        artisan.geo_cell = grid_cell(artisan.latitude, artisan.longitude)
+        batch.append(artisan)
+        if len(batch) >= 2000:
+            Artisan.objects.bulk_update(batch, ["geo_cell"])
+            batch = []
+    if batch:
+        Artisan.objects.bulk_update(batch, ["geo_cell"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artisans', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artisan',
+            name='geo_cell',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='artisan',
+            index=models.Index(fields=['geo_cell'], name='artisans_ar_geo_cel_1ef37d_idx'),
+        ),
+        migrations.RunPython(backfill_geo_cell, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:35
+
+from django.db import migrations, models
+
+from artisans.ratings import rebuild_rating_aggregates
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Artisan = apps.get_model("artisans", "Artisan")
+    ArtisanReview = apps.get_model("artisans", "ArtisanReview")
+    rebuild_rating_aggregates(Artisan.objects.all(), ArtisanReview)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artisans', '0002_artisan_geo_cell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artisan',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='artisan',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
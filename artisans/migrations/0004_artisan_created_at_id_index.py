@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artisans', '0003_artisan_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artisan',
+            index=models.Index(fields=['created_at', 'id'], name='artisans_ar_created_ba2bd8_idx'),
+        ),
+    ]
@@ -1,5 +1,9 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+
+from core.utils.geo import grid_cell
+
+from .ratings import apply_review_delta
 
 
 class Artisan(models.Model):
@@ -9,6 +13,10 @@ class Artisan(models.Model):
     phone = models.CharField(max_length=20)
     rating = models.FloatField(default=0)
 
+    # Running review aggregates; rating is derived from these
+    rating_sum = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+
     # Replacing PointField with latitude & longitude floats
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
@@ -18,8 +26,43 @@ class Artisan(models.Model):
     city = models.CharField(max_length=100, blank=True)
     state = models.CharField(max_length=100, blank=True)
 
+    # Spatial index: grid cell of (latitude, longitude), kept current on save
+    geo_cell = models.CharField(max_length=32, null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["geo_cell"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
+
+    # Maintained only by F() updates (ratings.py); never written from an instance
+    AGGREGATE_FIELDS = {"rating", "rating_sum", "review_count"}
+
+    def save(self, *args, **kwargs):
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            update_fields = {*update_fields, "geo_cell"}
+
+        if not self._state.adding and not kwargs.get("force_insert"):
+            # A profile edit on an instance loaded before the latest reviews
+            # must not write its stale aggregates back over the counters
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = {
+                    f.attname for f in self._meta.concrete_fields
+                    if not f.primary_key and f.attname not in deferred
+                }
+            update_fields = set(update_fields) - self.AGGREGATE_FIELDS
+
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.full_name} - {self.skill}"
 
@@ -54,16 +97,28 @@ class ArtisanReview(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-
-        # Recalculate rating
-        from django.db.models import Avg
-        avg_rating = ArtisanReview.objects.filter(artisan=self.artisan).aggregate(
-            Avg("rating")
-        )["rating__avg"] or 0
-
-        self.artisan.rating = round(avg_rating, 1)
-        self.artisan.save()
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                # Locked, so concurrent edits of this review apply in turn
+                previous = (
+                    ArtisanReview.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list("artisan_id", "rating")
+                    .first()
+                )
+
+            super().save(*args, **kwargs)
+
+            # Update running aggregates on the artisan (deletes: see signals.py)
+            rating = int(self.rating)
+            if previous is None:
+                apply_review_delta(Artisan.objects.filter(pk=self.artisan_id), rating, 1)
+            elif previous[0] != self.artisan_id:
+                apply_review_delta(Artisan.objects.filter(pk=previous[0]), -previous[1], -1)
+                apply_review_delta(Artisan.objects.filter(pk=self.artisan_id), rating, 1)
+            elif rating != previous[1]:
+                apply_review_delta(Artisan.objects.filter(pk=self.artisan_id), rating - previous[1], 0)
 
     def __str__(self):
         return f"Review {self.rating}★ by {self.user} for {self.artisan}"
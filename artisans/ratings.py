@@ -0,0 +1,42 @@
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+
+def average_rating(total, count):
+    """
+    SQL expression for total / count rounded to one decimal,
+    or 0 when there are no reviews.
+    """
+    mean_x10 = Round(Cast(total, FloatField()) * 10 / NullIf(count, 0))
+    return Coalesce(mean_x10 / 10, Value(0.0), output_field=FloatField())
+
+
+def apply_review_delta(artisans, rating_delta, count_delta):
+    """
+    Shifts rating_sum / review_count on the given artisan queryset and
+    re-derives rating, all in a single UPDATE (no read-modify-write).
+    """
+    total = F("rating_sum") + rating_delta
+    count = F("review_count") + count_delta
+    return artisans.update(
+        rating_sum=total,
+        review_count=count,
+        rating=average_rating(total, count),
+    )
+
+
+def rebuild_rating_aggregates(artisans, review_model):
+    """
+    Recomputes rating_sum / review_count / rating from the review table
+    for every artisan in the queryset. Used for drift repair.
+    """
+    reviews = review_model.objects.filter(artisan=OuterRef("pk")).order_by().values("artisan")
+    review_total = reviews.annotate(total=Sum("rating")).values("total")
+    review_count = reviews.annotate(count=Count("id")).values("count")
+
+    updated = artisans.update(
+        rating_sum=Coalesce(Subquery(review_total, output_field=IntegerField()), 0),
+        review_count=Coalesce(Subquery(review_count, output_field=IntegerField()), 0),
+    )
+    artisans.update(rating=average_rating(F("rating_sum"), F("review_count")))
+    return updated
@@ -3,7 +3,7 @@ from .models import Artisan, HireRequest, ArtisanReview
 
 
 class ArtisanSerializer(serializers.ModelSerializer):
-    review_count = serializers.SerializerMethodField()
+    review_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Artisan
@@ -22,8 +22,14 @@ class ArtisanSerializer(serializers.ModelSerializer):
             "review_count",
         ]
 
-    def get_review_count(self, obj):
-        return obj.reviews.count()
+    def __init__(self, *args, **kwargs):
+        # Optional projection: ArtisanSerializer(..., fields=["id", "full_name"])
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 class HireRequestSerializer(serializers.ModelSerializer):
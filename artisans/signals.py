@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from artisans.models import Artisan, ArtisanReview
+from artisans.ratings import apply_review_delta
+
+
+@receiver(post_delete, sender=ArtisanReview)
+def remove_review_from_aggregates(sender, instance, origin=None, **kwargs):
+    """
+    Keep Artisan.rating_sum / review_count in step when a review is deleted
+    (including queryset deletes, which bypass Model.delete()).
+    """
+    # Deleting the artisan cascades to its reviews; its counters go with it
+    origin_model = getattr(origin, "model", type(origin))
+    if origin_model is Artisan:
+        return
+
+    apply_review_delta(
+        Artisan.objects.filter(pk=instance.artisan_id),
+        -int(instance.rating),
+        -1,
+    )
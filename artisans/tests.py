@@ -1,3 +1,239 @@
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from .models import Artisan, ArtisanReview
+from .ratings import rebuild_rating_aggregates
+from .views import ArtisanListView, NearbyArtisansView
+
+
+class ArtisanListQueryCountTests(TestCase):
+    """
+    Listing artisans must not issue one query per row (review_count used to).
+    """
+
+    factory = APIRequestFactory()
+
+    def make_artisans(self, start, count):
+        users = User.objects.bulk_create([
+            User(phone_number=f"+23480{i:08d}", full_name=f"Artisan {i}")
+            for i in range(start, start + count)
+        ])
+        for user in users:
+            artisan = Artisan.objects.create(
+                user=user,
+                full_name=user.full_name,
+                skill="Plumber",
+                phone=user.phone_number,
+                latitude=6.5244,
+                longitude=3.3792,
+            )
+            ArtisanReview.objects.create(artisan=artisan, user=user, rating=4)
+
+    def count_queries(self, view, params=None):
+        request = self.factory.get("/", params or {})
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        view = ArtisanListView.as_view()
+
+        self.make_artisans(0, 1)
+        one = self.count_queries(view)
+
+        self.make_artisans(1, 499)
+        many = self.count_queries(view)
+
+        self.assertEqual(one, many)
+
+    def test_nearby_query_count_is_constant(self):
+        view = NearbyArtisansView.as_view()
+        params = {"lat": 6.5244, "lng": 3.3792, "radius": 5, "page_size": 100}
+
+        self.make_artisans(0, 1)
+        one = self.count_queries(view, params)
+
+        self.make_artisans(1, 499)
+        many = self.count_queries(view, params)
+
+        self.assertEqual(one, many)
+
+    def test_review_count_is_serialized(self):
+        self.make_artisans(0, 1)
+        response = ArtisanListView.as_view()(self.factory.get("/"))
+        self.assertEqual(response.data["results"][0]["review_count"], 1)
+
+
+class ArtisanListPaginationTests(TestCase):
+    factory = APIRequestFactory()
+
+    def setUp(self):
+        for i in range(5):
+            user = User.objects.create(phone_number=f"+23481{i:08d}", full_name=f"Artisan {i}")
+            Artisan.objects.create(
+                user=user,
+                full_name=user.full_name,
+                skill="Tiler",
+                phone=user.phone_number,
+                address="12 Allen Avenue",
+            )
+
+    def get(self, params):
+        response = ArtisanListView.as_view()(self.factory.get("/", params))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cursor_walks_every_artisan_once(self):
+        seen = []
+        params = {"page_size": 2}
+
+        while True:
+            data = self.get(params)
+            seen += [a["id"] for a in data["results"]]
+            if not data["next"]:
+                break
+            params = {"page_size": 2, "cursor": parse_qs(urlparse(data["next"]).query)["cursor"][0]}
+
+        self.assertEqual(seen, list(Artisan.objects.order_by("created_at", "id").values_list("id", flat=True)))
+
+    def cursor(self, link):
+        return parse_qs(urlparse(link).query)["cursor"][0]
+
+    def test_equal_timestamps_are_ordered_by_id(self):
+        Artisan.objects.update(created_at=Artisan.objects.first().created_at)
+        ids = list(Artisan.objects.order_by("id").values_list("id", flat=True))
+
+        first = self.get({"page_size": 2})
+        self.assertIsNone(first["previous"])
+
+        # A row inserted mid-walk with the same timestamp sorts after the cursor
+        user = User.objects.create(phone_number="+2348100000099", full_name="Late Artisan")
+        late = Artisan.objects.create(user=user, full_name="Late", skill="Tiler", phone=user.phone_number)
+        Artisan.objects.filter(pk=late.pk).update(created_at=Artisan.objects.first().created_at)
+
+        seen = [a["id"] for a in first["results"]]
+        data = first
+        while data["next"]:
+            data = self.get({"page_size": 2, "cursor": self.cursor(data["next"])})
+            seen += [a["id"] for a in data["results"]]
+
+        self.assertEqual(seen, ids + [late.pk])
+
+    def test_previous_link_walks_back(self):
+        first = self.get({"page_size": 2})
+        second = self.get({"page_size": 2, "cursor": self.cursor(first["next"])})
+
+        back = self.get({"page_size": 2, "cursor": self.cursor(second["previous"])})
+
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNone(back["previous"])
+        self.assertEqual(self.cursor(back["next"]), self.cursor(first["next"]))
+
+    def test_invalid_cursor_is_not_found(self):
+        response = ArtisanListView.as_view()(self.factory.get("/", {"cursor": "garbage"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_fields_projection(self):
+        data = self.get({"fields": "id,full_name,unknown"})
+        self.assertEqual(set(data["results"][0]), {"id", "full_name"})
+
+
+class ArtisanRatingAggregateTests(TestCase):
+    """
+    rating_sum / review_count / rating follow review writes, and survive
+    stale saves of the Artisan itself.
+    """
+
+    def setUp(self):
+        self.reviewer = User.objects.create(phone_number="+2348200000000", full_name="Reviewer")
+        self.artisan = self.make_artisan(1)
+
+    def make_artisan(self, i):
+        user = User.objects.create(phone_number=f"+23482{i:08d}", full_name=f"Artisan {i}")
+        return Artisan.objects.create(user=user, full_name=user.full_name, skill="Welder", phone=user.phone_number)
+
+    def review(self, rating, artisan=None):
+        return ArtisanReview.objects.create(artisan=artisan or self.artisan, user=self.reviewer, rating=rating)
+
+    def assertAggregates(self, artisan, rating_sum, review_count, rating):
+        artisan.refresh_from_db()
+        self.assertEqual((artisan.rating_sum, artisan.review_count, artisan.rating), (rating_sum, review_count, rating))
+
+    def test_create_edit_and_delete(self):
+        first = self.review(4)
+        self.review(5)
+        self.assertAggregates(self.artisan, 9, 2, 4.5)
+
+        first.rating = 2
+        first.save()
+        self.assertAggregates(self.artisan, 7, 2, 3.5)
+
+        first.delete()
+        self.assertAggregates(self.artisan, 5, 1, 5.0)
+
+        ArtisanReview.objects.all().delete()
+        self.assertAggregates(self.artisan, 0, 0, 0.0)
+
+    def test_moving_a_review_shifts_it_between_artisans(self):
+        other = self.make_artisan(2)
+        review = self.review(4)
+        self.review(2)
+
+        review.artisan = other
+        review.rating = 5
+        review.save()
+
+        self.assertAggregates(self.artisan, 2, 1, 2.0)
+        self.assertAggregates(other, 5, 1, 5.0)
+
+    def test_stale_artisan_save_keeps_the_aggregates(self):
+        stale = Artisan.objects.get(pk=self.artisan.pk)
+        self.review(4)
+        self.review(5)
+
+        stale.city = "Ibadan"
+        stale.save()
+
+        self.assertAggregates(self.artisan, 9, 2, 4.5)
+        self.assertEqual(self.artisan.city, "Ibadan")
+
+    def test_deleting_an_artisan_with_drifted_counters(self):
+        self.review(4)
+        self.review(5)
+        Artisan.objects.filter(pk=self.artisan.pk).update(rating_sum=4, review_count=1)
+
+        self.artisan.delete()
+
+        self.assertFalse(ArtisanReview.objects.exists())
+
+    def test_rebuild_repairs_drift(self):
+        self.review(4)
+        self.review(3)
+        other = self.make_artisan(2)
+        Artisan.objects.update(rating_sum=40, review_count=9, rating=1.0)
+
+        rebuild_rating_aggregates(Artisan.objects.all(), ArtisanReview)
+
+        self.assertAggregates(self.artisan, 7, 2, 3.5)
+        self.assertAggregates(other, 0, 0, 0.0)
+
+    def test_rebuild_command_covers_every_batch(self):
+        others = [self.make_artisan(i) for i in range(2, 5)]
+        for artisan in [self.artisan, *others]:
+            self.review(3, artisan)
+        Artisan.objects.update(rating_sum=0, review_count=0, rating=0)
+
+        out = StringIO()
+        call_command("rebuild_artisan_ratings", batch_size=2, stdout=out)
 
-# Create your tests here.
+        self.assertIn("for 4 artisans", out.getvalue())
+        for artisan in [self.artisan, *others]:
+            self.assertAggregates(artisan, 3, 1, 3.0)
@@ -1,10 +1,17 @@
-from math import radians, cos, sin, asin, sqrt
+import base64
+import json
+from datetime import datetime
 
 from django.db import models
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import generics
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.utils.urls import replace_query_param
+
+from core.utils.geo import bounding_box, filter_by_box, nearest
 
 from .models import Artisan, HireRequest, ArtisanReview
 from .serializers import (
@@ -14,13 +21,135 @@ from .serializers import (
 )
 
 
-# Utility: Haversine distance in KM
-def haversine(lat1, lon1, lat2, lon2):
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
-    return 6371 * 2 * asin(sqrt(a))  # Earth radius in KM
+# -----------------------------------------
+# PAGINATION
+# -----------------------------------------
+class ArtisanPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ArtisanCursorPagination(BasePagination):
+    """
+    Keyset pagination on (created_at, id). A cursor is the position of the
+    last (or, going back, first) row served; the next page is the rows
+    strictly after it in (created_at, id) order, so rows sharing a
+    timestamp are neither skipped nor repeated when new rows arrive.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    models.Q(created_at__lt=created_at) | models.Q(created_at=created_at, id__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    models.Q(created_at__gt=created_at) | models.Q(created_at=created_at, id__gt=pk)
+                )
+
+        ordering = ("-created_at", "-id") if reverse else ("created_at", "id")
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows:
+            # Pages before a forward cursor (or after a backward one) exist
+            # by construction; the other direction is known from has_more
+            if reverse:
+                self.next_position = rows[-1]
+                self.previous_position = rows[0] if has_more else None
+            else:
+                self.next_position = rows[-1] if has_more else None
+                self.previous_position = rows[0] if position is not None else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            position = (datetime.fromisoformat(data["c"]), int(data["i"]))
+            return position, bool(data.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse=False):
+        data = {"c": row.created_at.isoformat(), "i": row.pk}
+        if reverse:
+            data["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode("ascii"))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode("ascii"))
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
 
 
 # -----------------------------------------
@@ -40,8 +169,35 @@ class ArtisanDetailView(APIView):
 # ALL ARTISANS
 # -----------------------------------------
 class ArtisanListView(generics.ListAPIView):
-    queryset = Artisan.objects.all()
+    """
+    Keyset-paginated artisan list.
+    ?fields=id,full_name,skill limits both the columns read and the output.
+    """
     serializer_class = ArtisanSerializer
+    pagination_class = ArtisanCursorPagination
+
+    def get_requested_fields(self):
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+
+        allowed = ArtisanSerializer.Meta.fields
+        fields = [f.strip() for f in raw.split(",") if f.strip() in allowed]
+        return fields or None
+
+    def get_queryset(self):
+        queryset = Artisan.objects.all()
+
+        fields = self.get_requested_fields()
+        if fields:
+            # id / created_at are always needed for the cursor
+            queryset = queryset.only("id", "created_at", *fields)
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
 
 
 # -----------------------------------------
@@ -62,7 +218,12 @@ class NearbyArtisansView(APIView):
         except:
             return Response({"error": "Invalid coordinates"}, status=400)
 
-        artisans = Artisan.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+        # SQL prefilter: bounding box + grid cells covering the radius
+        box = bounding_box(user_lat, user_lng, radius)
+        artisans = filter_by_box(
+            Artisan.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True),
+            box,
+        )
 
         # Apply optional filters
         skill = request.query_params.get("skill")
@@ -76,18 +237,17 @@ class NearbyArtisansView(APIView):
                 models.Q(skill__icontains=q)
             )
 
-        # Filter manually by distance
-        results = []
-        for artisan in artisans:
-            dist = haversine(user_lat, user_lng, artisan.latitude, artisan.longitude)
-            if dist <= radius:
-                results.append((dist, artisan))
+        # Exact distance check on the candidate coordinates, nearest first
+        rows = artisans.values_list("id", "latitude", "longitude")
+        results = nearest(user_lat, user_lng, rows, radius)
 
-        # Sort by distance
-        results.sort(key=lambda x: x[0])
+        # Only the artisans on the requested page are loaded
+        paginator = ArtisanPagination()
+        page_ids = paginator.paginate_queryset([pk for _, pk in results], request, view=self)
+        by_id = Artisan.objects.in_bulk(page_ids)
 
-        serializer = ArtisanSerializer([a for _, a in results], many=True)
-        return Response(serializer.data)
+        serializer = ArtisanSerializer([by_id[pk] for pk in page_ids], many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 # -----------------------------------------
@@ -5,6 +5,7 @@ Django settings for Spectrum Arena backend
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # =========================================================================
@@ -194,6 +195,14 @@ else:
     PAYSTACK_SECRET_KEY = PAYSTACK_SECRET_KEY_LIVE
 
 PAYSTACK_BASE_URL = "https://api.paystack.co"
+WEBHOOK_INBOX_BATCH_SIZE = int(os.getenv("WEBHOOK_INBOX_BATCH_SIZE", 50))  # events claimed per worker round
+PAYSTACK_PAYLOAD_PARTITIONS_AHEAD = int(os.getenv("PAYSTACK_PAYLOAD_PARTITIONS_AHEAD", 3))  # months (Postgres only)
+PAYLOAD_ARCHIVE_AFTER_DAYS = int(os.getenv("PAYLOAD_ARCHIVE_AFTER_DAYS", 30))  # provider JSON compressed after this
+PAYLOAD_ARCHIVE_BATCH_SIZE = int(os.getenv("PAYLOAD_ARCHIVE_BATCH_SIZE", 500))  # rows per UPDATE
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))  # replay window for Idempotency-Key
+IDEMPOTENCY_SWEEP_CHUNK_SIZE = int(os.getenv("IDEMPOTENCY_SWEEP_CHUNK_SIZE", 1000))  # rows per DELETE
+IDEMPOTENCY_LOCK_TIMEOUT_MINUTES = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_MINUTES", 5))  # in-flight key counts as abandoned after this
+LEDGER_CHECKPOINT_SETTLE_SECONDS = int(os.getenv("LEDGER_CHECKPOINT_SETTLE_SECONDS", 300))  # newest ledger entries a checkpoint leaves for the next run
 
 # =========================================================================
 # TERMII
@@ -204,6 +213,118 @@ TERMII_SENDER_ID = os.getenv("TERMII_SENDER_ID", "SPECTRUMAPP")
 TERMII_FROM = os.getenv("TERMII_FROM")
 TERMII_CHANNEL = os.getenv("TERMII_CHANNEL", "generic")
 
+# =========================================================================
+# VTPASS
+# =========================================================================
+VTPASS_EMAIL = os.getenv("VTPASS_EMAIL")
+VTPASS_API_KEY = os.getenv("VTPASS_API_KEY")
+UTILITY_RECONCILE_AFTER_MINUTES = int(os.getenv("UTILITY_RECONCILE_AFTER_MINUTES", 5))  # pending age before requery
+UTILITY_STATUS_RETRY_AFTER = int(os.getenv("UTILITY_STATUS_RETRY_AFTER", 2))  # seconds clients wait between status polls
+UTILITY_BATCH_MAX_LINES = int(os.getenv("UTILITY_BATCH_MAX_LINES", 500))
+UTILITY_BATCH_CONCURRENCY = int(os.getenv("UTILITY_BATCH_CONCURRENCY", 8))  # VTpass calls in flight per batch
+
+# =========================================================================
+# PROVIDER HTTP CLIENTS (core/utils/http_clients.py)
+# =========================================================================
+PROVIDER_CONNECT_TIMEOUT = float(os.getenv("PROVIDER_CONNECT_TIMEOUT", 5))  # seconds
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", 2))
+PROVIDER_POOL_MAXSIZE = int(os.getenv("PROVIDER_POOL_MAXSIZE", 20))  # keep-alive connections per provider
+
+# =========================================================================
+# CELERY / REDIS
+# =========================================================================
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
+CELERY_ACCEPT_CONTENT = ["json"]
+CELERY_TASK_SERIALIZER = "json"
+CELERY_RESULT_SERIALIZER = "json"
+CELERY_TIMEZONE = TIME_ZONE
+# Fail fast when publishing while the broker is down; callers fall back
+# to their reconciliation / drain tasks instead of stalling the request.
+CELERY_BROKER_TRANSPORT_OPTIONS = {"max_retries": 1, "interval_start": 0, "interval_step": 0.2}
+
+CELERY_BEAT_SCHEDULE = {
+    "drain-pending-geocodes": {
+        "task": "jobs.tasks.drain_pending_geocodes",
+        "schedule": crontab(minute="*/5"),
+    },
+    "deactivate-expired-job-posts": {
+        "task": "jobs.tasks.deactivate_expired_job_posts",
+        "schedule": crontab(minute="*/10"),
+    },
+    "reconcile-pending-utility-purchases": {
+        "task": "payments.tasks.reconcile_pending_utility_purchases",
+        "schedule": crontab(minute="*/5"),
+    },
+    "checkpoint-wallet-ledgers": {
+        "task": "payments.tasks.checkpoint_wallet_ledgers",
+        "schedule": crontab(minute=0, hour="*/6"),
+    },
+    "drain-webhook-inbox": {
+        "task": "payments.tasks.drain_webhook_inbox",
+        "schedule": crontab(minute="*"),
+    },
+    "ensure-paystack-payload-partitions": {
+        "task": "payments.tasks.ensure_paystack_payload_partitions",
+        "schedule": crontab(minute=30, hour=2),
+    },
+    "archive-cold-payloads": {
+        "task": "payments.tasks.archive_cold_payloads",
+        "schedule": crontab(minute=15, hour=3),
+    },
+    "expire-idempotency-keys": {
+        "task": "payments.tasks.expire_idempotency_keys",
+        "schedule": crontab(minute=45),
+    },
+}
+
+JOB_EXPIRY_SWEEP_CHUNK_SIZE = int(os.getenv("JOB_EXPIRY_SWEEP_CHUNK_SIZE", 1000))  # rows per UPDATE
+
+# =========================================================================
+# CACHE
+# =========================================================================
+# Redis when REDIS_URL is set; per-process memory otherwise. "local" is the
+# fallback used by code that must keep serving while Redis is down.
+if os.getenv("REDIS_URL"):
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "spectrum",
+    }
+else:
+    _default_cache = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+CACHES = {
+    "default": _default_cache,
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "local-fallback",
+    },
+}
+
+DATA_BUNDLE_CACHE_TTL = int(os.getenv("DATA_BUNDLE_CACHE_TTL", 60 * 60 * 24))  # seconds
+
+# =========================================================================
+# GEOCODING (NOMINATIM)
+# =========================================================================
+GEOCODER_URL = os.getenv("GEOCODER_URL", "https://nominatim.openstreetmap.org/search")
+GEOCODER_USER_AGENT = os.getenv("GEOCODER_USER_AGENT", "SpectrumArena/1.0")
+GEOCODER_TIMEOUT = int(os.getenv("GEOCODER_TIMEOUT", 10))
+GEOCODER_RATE_LIMIT = float(os.getenv("GEOCODER_RATE_LIMIT", 1))  # requests / second
+GEOCODER_BATCH_SIZE = int(os.getenv("GEOCODER_BATCH_SIZE", 100))
+GEOCODER_MAX_ATTEMPTS = int(os.getenv("GEOCODER_MAX_ATTEMPTS", 5))  # errors before a post is marked failed
+GEOCODE_CACHE_TTL_DAYS = int(os.getenv("GEOCODE_CACHE_TTL_DAYS", 90))
+
+# =========================================================================
+# EXTERNAL JOB SYNC
+# =========================================================================
+JOB_SYNC_SOURCE_TIMEOUT = float(os.getenv("JOB_SYNC_SOURCE_TIMEOUT", 60))  # seconds per source
+JOB_SYNC_BATCH_SIZE = int(os.getenv("JOB_SYNC_BATCH_SIZE", 500))  # rows per upsert
+JOBBERMAN_FEED_URL = os.getenv("JOBBERMAN_FEED_URL")
+INDEED_FEED_URL = os.getenv("INDEED_FEED_URL")
+
 # =========================================================================
 # CORS / CSRF  (CRITICAL FIX)
 # =========================================================================
@@ -0,0 +1,139 @@
+import io
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, override_settings
+from urllib3 import HTTPResponse
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import NewConnectionError, ReadTimeoutError
+
+from core.utils import http_clients
+
+
+@override_settings(PROVIDER_MAX_RETRIES=2, PROVIDER_CONNECT_TIMEOUT=5)
+class ProviderHTTPClientTests(SimpleTestCase):
+    """
+    Drives the real urllib3 retry logic underneath the pooled sessions;
+    only the socket-level request (_make_request) is scripted.
+    """
+
+    url = "http://vtpass.test/api/pay"
+
+    def setUp(self):
+        # Sessions and metrics are per process; start each test from scratch
+        patcher = mock.patch.multiple(http_clients, _sessions={}, _metrics={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.sleeps = []
+        sleep = mock.patch("urllib3.util.retry.time.sleep", side_effect=self.sleeps.append)
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def script(self, *outcomes):
+        """
+        Each call to the provider gets the next outcome: a status code,
+        or an exception class to raise.
+        """
+        outcomes = list(outcomes)
+        self.calls = []
+
+        def make_request(pool, conn, method, url, **kwargs):
+            self.calls.append((method, kwargs.get("timeout")))
+            outcome = outcomes.pop(0)
+            if outcome is NewConnectionError:
+                raise NewConnectionError(conn, "connection refused")
+            if outcome is ReadTimeoutError:
+                raise ReadTimeoutError(pool, url, "read timed out")
+            return HTTPResponse(
+                body=io.BytesIO(b"{}"), status=outcome, headers={}, preload_content=False,
+                request_method=method, request_url=url,
+            )
+
+        patches = [
+            mock.patch.object(HTTPConnectionPool, "_make_request", make_request),
+            mock.patch.object(HTTPConnectionPool, "_get_conn"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_idempotent_requests_retry_retryable_statuses(self):
+        self.script(503, 429, 200)
+
+        response = http_clients.get("vtpass", self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_other_statuses_are_not_retried(self):
+        for status in (500, 400):
+            self.script(status)
+            self.assertEqual(http_clients.get("vtpass", self.url).status_code, status)
+            self.assertEqual(len(self.calls), 1)
+
+    def test_retry_limit_returns_the_last_response(self):
+        self.script(503, 503, 503, 200)
+
+        response = http_clients.get("vtpass", self.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_backoff_grows_exponentially(self):
+        policy = http_clients.PROVIDERS["vtpass"]
+        self.script(NewConnectionError, NewConnectionError, 200)
+
+        http_clients.get("vtpass", self.url)
+
+        # urllib3 retries at once after the first error, then backs off
+        self.assertEqual(self.sleeps, [policy.backoff_factor * 2])
+
+    def test_post_is_not_retried_once_it_may_have_been_processed(self):
+        self.script(503, 200)
+        self.assertEqual(http_clients.post("vtpass", self.url).status_code, 503)
+        self.assertEqual(len(self.calls), 1)
+
+        self.script(ReadTimeoutError, 200)
+        with self.assertRaises(requests.ReadTimeout):
+            http_clients.post("vtpass", self.url)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_post_is_retried_when_it_never_connected(self):
+        self.script(NewConnectionError, 200)
+
+        self.assertEqual(http_clients.post("vtpass", self.url).status_code, 200)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_default_and_explicit_timeouts(self):
+        self.script(200, 200)
+
+        http_clients.get("termii", self.url)
+        http_clients.get("termii", self.url, timeout=3)
+
+        first, second = (timeout for _, timeout in self.calls)
+        self.assertEqual((first.connect_timeout, first.read_timeout), (5, 10))
+        self.assertEqual((second.connect_timeout, second.read_timeout), (3, 3))
+
+    def test_sessions_are_pooled_per_provider(self):
+        self.assertIs(http_clients.get_session("vtpass"), http_clients.get_session("vtpass"))
+        self.assertIsNot(http_clients.get_session("vtpass"), http_clients.get_session("paystack"))
+
+    def test_metrics_count_calls_errors_and_latency(self):
+        self.script(200, 502, 502, 502, NewConnectionError, NewConnectionError, NewConnectionError)
+
+        http_clients.get("paystack", self.url)
+        http_clients.get("paystack", self.url)
+        with self.assertRaises(requests.ConnectionError):
+            http_clients.get("paystack", self.url)
+
+        with mock.patch.object(http_clients.time, "perf_counter", side_effect=[0.0, 0.3]):
+            self.script(200)
+            http_clients.get("termii", self.url)
+
+        metrics = http_clients.provider_metrics()
+        self.assertEqual((metrics["paystack"]["calls"], metrics["paystack"]["errors"]), (3, 2))
+        self.assertEqual(metrics["termii"]["avg_ms"], 300.0)
+        self.assertEqual(metrics["termii"]["histogram"]["le_250"], 0)
+        self.assertEqual(metrics["termii"]["histogram"]["le_500"], 1)
+        self.assertEqual(metrics["termii"]["histogram"]["le_inf"], 1)
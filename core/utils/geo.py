@@ -0,0 +1,178 @@
+from math import radians, degrees, cos, sin, asin, sqrt, floor
+
+from django.db.models import ExpressionWrapper, F, FloatField
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - pure-Python fallback below
+    np = None
+
+
+EARTH_RADIUS_KM = 6371
+EARTH_RADIUS_MILES = 3956
+
+
+# --------------------------------------------------------
+# DISTANCES
+# --------------------------------------------------------
+def haversine(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS_KM):
+    """
+    Great-circle distance between two points, in the unit of `radius`.
+    """
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    return radius * 2 * asin(sqrt(min(a, 1.0)))
+
+
+def distances(lat, lng, lats, lngs, radius=EARTH_RADIUS_KM):
+    """
+    Distances from (lat, lng) to every (lats[i], lngs[i]), in the unit of
+    `radius`. Computed in one NumPy pass (returns an ndarray) when NumPy
+    is installed, otherwise point by point (returns a list).
+    """
+    if np is None:
+        return [haversine(lat, lng, la, ln, radius) for la, ln in zip(lats, lngs)]
+
+    lat1, lon1 = radians(lat), radians(lng)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lngs, dtype=np.float64))
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return radius * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def nearest(lat, lng, rows, max_distance, radius=EARTH_RADIUS_KM):
+    """
+    Takes (pk, latitude, longitude) rows, e.g. from
+    values_list("id", "latitude", "longitude"), and returns
+    [(distance, pk), ...] within max_distance, nearest first.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    pks, lats, lngs = zip(*rows)
+    dists = distances(lat, lng, lats, lngs, radius)
+
+    if np is not None:
+        idx = np.flatnonzero(dists <= max_distance)
+        idx = idx[np.argsort(dists[idx], kind="stable")]
+        return [(float(dists[i]), pks[i]) for i in idx]
+
+    matches = [(d, pk) for d, pk in zip(dists, pks) if d <= max_distance]
+    matches.sort(key=lambda x: x[0])
+    return matches
+
+
+# --------------------------------------------------------
+# GRID CELLS
+# --------------------------------------------------------
+# Cell edge in degrees (~11km at the equator). Rows store the key of the
+# cell they fall in, so a radius search only reads the cells it overlaps.
+GRID_CELL_DEG = 0.1
+
+# Past this many cells an IN (...) list stops being selective and the
+# bounding box alone is used instead.
+MAX_GRID_CELLS = 400
+
+
+def grid_cell(lat, lng, size=GRID_CELL_DEG):
+    """
+    Returns the grid cell key ("<row>:<col>") for a coordinate,
+    or None when the coordinate is missing.
+    """
+    if lat is None or lng is None:
+        return None
+    return f"{floor(lat / size)}:{floor(lng / size)}"
+
+
+def bounding_box(lat, lng, distance, radius=EARTH_RADIUS_KM):
+    """
+    Returns (min_lat, max_lat, min_lng, max_lng) enclosing every point
+    within `distance` of (lat, lng), both in the unit of `radius`.
+
+    min_lng/max_lng are None when the circle touches a pole or crosses
+    the antimeridian, i.e. longitude cannot be bounded.
+    """
+    angular = distance / radius
+    lat_r = radians(lat)
+
+    min_lat = degrees(lat_r - angular)
+    max_lat = degrees(lat_r + angular)
+
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), None, None
+
+    ratio = sin(angular) / cos(lat_r)
+    if ratio >= 1:
+        return min_lat, max_lat, None, None
+
+    dlng = degrees(asin(ratio))
+    min_lng, max_lng = lng - dlng, lng + dlng
+
+    if min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def cells_covering(box, size=GRID_CELL_DEG):
+    """
+    Returns the grid cell keys overlapping a bounding box, or None when
+    the box is unbounded in longitude or spans more than MAX_GRID_CELLS.
+    """
+    min_lat, max_lat, min_lng, max_lng = box
+    if min_lng is None:
+        return None
+
+    rows = range(floor(min_lat / size), floor(max_lat / size) + 1)
+    cols = range(floor(min_lng / size), floor(max_lng / size) + 1)
+
+    if len(rows) * len(cols) > MAX_GRID_CELLS:
+        return None
+
+    return [f"{r}:{c}" for r in rows for c in cols]
+
+
+def planar_distance_sq(lat, lng):
+    """
+    SQL expression for the squared equirectangular distance, in degrees²,
+    from (lat, lng) to a row's latitude/longitude. Plain arithmetic, so it
+    runs on every backend and can be used in filter() and order_by().
+    """
+    k = cos(radians(lat))
+    dlat = F("latitude") - lat
+    dlng = (F("longitude") - lng) * k
+    return ExpressionWrapper(dlat * dlat + dlng * dlng, output_field=FloatField())
+
+
+def distance_in_degrees(distance, radius=EARTH_RADIUS_KM):
+    """
+    Converts a distance (in the unit of `radius`) to degrees of arc,
+    for comparison against planar_distance_sq().
+    """
+    return degrees(distance / radius)
+
+
+def filter_by_box(queryset, box, cell_field="geo_cell"):
+    """
+    Narrows a queryset with latitude/longitude columns to the rows inside
+    a bounding box, using the grid cell index when the box is small enough.
+    """
+    min_lat, max_lat, min_lng, max_lng = box
+
+    queryset = queryset.filter(latitude__gte=min_lat, latitude__lte=max_lat)
+    if min_lng is not None:
+        queryset = queryset.filter(longitude__gte=min_lng, longitude__lte=max_lng)
+
+    if cell_field:
+        cells = cells_covering(box)
+        if cells is not None:
+            queryset = queryset.filter(**{f"{cell_field}__in": cells})
+
+    return queryset
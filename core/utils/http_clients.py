@@ -0,0 +1,156 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# --------------------------------------------------------
+# PROVIDER POLICIES
+# --------------------------------------------------------
+# One pooled keep-alive Session per provider, so purchases and OTPs reuse
+# warm TCP+TLS connections instead of handshaking on every call.
+#
+# Retries: connection failures (the request never reached the provider)
+# are retried with exponential backoff for every method. Read timeouts and
+# 429/5xx responses are only retried for idempotent methods, so a POST
+# that may have been processed (a purchase, a card charge) is never sent
+# twice.
+
+@dataclass(frozen=True)
+class ProviderPolicy:
+    read_timeout: float
+    backoff_factor: float = 0.3
+    retry_statuses: tuple = (429, 502, 503, 504)
+
+
+PROVIDERS = {
+    "vtpass": ProviderPolicy(read_timeout=60),
+    "paystack": ProviderPolicy(read_timeout=30),
+    "termii": ProviderPolicy(read_timeout=10),
+}
+
+USER_AGENT = "SpectrumArena/1.0"
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session(policy):
+    retry = Retry(
+        total=settings.PROVIDER_MAX_RETRIES,
+        connect=settings.PROVIDER_MAX_RETRIES,
+        read=settings.PROVIDER_MAX_RETRIES,
+        status=settings.PROVIDER_MAX_RETRIES,
+        backoff_factor=policy.backoff_factor,
+        status_forcelist=policy.retry_statuses,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # idempotent only
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=settings.PROVIDER_POOL_MAXSIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(provider):
+    """
+    Shared Session for a provider (created on first use, thread-safe).
+    """
+    session = _sessions.get(provider)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = _sessions[provider] = _build_session(PROVIDERS[provider])
+    return session
+
+
+def request(provider, method, url, **kwargs):
+    """
+    requests.request() through the provider's pooled session, with its
+    (connect, read) timeouts unless the caller passes `timeout`.
+    Latency is recorded per provider (see provider_metrics()).
+    """
+    policy = PROVIDERS[provider]
+    kwargs.setdefault("timeout", (settings.PROVIDER_CONNECT_TIMEOUT, policy.read_timeout))
+
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = get_session(provider).request(method, url, **kwargs)
+        ok = response.status_code < 500
+        return response
+    finally:
+        _record(provider, (time.perf_counter() - started) * 1000, ok)
+
+
+def get(provider, url, **kwargs):
+    return request(provider, "GET", url, **kwargs)
+
+
+def post(provider, url, **kwargs):
+    return request(provider, "POST", url, **kwargs)
+
+
+# --------------------------------------------------------
+# LATENCY METRICS
+# --------------------------------------------------------
+# Per-process counters; each web / Celery worker reports its own.
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(provider, elapsed_ms, ok):
+    with _metrics_lock:
+        stats = _metrics.setdefault(provider, {
+            "calls": 0,
+            "errors": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        })
+        stats["calls"] += 1
+        stats["errors"] += not ok
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                stats["buckets"][i] += 1
+                break
+        else:
+            stats["buckets"][-1] += 1
+
+
+def provider_metrics():
+    """
+    Snapshot of per-provider call counts, errors (exceptions and 5xx) and
+    latency: average, max, and a cumulative histogram keyed "le_<ms>".
+    """
+    with _metrics_lock:
+        snapshot = {}
+        for provider, stats in _metrics.items():
+            running = 0
+            histogram = {}
+            for bound, count in zip((*LATENCY_BUCKETS_MS, "inf"), stats["buckets"]):
+                running += count
+                histogram[f"le_{bound}"] = running
+
+            snapshot[provider] = {
+                "calls": stats["calls"],
+                "errors": stats["errors"],
+                "avg_ms": round(stats["total_ms"] / stats["calls"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "histogram": histogram,
+            }
+        return snapshot
@@ -0,0 +1,105 @@
+import hashlib
+import re
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from .models import GeocodeCache
+
+
+def normalize_address(address):
+    """
+    "  Lagos ,Nigeria " -> "lagos, nigeria"
+    """
+    address = re.sub(r"\s+", " ", (address or "").strip().lower())
+    return re.sub(r"\s*,\s*", ", ", address).strip(", ")
+
+
+def _cache_key(normalized):
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class RateLimiter:
+    """
+    Spaces out calls to at most `per_second` per second (in this process).
+    """
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second > 0 else 0
+        self.last_call = 0.0
+
+    def wait(self):
+        delay = self.last_call + self.interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.last_call = time.monotonic()
+
+
+def cached_coordinates(address):
+    """
+    Returns (hit, lat, lng) from the cache without touching the network.
+    A hit may carry (None, None) for an address known to be unresolvable.
+    """
+    normalized = normalize_address(address)
+    if not normalized:
+        return False, None, None
+
+    cutoff = timezone.now() - timedelta(days=settings.GEOCODE_CACHE_TTL_DAYS)
+    entry = (
+        GeocodeCache.objects.filter(key=_cache_key(normalized), fetched_at__gte=cutoff)
+        .values_list("latitude", "longitude")
+        .first()
+    )
+    if entry is None:
+        return False, None, None
+    return True, entry[0], entry[1]
+
+
+def fetch_coordinates(address):
+    """
+    Query the geocoder. Returns (lat, lng), or (None, None) when the address
+    has no match. Network / HTTP errors propagate so callers can retry.
+    """
+    response = requests.get(
+        settings.GEOCODER_URL,
+        params={"q": address, "format": "json", "limit": 1},
+        headers={"User-Agent": settings.GEOCODER_USER_AGENT},
+        timeout=settings.GEOCODER_TIMEOUT,
+    )
+    response.raise_for_status()
+    data = response.json()
+    if data:
+        return float(data[0]["lat"]), float(data[0]["lon"])
+    return None, None
+
+
+def geocode(address, limiter=None):
+    """
+    Cache-first geocoding. Only cache misses reach the network, and those
+    go through `limiter` when one is given.
+    """
+    hit, lat, lng = cached_coordinates(address)
+    if hit:
+        return lat, lng
+
+    normalized = normalize_address(address)
+    if not normalized:
+        return None, None
+
+    if limiter:
+        limiter.wait()
+    lat, lng = fetch_coordinates(normalized)
+
+    GeocodeCache.objects.update_or_create(
+        key=_cache_key(normalized),
+        defaults={
+            "address": normalized,
+            "latitude": lat,
+            "longitude": lng,
+            "fetched_at": timezone.now(),
+        },
+    )
+    return lat, lng
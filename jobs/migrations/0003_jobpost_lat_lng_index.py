@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_alter_jobpost_options_remove_jobpost_address_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['latitude', 'longitude'], name='jobs_jobpos_latitud_7631a4_idx'),
+        ),
+    ]
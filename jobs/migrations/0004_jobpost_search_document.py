@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:37
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from jobs.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_jobpost_lat_lng_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='search_document',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
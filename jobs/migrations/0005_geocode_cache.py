@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_pending(apps, schema_editor):
+    JobPost = apps.get_model("jobs", "JobPost")
+    JobPost.objects.filter(latitude__isnull=True).exclude(company_address__isnull=True).exclude(
+        company_address=""
+    ).update(geocode_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_jobpost_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('address', models.TextField()),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Geocode Cache Entry',
+                'verbose_name_plural': 'Geocode Cache',
+            },
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='geocode_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='', max_length=10),
+        ),
+        migrations.RunPython(mark_pending, migrations.RunPython.noop),
+    ]
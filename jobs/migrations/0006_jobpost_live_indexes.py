@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_geocode_cache'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['is_active', 'created_at'], name='jobs_jobpost_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expiry_date'], name='jobs_jobpost_live_expiry_idx'),
+        ),
+    ]
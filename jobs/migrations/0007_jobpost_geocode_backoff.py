@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_jobpost_live_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='geocode_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='geocode_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
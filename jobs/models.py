@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -6,6 +7,23 @@ from datetime import timedelta
 USER = settings.AUTH_USER_MODEL
 
 
+class JobPostQuerySet(models.QuerySet):
+    def live(self):
+        """
+        Posts that are still listed: active and not past expiry_date.
+        Served by the partial index on (is_active, created_at).
+        """
+        return self.filter(is_active=True).filter(
+            models.Q(expiry_date__isnull=True) | models.Q(expiry_date__gt=timezone.now())
+        )
+
+    def expired(self):
+        """
+        Active posts whose expiry_date has passed (pending deactivation).
+        """
+        return self.filter(is_active=True, expiry_date__lte=timezone.now())
+
+
 class JobPost(models.Model):
     # Source of job (where it originated)
     SOURCE_CHOICES = [
@@ -36,6 +54,15 @@ class JobPost(models.Model):
         (JOB_CONTRACT, "Contract"),
     ]
 
+    GEOCODE_PENDING = "pending"
+    GEOCODE_DONE = "done"
+    GEOCODE_FAILED = "failed"
+    GEOCODE_STATUS_CHOICES = [
+        (GEOCODE_PENDING, "Pending"),
+        (GEOCODE_DONE, "Done"),
+        (GEOCODE_FAILED, "Failed"),
+    ]
+
     # Core fields
     user = models.ForeignKey(
         USER,
@@ -64,11 +91,36 @@ class JobPost(models.Model):
     # Optional geo (for later proximity search)
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
+    geocode_status = models.CharField(
+        max_length=10, choices=GEOCODE_STATUS_CHOICES, blank=True, default="", db_index=True
+    )
+    # Failed lookups (network / HTTP errors) back off; see jobs.tasks.drain_pending_geocodes
+    geocode_attempts = models.PositiveSmallIntegerField(default=0)
+    geocode_next_attempt_at = models.DateTimeField(blank=True, null=True)
+
+    # Full-text search document, maintained by the database (see jobs/search.py)
+    search_document = SearchVectorField(blank=True, null=True, editable=False)
+
+    objects = JobPostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Job Post"
         verbose_name_plural = "Job Posts"
+        indexes = [
+            models.Index(fields=["latitude", "longitude"]),
+            # Listings only ever read live rows; expired history stays out of the index
+            models.Index(
+                fields=["is_active", "created_at"],
+                condition=models.Q(is_active=True),
+                name="jobs_jobpost_live_idx",
+            ),
+            models.Index(
+                fields=["expiry_date"],
+                condition=models.Q(is_active=True),
+                name="jobs_jobpost_live_expiry_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.company_name} — {self.role} ({self.category})"
@@ -84,3 +136,21 @@ class JobPost(models.Model):
 
         super().save(*args, **kwargs)
 
+
+class GeocodeCache(models.Model):
+    """
+    Normalized address -> coordinates, shared by every JobPost.
+    Addresses the geocoder could not resolve are cached with null coordinates.
+    """
+    key = models.CharField(max_length=64, unique=True)  # sha256 of the normalized address
+    address = models.TextField()
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Geocode Cache Entry"
+        verbose_name_plural = "Geocode Cache"
+
+    def __str__(self):
+        return f"{self.address} → ({self.latitude}, {self.longitude})"
@@ -0,0 +1,177 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+
+# -------------------------------------------------------------------------
+# Search document maintenance
+# -------------------------------------------------------------------------
+# PostgreSQL: JobPost.search_document (tsvector) is filled by a BEFORE
+# INSERT/UPDATE trigger and served by a GIN index.
+# SQLite: an external-content FTS5 table mirrors the searchable columns
+# through AFTER INSERT/UPDATE/DELETE triggers.
+
+SEARCH_COLUMNS = ["role", "company_name", "category", "job_type", "job_mode", "company_address"]
+
+FTS_TABLE = "jobs_jobpost_fts"
+
+PG_INSTALL_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION jobs_jobpost_search_document_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_document :=
+            setweight(to_tsvector('english', coalesce(NEW.role, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.company_name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.job_type, '') || ' ' || coalesce(NEW.job_mode, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(NEW.company_address, '')), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    "DROP TRIGGER IF EXISTS jobs_jobpost_search_document_trigger ON jobs_jobpost;",
+    """
+    CREATE TRIGGER jobs_jobpost_search_document_trigger
+    BEFORE INSERT OR UPDATE ON jobs_jobpost
+    FOR EACH ROW EXECUTE FUNCTION jobs_jobpost_search_document_update();
+    """,
+    # Fire the trigger once for every existing row
+    "UPDATE jobs_jobpost SET search_document = NULL;",
+    "CREATE INDEX IF NOT EXISTS jobs_jobpost_search_document_gin ON jobs_jobpost USING GIN (search_document);",
+]
+
+PG_UNINSTALL_SQL = [
+    "DROP INDEX IF EXISTS jobs_jobpost_search_document_gin;",
+    "DROP TRIGGER IF EXISTS jobs_jobpost_search_document_trigger ON jobs_jobpost;",
+    "DROP FUNCTION IF EXISTS jobs_jobpost_search_document_update();",
+]
+
+
+def _sqlite_fts_sql():
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) "
+        f"VALUES ('delete', old.id, {old_cols});"
+    )
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_cols});"
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{cols}, content='jobs_jobpost', content_rowid='id', tokenize='porter unicode61');",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai;",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad;",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au;",
+        f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON jobs_jobpost BEGIN {insert_new} END;",
+        f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON jobs_jobpost BEGIN {delete_old} END;",
+        f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON jobs_jobpost BEGIN {delete_old} {insert_new} END;",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild');",
+    ]
+
+
+def install_search_index(connection):
+    """
+    Create (or re-create) the full-text index for the given connection.
+    Idempotent; a no-op on backends without a full-text path.
+    """
+    if connection.vendor == "postgresql":
+        statements = PG_INSTALL_SQL
+    elif connection.vendor == "sqlite":
+        statements = _sqlite_fts_sql()
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def uninstall_search_index(connection):
+    if connection.vendor == "postgresql":
+        statements = PG_UNINSTALL_SQL
+    elif connection.vendor == "sqlite":
+        statements = [
+            f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai;",
+            f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad;",
+            f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au;",
+            f"DROP TABLE IF EXISTS {FTS_TABLE};",
+        ]
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def ensure_sqlite_search_index(connection):
+    """
+    SQLite drops triggers when Django rebuilds a table during a migration,
+    so re-install the FTS triggers if any of them went missing.
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f"{FTS_TABLE}_%"],
+        )
+        if cursor.fetchone()[0] == 3:
+            return
+
+    install_search_index(connection)
+
+
+def _sqlite_match_expression(terms):
+    # Quote every term (FTS5 syntax is not user input) and prefix-match it
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+# -------------------------------------------------------------------------
+# DRF filter backend
+# -------------------------------------------------------------------------
+class JobSearchFilter(filters.SearchFilter):
+    """
+    ?search= backed by the full-text index, ranked by relevance unless the
+    client asked for an explicit ?ordering=. Falls back to DRF's icontains
+    search on backends without a full-text path.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        vendor = connections[queryset.db].vendor
+
+        if vendor == "postgresql":
+            query = SearchQuery(" ".join(terms), config="english", search_type="websearch")
+            queryset = queryset.filter(search_document=query).annotate(
+                search_rank=SearchRank(F("search_document"), query)
+            )
+            rank_ordering = ["-search_rank", "-created_at"]
+
+        elif vendor == "sqlite":
+            # Join the FTS table once; bm25() (lower is better) is read from
+            # the joined match rather than a subquery per row
+            table = queryset.model._meta.db_table
+            queryset = queryset.extra(
+                select={"search_rank": f"bm25({FTS_TABLE})"},
+                tables=[FTS_TABLE],
+                where=[f"{FTS_TABLE} MATCH %s", f"{FTS_TABLE}.rowid = {table}.id"],
+                params=[_sqlite_match_expression(terms)],
+            )
+            rank_ordering = ["search_rank", "-created_at"]
+
+        else:
+            return super().filter_queryset(request, queryset, view)
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+
+        return queryset.order_by(*rank_ordering)
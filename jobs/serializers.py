@@ -26,6 +26,7 @@ class JobPostSerializer(serializers.ModelSerializer):
             "is_active",
             "latitude",
             "longitude",
+            "geocode_status",
         ]
-        read_only_fields = ["id", "is_premium", "created_at", "expiry_date", "is_active"]
+        read_only_fields = ["id", "is_premium", "created_at", "expiry_date", "is_active", "geocode_status"]
 
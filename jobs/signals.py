@@ -1,8 +1,9 @@
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from django.db import connection
+from django.db import connection, connections
 from jobs.models import JobPost
+from jobs.search import ensure_sqlite_search_index
 
 
 @receiver(post_migrate)
@@ -49,3 +50,15 @@ def create_default_job(sender, **kwargs):
 
     print("✅ Default job created successfully.")
 
+
+@receiver(post_migrate)
+def repair_search_index(sender, using="default", **kwargs):
+    """
+    Re-install the SQLite FTS triggers if a migration rebuilt jobs_jobpost.
+    """
+    if sender.name != 'jobs':
+        return
+
+    conn = connections[using]
+    if 'jobs_jobpost' in conn.introspection.table_names():
+        ensure_sqlite_search_index(conn)
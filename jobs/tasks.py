@@ -0,0 +1,130 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .geocoding import RateLimiter, geocode, normalize_address
+from .models import JobPost
+
+
+# Delay before drain retry n is GEOCODE_RETRY_BASE_DELAY * 2 ** (n - 1), capped
+GEOCODE_RETRY_BASE_DELAY = timedelta(minutes=5)
+GEOCODE_RETRY_MAX_DELAY = timedelta(hours=12)
+
+
+def _apply_coordinates(job_ids, lat, lng):
+    # .update() rather than save(): JobPost.save() would reset expiry_date
+    status = JobPost.GEOCODE_DONE if lat is not None else JobPost.GEOCODE_FAILED
+    return JobPost.objects.filter(pk__in=job_ids).update(
+        latitude=lat, longitude=lng, geocode_status=status, geocode_next_attempt_at=None
+    )
+
+
+def _record_geocode_error(jobs):
+    """
+    Back off (job_id, attempts) rows whose lookup raised; after
+    GEOCODER_MAX_ATTEMPTS they are marked failed. Returns the number failed.
+    """
+    now = timezone.now()
+    failed = 0
+
+    for job_id, attempts in jobs:
+        attempts += 1
+        if attempts >= settings.GEOCODER_MAX_ATTEMPTS:
+            fields = {"geocode_status": JobPost.GEOCODE_FAILED, "geocode_next_attempt_at": None}
+            failed += 1
+        else:
+            delay = min(GEOCODE_RETRY_BASE_DELAY * 2 ** (attempts - 1), GEOCODE_RETRY_MAX_DELAY)
+            fields = {"geocode_next_attempt_at": now + delay}
+
+        JobPost.objects.filter(pk=job_id).update(geocode_attempts=attempts, **fields)
+
+    return failed
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60, rate_limit=f"{settings.GEOCODER_RATE_LIMIT}/s")
+def geocode_job_post(self, job_id):
+    """
+    Geocode a single newly created job post.
+    """
+    address = (
+        JobPost.objects.filter(pk=job_id, geocode_status=JobPost.GEOCODE_PENDING)
+        .values_list("company_address", flat=True)
+        .first()
+    )
+    if address is None:
+        return "Nothing to geocode"
+
+    try:
+        lat, lng = geocode(address)
+    except Exception as exc:
+        # Left pending; drain_pending_geocodes picks it up if retries run out
+        raise self.retry(exc=exc)
+
+    _apply_coordinates([job_id], lat, lng)
+    return "Geocoded" if lat is not None else "No match"
+
+
+@shared_task
+def drain_pending_geocodes(batch_size=None):
+    """
+    Geocode pending job posts in batches. Posts sharing an address are
+    resolved with one lookup, and network calls respect GEOCODER_RATE_LIMIT.
+    A lookup that raises backs its posts off, so an address that keeps
+    failing does not hold up the rest of the queue.
+    Scheduled by Celery Beat.
+    """
+    batch_size = batch_size or settings.GEOCODER_BATCH_SIZE
+    limiter = RateLimiter(settings.GEOCODER_RATE_LIMIT)
+
+    pending = (
+        JobPost.objects.filter(geocode_status=JobPost.GEOCODE_PENDING)
+        .filter(Q(geocode_next_attempt_at__isnull=True) | Q(geocode_next_attempt_at__lte=timezone.now()))
+        .order_by("id")
+        .values_list("id", "company_address", "geocode_attempts")[:batch_size]
+    )
+
+    by_address = defaultdict(list)
+    for job_id, address, attempts in pending:
+        by_address[normalize_address(address)].append((job_id, attempts))
+
+    resolved = failed = errors = 0
+    for address, jobs in by_address.items():
+        job_ids = [job_id for job_id, _ in jobs]
+        try:
+            lat, lng = geocode(address, limiter=limiter)
+        except Exception as e:
+            print(f"⚠️ Geocoding failed for '{address}': {e}")
+            errors += len(jobs)
+            failed += _record_geocode_error(jobs)
+            continue
+
+        if lat is not None:
+            resolved += _apply_coordinates(job_ids, lat, lng)
+        else:
+            failed += _apply_coordinates(job_ids, lat, lng)
+
+    return {"resolved": resolved, "failed": failed, "errors": errors}
+
+
+@shared_task
+def deactivate_expired_job_posts(chunk_size=None):
+    """
+    Flip is_active off for posts past their expiry_date, chunk_size rows per
+    UPDATE so no single statement holds locks on a large backlog.
+    Scheduled by Celery Beat.
+    """
+    chunk_size = chunk_size or settings.JOB_EXPIRY_SWEEP_CHUNK_SIZE
+    total = 0
+
+    while True:
+        ids = list(JobPost.objects.expired().order_by("id").values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            break
+        # .update() rather than save(): JobPost.save() would reset expiry_date
+        total += JobPost.objects.filter(pk__in=ids, is_active=True).update(is_active=False)
+
+    return {"deactivated": total}
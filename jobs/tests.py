@@ -1,3 +1,303 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from core.utils import geo
+
+from . import geocoding
+from .models import GeocodeCache, JobPost
+from .search import FTS_TABLE
+from .tasks import deactivate_expired_job_posts, drain_pending_geocodes
+from .views import JobViewSet, NearbyJobsView
+
+
+def make_posts(count, expired=False, active=True):
+    # bulk_create skips JobPost.save(), so expiry_date is set here
+    now = timezone.now()
+    expiry = now - timedelta(days=1) if expired else now + timedelta(days=1)
+    return JobPost.objects.bulk_create([
+        JobPost(company_name=f"Company {i}", role="Driver", expiry_date=expiry, is_active=active)
+        for i in range(count)
+    ])
+
+
+class JobExpirySweepTests(TestCase):
+    factory = APIRequestFactory()
+
+    def setUp(self):
+        # Drop the default post seeded on migrate
+        JobPost.objects.all().delete()
+
+    def test_sweeper_deactivates_expired_posts_in_chunks(self):
+        make_posts(25, expired=True)
+        live = make_posts(5)
+
+        result = deactivate_expired_job_posts(chunk_size=10)
+
+        self.assertEqual(result, {"deactivated": 25})
+        self.assertEqual(JobPost.objects.filter(is_active=True).count(), 5)
+        self.assertTrue(all(p.is_active for p in JobPost.objects.filter(pk__in=[p.pk for p in live])))
+
+    def test_list_hides_expired_posts_before_the_sweep(self):
+        make_posts(3, expired=True)
+        make_posts(2)
+
+        response = JobViewSet.as_view({"get": "list"})(self.factory.get("/"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+
+class JobListQueryPlanTests(TestCase):
+    """
+    Listing cost must not grow with the number of expired posts: the list
+    runs the same queries regardless of history and reads live rows
+    through the partial (is_active, created_at) index.
+    """
+
+    factory = APIRequestFactory()
+
+    def setUp(self):
+        JobPost.objects.all().delete()
+
+    def list_queries(self):
+        request = self.factory.get("/")
+        with CaptureQueriesContext(connection) as ctx:
+            response = JobViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 50)
+        return len(ctx.captured_queries)
+
+    def list_plan(self):
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise be seq-scanned regardless of indexes
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return JobPost.objects.live().order_by("-created_at").explain()
+
+    def test_list_queries_constant_as_history_accumulates(self):
+        make_posts(50)
+        baseline_queries = self.list_queries()
+
+        make_posts(2000, expired=True)
+        deactivate_expired_job_posts()
+
+        self.assertEqual(self.list_queries(), baseline_queries)
+
+    def test_list_reads_the_partial_live_index(self):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.skipTest("query plan format is backend specific")
+
+        make_posts(50)
+        make_posts(200, active=False)
+
+        self.assertIn("jobs_jobpost_live_idx", self.list_plan())
+
+
+class NearbyJobsViewTests(TestCase):
+    factory = APIRequestFactory()
+
+    def setUp(self):
+        JobPost.objects.all().delete()
+        # On the equator 0.01° of longitude is ~0.69 miles
+        self.far = JobPost.objects.create(company_name="Far", latitude=0.0, longitude=0.1)
+        self.second = JobPost.objects.create(company_name="Second", latitude=0.0, longitude=0.02)
+        self.first = JobPost.objects.create(company_name="First", latitude=0.0, longitude=0.0)
+
+    def nearby(self, **params):
+        response = NearbyJobsView.as_view()(self.factory.get("/", params))
+        self.assertEqual(response.status_code, 200)
+        return [job["company_name"] for job in response.data["results"]]
+
+    def test_nearest_first_within_the_radius(self):
+        self.assertEqual(self.nearby(lat=0.0, lng=0.0, radius=3), ["First", "Second"])
+        self.assertEqual(self.nearby(lat=0.0, lng=0.0, radius=10), ["First", "Second", "Far"])
+        self.assertEqual(self.nearby(lat=0.0, lng=0.11, radius=3), ["Far"])
+
+    def test_zero_coordinates_are_valid(self):
+        response = NearbyJobsView.as_view()(self.factory.get("/", {"lat": "0", "lng": "0"}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["company_name"], "First")
+
+    def test_missing_coordinates_are_rejected(self):
+        response = NearbyJobsView.as_view()(self.factory.get("/", {"lat": "6.5"}))
+
+        self.assertEqual(response.status_code, 400)
+
+
+class GeoNearestTests(TestCase):
+    rows = [(1, 6.60, 3.38), (2, 6.5244, 3.3792), (3, 6.53, 3.38), (4, 9.07, 7.49)]
+
+    def test_ranks_within_max_distance(self):
+        result = geo.nearest(6.5244, 3.3792, self.rows, 10)
+
+        self.assertEqual([pk for _, pk in result], [2, 3, 1])
+        self.assertEqual(result[0][0], 0.0)
+        self.assertTrue(all(d <= 10 for d, _ in result))
+        self.assertEqual(geo.nearest(6.5244, 3.3792, [], 10), [])
+
+    def test_pure_python_fallback_matches_numpy(self):
+        if geo.np is None:
+            self.skipTest("numpy is not installed")
+
+        vectorized = geo.nearest(6.5244, 3.3792, self.rows, 500)
+        with mock.patch.object(geo, "np", None):
+            fallback = geo.nearest(6.5244, 3.3792, self.rows, 500)
+
+        self.assertEqual([pk for _, pk in fallback], [pk for _, pk in vectorized])
+        for (a, _), (b, _) in zip(fallback, vectorized):
+            self.assertAlmostEqual(a, b, places=6)
+
+
+class JobSearchTests(TestCase):
+    factory = APIRequestFactory()
+
+    def setUp(self):
+        JobPost.objects.all().delete()
+
+    def search(self, term, **params):
+        request = self.factory.get("/", {"search": term, **params})
+        response = JobViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, 200)
+        return [job["company_name"] for job in response.data["results"]]
+
+    def test_index_follows_insert_update_and_delete(self):
+        post = JobPost.objects.create(company_name="Tap Masters", role="Plumber")
+        self.assertEqual(self.search("plumber"), ["Tap Masters"])
+
+        post.role = "Electrician"
+        post.save()
+        self.assertEqual(self.search("plumber"), [])
+        self.assertEqual(self.search("electric"), ["Tap Masters"])
+
+        post.delete()
+        self.assertEqual(self.search("electric"), [])
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'electrician'")
+                self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_results_are_ranked_by_relevance(self):
+        JobPost.objects.create(
+            company_name="Address Match",
+            role="Driver",
+            company_address="Opposite the welder shed, 14 Long Street, Ikeja, Lagos",
+        )
+        JobPost.objects.create(company_name="Welder Works", role="Welder")
+        JobPost.objects.create(company_name="Bakery", role="Baker")
+
+        self.assertEqual(self.search("welder"), ["Welder Works", "Address Match"])
+        self.assertEqual(self.search("welder", ordering="company_name"), ["Address Match", "Welder Works"])
+
+    def test_sqlite_rank_joins_the_index_once(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite FTS5 path")
+
+        for i in range(30):
+            JobPost.objects.create(company_name=f"Weld Co {i}", role="Welder")
+
+        request = self.factory.get("/", {"search": "welder"})
+        with CaptureQueriesContext(connection) as ctx:
+            response = JobViewSet.as_view({"get": "list"})(request)
+
+        self.assertEqual(response.data["count"], 30)
+        page_sql = next(q["sql"] for q in ctx.captured_queries if "search_rank" in q["sql"])
+        self.assertEqual(page_sql.count("MATCH"), 1)
+        self.assertNotIn("(SELECT", page_sql)
+
+
+@override_settings(GEOCODER_RATE_LIMIT=0, GEOCODER_MAX_ATTEMPTS=3)
+class GeocodingTests(TestCase):
+    def setUp(self):
+        JobPost.objects.all().delete()
+        GeocodeCache.objects.all().delete()
+
+    def pending(self, address):
+        post = JobPost.objects.create(company_name="Pending", company_address=address)
+        JobPost.objects.filter(pk=post.pk).update(geocode_status=JobPost.GEOCODE_PENDING)
+        return post
+
+    def test_normalize_address(self):
+        self.assertEqual(geocoding.normalize_address("  Lagos ,Nigeria "), "lagos, nigeria")
+        self.assertEqual(geocoding.normalize_address("12  Allen   Avenue, Ikeja,"), "12 allen avenue, ikeja")
+        self.assertEqual(geocoding.normalize_address(None), "")
+
+    def test_geocode_is_cache_first(self):
+        with mock.patch.object(geocoding, "fetch_coordinates", return_value=(6.6, 3.35)) as fetch:
+            self.assertEqual(geocoding.geocode("Ikeja, Lagos"), (6.6, 3.35))
+            self.assertEqual(geocoding.geocode("  ikeja ,LAGOS"), (6.6, 3.35))
+
+        fetch.assert_called_once_with("ikeja, lagos")
+        self.assertEqual(geocoding.cached_coordinates("Ikeja, Lagos"), (True, 6.6, 3.35))
+
+    def test_unresolvable_addresses_are_cached(self):
+        with mock.patch.object(geocoding, "fetch_coordinates", return_value=(None, None)) as fetch:
+            geocoding.geocode("Nowhere Street")
+            geocoding.geocode("Nowhere Street")
+
+        fetch.assert_called_once()
+        self.assertEqual(geocoding.cached_coordinates("Nowhere Street"), (True, None, None))
+
+    @override_settings(GEOCODE_CACHE_TTL_DAYS=30)
+    def test_stale_cache_entries_are_ignored(self):
+        with mock.patch.object(geocoding, "fetch_coordinates", return_value=(6.6, 3.35)):
+            geocoding.geocode("Ikeja, Lagos")
+        GeocodeCache.objects.update(fetched_at=timezone.now() - timedelta(days=31))
+
+        self.assertEqual(geocoding.cached_coordinates("Ikeja, Lagos"), (False, None, None))
+
+    def test_drain_shares_one_lookup_per_address(self):
+        posts = [self.pending("Ikeja, Lagos"), self.pending("ikeja , lagos"), self.pending("Nowhere")]
+
+        def fetch(address):
+            return (6.6, 3.35) if address == "ikeja, lagos" else (None, None)
+
+        with mock.patch.object(geocoding, "fetch_coordinates", side_effect=fetch) as mocked:
+            result = drain_pending_geocodes()
+
+        self.assertEqual(mocked.call_count, 2)
+        self.assertEqual(result, {"resolved": 2, "failed": 1, "errors": 0})
+        statuses = dict(JobPost.objects.values_list("pk", "geocode_status"))
+        self.assertEqual([statuses[p.pk] for p in posts], ["done", "done", "failed"])
+
+    def test_failing_address_backs_off_instead_of_blocking_the_queue(self):
+        broken = self.pending("Broken Road")
+        later = [self.pending(f"{i} Allen Avenue") for i in range(2)]
+
+        def fetch(address):
+            if address == "broken road":
+                raise ConnectionError("geocoder down")
+            return 6.6, 3.35
+
+        with mock.patch.object(geocoding, "fetch_coordinates", side_effect=fetch):
+            first = drain_pending_geocodes(batch_size=1)
+            second = drain_pending_geocodes(batch_size=1)
+
+        self.assertEqual(first, {"resolved": 0, "failed": 0, "errors": 1})
+        self.assertEqual(second, {"resolved": 1, "failed": 0, "errors": 0})
+
+        broken.refresh_from_db()
+        self.assertEqual(broken.geocode_status, JobPost.GEOCODE_PENDING)
+        self.assertEqual(broken.geocode_attempts, 1)
+        self.assertGreater(broken.geocode_next_attempt_at, timezone.now())
+        self.assertEqual(JobPost.objects.get(pk=later[0].pk).geocode_status, JobPost.GEOCODE_DONE)
+
+    def test_address_failing_every_attempt_is_marked_failed(self):
+        broken = self.pending("Broken Road")
+
+        with mock.patch.object(geocoding, "fetch_coordinates", side_effect=ConnectionError("down")):
+            for _ in range(3):
+                JobPost.objects.filter(pk=broken.pk).update(geocode_next_attempt_at=None)
+                result = drain_pending_geocodes()
+
+        broken.refresh_from_db()
+        self.assertEqual(result, {"resolved": 0, "failed": 1, "errors": 1})
+        self.assertEqual((broken.geocode_status, broken.geocode_attempts), (JobPost.GEOCODE_FAILED, 3))
+        self.assertIsNone(broken.geocode_next_attempt_at)
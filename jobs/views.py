@@ -2,10 +2,20 @@ from rest_framework import viewsets, filters, permissions
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from math import radians, cos, sin, asin, sqrt
-import requests
+from django.db import transaction
+
+from core.utils.geo import (
+    bounding_box,
+    distance_in_degrees,
+    filter_by_box,
+    planar_distance_sq,
+    EARTH_RADIUS_MILES,
+)
+from .geocoding import cached_coordinates
 from .models import JobPost
+from .search import JobSearchFilter
 from .serializers import JobPostSerializer
+from .tasks import geocode_job_post
 
 
 # -------------------------------------------------------------------------
@@ -26,35 +36,49 @@ class JobViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]  # ✅ JWT protected
     pagination_class = JobPagination
 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    # Search runs after ordering so relevance can win when no ?ordering= is given
+    filter_backends = [filters.OrderingFilter, JobSearchFilter]
     search_fields = ["company_name", "category", "role", "company_address", "job_type", "job_mode"]
     ordering_fields = ["created_at", "company_name"]
     ordering = ["-created_at"]
 
+    def get_queryset(self):
+        # Listings show live posts only; owners can still reach expired ones by id
+        if self.action == "list":
+            return JobPost.objects.live().order_by("-created_at")
+        return super().get_queryset()
+
     def perform_create(self, serializer):
         """
-        Automatically assign the logged-in user and geocode the company address.
+        Automatically assign the logged-in user. Geocoding of the company
+        address runs in the background (jobs.tasks.geocode_job_post); an
+        address already in the geocode cache is applied right away.
         """
-        job = serializer.save(user=self.request.user)
-        if job.company_address:
-            lat, lon = self.get_coordinates_from_address(job.company_address)
-            if lat and lon:
-                job.latitude = lat
-                job.longitude = lon
-                job.save()
-
-    def get_coordinates_from_address(self, address):
+        extra = {"user": self.request.user}
+        data = serializer.validated_data
+
+        if data.get("company_address") and data.get("latitude") is None:
+            hit, lat, lng = cached_coordinates(data["company_address"])
+            if hit:
+                extra.update(
+                    latitude=lat,
+                    longitude=lng,
+                    geocode_status=JobPost.GEOCODE_DONE if lat is not None else JobPost.GEOCODE_FAILED,
+                )
+            else:
+                extra["geocode_status"] = JobPost.GEOCODE_PENDING
+
+        job = serializer.save(**extra)
+
+        if job.geocode_status == JobPost.GEOCODE_PENDING:
+            transaction.on_commit(lambda: self.enqueue_geocoding(job.id))
+
+    def enqueue_geocoding(self, job_id):
         try:
-            url = "https://nominatim.openstreetmap.org/search"
-            params = {"q": address, "format": "json", "limit": 1}
-            headers = {"User-Agent": "SpectrumArena/1.0"}
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            data = response.json()
-            if data:
-                return float(data[0]["lat"]), float(data[0]["lon"])
+            geocode_job_post.delay(job_id)
         except Exception as e:
-            print(f"⚠️ Geocoding failed for '{address}': {e}")
-        return None, None
+            # Job stays pending; drain_pending_geocodes will pick it up
+            print(f"⚠️ Could not queue geocoding for job {job_id}: {e}")
 
 
 # -------------------------------------------------------------------------
@@ -71,24 +95,24 @@ class NearbyJobsView(APIView):
             return Response({"error": "Please provide valid lat and lng parameters."}, status=400)
 
         radius = float(request.query_params.get("radius", 3))  # miles
-        jobs = JobPost.objects.filter(is_active=True)
-
-        nearby = []
-        for job in jobs:
-            if job.latitude and job.longitude:
-                dist = self.haversine(user_lat, user_lng, job.latitude, job.longitude)
-                if dist <= radius:
-                    nearby.append(job)
-
-        serializer = JobPostSerializer(nearby, many=True)
-        return Response({"count": len(nearby), "results": serializer.data}, status=200)
-
-    def haversine(self, lat1, lon1, lat2, lon2):
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-        c = 2 * asin(sqrt(a))
-        miles = 3956 * c
-        return miles
+
+        # Bounding box, distance filter and ordering all run in the database.
+        # Unlike NearbyArtisansView this does not rank with geo.nearest():
+        # the equirectangular distance lets the database sort and paginate,
+        # and within a few miles it agrees with the haversine distance.
+        box = bounding_box(user_lat, user_lng, radius, radius=EARTH_RADIUS_MILES)
+        max_sq = distance_in_degrees(radius, radius=EARTH_RADIUS_MILES) ** 2
+
+        jobs = (
+            filter_by_box(JobPost.objects.live(), box, cell_field=None)
+            .annotate(distance_sq=planar_distance_sq(user_lat, user_lng))
+            .filter(distance_sq__lte=max_sq)
+            .select_related("user")
+            .order_by("distance_sq", "-created_at")
+        )
+
+        paginator = JobPagination()
+        page = paginator.paginate_queryset(jobs, request, view=self)
+        serializer = JobPostSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
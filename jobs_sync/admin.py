@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job, JobSyncLog
+from .models import Job, JobSyncLog, FeedFetchState
 
 
 @admin.register(Job)
@@ -8,11 +8,11 @@ class JobAdmin(admin.ModelAdmin):
     list_filter = ("source", "company")
     search_fields = ("title", "company", "description", "location")
     ordering = ("-date_posted",)
-    readonly_fields = ("date_posted", "url")
+    readonly_fields = ("date_posted", "url", "canonical")
 
     fieldsets = (
         ("Job Info", {
-            "fields": ("title", "company", "location", "description", "source", "url")
+            "fields": ("title", "company", "location", "description", "source", "url", "canonical")
         }),
         ("Meta Data", {
             "fields": ("date_posted",),
@@ -31,3 +31,9 @@ class JobSyncLogAdmin(admin.ModelAdmin):
     list_filter = ("status", "source")
     ordering = ("-run_time",)
 
+
+@admin.register(FeedFetchState)
+class FeedFetchStateAdmin(admin.ModelAdmin):
+    list_display = ("source", "url", "etag", "last_checked_at", "last_changed_at")
+    search_fields = ("source", "url")
+    readonly_fields = ("etag", "last_modified", "content_hash", "last_checked_at", "last_changed_at")
@@ -0,0 +1,145 @@
+import hashlib
+import re
+
+from django.db.models import Q
+from django.utils.html import strip_tags
+
+
+# -------------------------------------------------------------------------
+# Near-duplicate detection (SimHash + LSH bands)
+# -------------------------------------------------------------------------
+# Every job gets a 64-bit SimHash over its normalized title, company and
+# description. Two postings are near-duplicates when their hashes differ in
+# at most MAX_HAMMING_DISTANCE bits. The hash is split into LSH_BANDS bands
+# stored in indexed columns (lsh_0..lsh_3); by pigeonhole, any two hashes
+# within 3 bits agree exactly on at least one of 4 bands, so candidates are
+# found with indexed equality lookups instead of a table scan.
+
+SIMHASH_BITS = 64
+LSH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // LSH_BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+MAX_HAMMING_DISTANCE = LSH_BANDS - 1
+
+BAND_FIELDS = [f"lsh_{i}" for i in range(LSH_BANDS)]
+
+# Title/company identify a vacancy far better than the description, which
+# differs between a full post and an aggregator's snippet.
+FIELD_WEIGHTS = {"title": 4, "company": 4, "description": 1}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    return _WORD_RE.findall(strip_tags(text or "").lower())
+
+
+def _features(job):
+    for field, weight in FIELD_WEIGHTS.items():
+        words = normalize(job.get(field))
+        # Single words for short fields, word bigrams for prose
+        grams = words if len(words) < 8 else [" ".join(p) for p in zip(words, words[1:])]
+        for gram in grams:
+            yield f"{field}:{gram}", weight
+
+
+def _hash64(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(job):
+    """
+    64-bit SimHash (unsigned int) of a job dict.
+    """
+    counts = [0] * SIMHASH_BITS
+    for feature, weight in _features(job):
+        h = _hash64(feature)
+        for bit in range(SIMHASH_BITS):
+            counts[bit] += weight if h >> bit & 1 else -weight
+
+    return sum(1 << bit for bit, count in enumerate(counts) if count > 0)
+
+
+def _to_signed(value):
+    # BigIntegerField is signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def fingerprint(job):
+    """
+    Model field values (simhash + LSH band keys) for a job dict.
+    """
+    value = simhash(job)
+    fields = {"simhash": _to_signed(value)}
+    for i, name in enumerate(BAND_FIELDS):
+        fields[name] = value >> (i * BAND_BITS) & BAND_MASK
+    return fields
+
+
+def hamming(a, b):
+    return (_to_unsigned(a) ^ _to_unsigned(b)).bit_count()
+
+
+def collapse_duplicates(queryset, pks):
+    """
+    Attach each job in `pks` that is still canonical to an older canonical
+    job it near-duplicates, looking candidates up through the LSH band
+    columns. `queryset` is the Job manager (or a historical model's in
+    migrations). Returns the number of jobs collapsed.
+    """
+    fields = ["id", "simhash", *BAND_FIELDS]
+    rows = list(
+        queryset.filter(pk__in=pks, canonical__isnull=True, simhash__isnull=False)
+        .values_list(*fields)
+        .order_by("id")
+    )
+    if not rows:
+        return 0
+
+    # One query for every canonical job sharing any band with the batch
+    lookup = Q()
+    for i, name in enumerate(BAND_FIELDS):
+        lookup |= Q(**{f"{name}__in": {row[2 + i] for row in rows}})
+
+    candidates = (
+        queryset.filter(lookup, canonical__isnull=True, simhash__isnull=False)
+        .exclude(pk__in=[row[0] for row in rows])
+        .values_list(*fields)
+    )
+
+    buckets = {}
+
+    def index(row):
+        for i in range(LSH_BANDS):
+            buckets.setdefault((i, row[2 + i]), []).append(row)
+
+    for row in candidates:
+        index(row)
+
+    merges = {}
+    for row in rows:
+        pk, value = row[0], row[1]
+        seen = set()
+        best = None
+        for i in range(LSH_BANDS):
+            for other in buckets.get((i, row[2 + i]), ()):
+                if other[0] in seen or other[0] >= pk:
+                    continue
+                seen.add(other[0])
+                if hamming(value, other[1]) <= MAX_HAMMING_DISTANCE and (best is None or other[0] < best):
+                    best = other[0]
+
+        if best is None:
+            # Canonical itself; later rows in the batch may collapse into it
+            index(row)
+        else:
+            merges.setdefault(best, []).append(pk)
+
+    for canonical_id, duplicate_ids in merges.items():
+        queryset.filter(pk__in=duplicate_ids).update(canonical_id=canonical_id)
+
+    return sum(len(ids) for ids in merges.values())
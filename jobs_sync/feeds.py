@@ -0,0 +1,85 @@
+import xml.etree.ElementTree as ET
+
+from django.utils.html import strip_tags
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text(node, *tags):
+    # First non-empty child text among `tags` (namespace-agnostic)
+    for child in node:
+        if _local(child.tag) in tags and child.text and child.text.strip():
+            return child.text.strip()
+    return ""
+
+
+def iter_elements(stream, tag):
+    """
+    Stream every <tag> element out of an XML file object with iterparse.
+    Each element is detached from the tree once the caller is done with it,
+    so memory stays flat however large the feed is.
+    """
+    stack = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if _local(elem.tag) != tag:
+            continue
+
+        yield elem
+
+        if stack:
+            stack[-1].remove(elem)
+        elem.clear()
+
+
+def parse_rss_jobs(stream, source):
+    """
+    RSS 2.0 job feed (e.g. Jobberman) -> job dicts for ingest_jobs().
+    """
+    for item in iter_elements(stream, "item"):
+        url = _text(item, "link", "guid")
+        if not url:
+            continue
+
+        title = _text(item, "title")
+        company = _text(item, "company", "creator", "author")
+        if not company and " at " in title:
+            title, company = title.rsplit(" at ", 1)
+
+        yield {
+            "title": title[:255],
+            "company": (company or source)[:255],
+            "location": _text(item, "location", "city")[:255],
+            "description": strip_tags(_text(item, "description", "encoded")),
+            "source": source,
+            "url": url,
+        }
+
+
+def parse_indeed_jobs(stream, source="Indeed"):
+    """
+    Indeed publisher XML (<result> elements) -> job dicts for ingest_jobs().
+    """
+    for result in iter_elements(stream, "result"):
+        url = _text(result, "url")
+        if not url:
+            continue
+
+        location = ", ".join(
+            part for part in (_text(result, "city"), _text(result, "state")) if part
+        ) or _text(result, "formattedLocation")
+
+        yield {
+            "title": _text(result, "jobtitle")[:255],
+            "company": (_text(result, "company") or source)[:255],
+            "location": location[:255],
+            "description": strip_tags(_text(result, "snippet")),
+            "source": source,
+            "url": url,
+        }
@@ -0,0 +1,104 @@
+import hashlib
+import tempfile
+from dataclasses import dataclass
+
+import requests
+from django.utils import timezone
+
+from jobs_sync.models import FeedFetchState
+
+
+USER_AGENT = "SpectrumArena/1.0"
+
+# Bodies larger than this are spooled to a temp file instead of memory
+SPOOL_MAX_BYTES = 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass
+class FeedSnapshot:
+    """
+    Result of a conditional GET. `changed` is False on a 304 or when the
+    body hashes to what we processed last time; `stream` is then None.
+    Otherwise `stream` is a binary file object positioned at the start of
+    the body; call close() when done with it.
+    """
+    url: str
+    changed: bool
+    stream: object = None
+    etag: str = ""
+    last_modified: str = ""
+    content_hash: str = ""
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def save_state(self, source):
+        """
+        Persist the validators. Call only after the body was processed,
+        so a failed parse/ingest is retried on the next run.
+        """
+        now = timezone.now()
+        defaults = {"url": self.url, "last_checked_at": now}
+
+        if self.etag:
+            defaults["etag"] = self.etag
+        if self.last_modified:
+            defaults["last_modified"] = self.last_modified
+        if self.changed:
+            defaults["content_hash"] = self.content_hash
+            defaults["last_changed_at"] = now
+
+        FeedFetchState.objects.update_or_create(source=source, defaults=defaults)
+
+
+def conditional_get(url, state=None, timeout=30):
+    """
+    GET `url` with If-None-Match / If-Modified-Since taken from `state`
+    (a FeedFetchState or None). Does not touch the database, so it is safe
+    to call from the sync worker threads.
+    """
+    headers = {"User-Agent": USER_AGENT}
+
+    # Validators only apply to the URL they were issued for
+    if state is not None and state.url == url:
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+    with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304:
+            return FeedSnapshot(url=url, changed=False)
+
+        response.raise_for_status()
+
+        # Download in chunks, hashing as we go; large feeds spill to disk
+        digest = hashlib.sha256()
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                digest.update(chunk)
+                spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+
+        snapshot = FeedSnapshot(
+            url=url,
+            changed=True,
+            stream=spool,
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+            content_hash=digest.hexdigest(),
+        )
+
+    # Server ignored the validators but nothing changed
+    if state is not None and state.url == url and state.content_hash == snapshot.content_hash:
+        snapshot.close()
+        snapshot.changed = False
+
+    return snapshot
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from jobs_sync.dedupe import BAND_FIELDS, collapse_duplicates, fingerprint
+from jobs_sync.models import Job
+
+
+# Columns refreshed when an incoming job matches an existing url
+UPSERT_FIELDS = ["title", "company", "location", "description", "source", "simhash", *BAND_FIELDS]
+
+
+def _build(job):
+    obj = Job(**{k: v for k, v in job.items() if k in Job.SYNC_FIELDS})
+    for name, value in fingerprint(job).items():
+        setattr(obj, name, value)
+    return obj
+
+
+@dataclass
+class IngestResult:
+    inserted: int = 0
+    updated: int = 0
+    collapsed: int = 0  # jobs (new or edited) attached to an existing canonical job
+
+    def __add__(self, other):
+        return IngestResult(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.collapsed + other.collapsed,
+        )
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def ingest_jobs(jobs, chunk_size=None):
+    """
+    Bulk upsert an iterable of job dicts (title, company, location,
+    description, source, url[, date_posted]) into jobs_sync.Job.
+
+    `jobs` is consumed lazily, chunk_size items at a time, so a generator
+    fed by a streaming parser never has more than one chunk in memory.
+    Each chunk is deduped by url (last one wins) and written with one
+    INSERT ... ON CONFLICT (url) DO UPDATE. A url repeated in a later chunk
+    is simply upserted again (and counted as updated).
+    Newly inserted jobs that near-duplicate an existing canonical job (e.g.
+    the same vacancy from another source) are attached to it. An update
+    that changes a job's fingerprint re-checks that job, and any copies
+    attached to it, the same way.
+    Returns an IngestResult with inserted / updated / collapsed counts.
+    """
+    chunk_size = chunk_size or settings.JOB_SYNC_BATCH_SIZE
+    result = IngestResult()
+
+    for raw_chunk in _chunks(jobs, chunk_size):
+        by_url = {job["url"]: job for job in raw_chunk if job.get("url")}
+        if not by_url:
+            continue
+
+        chunk = list(by_url.values())
+        urls = list(by_url)
+
+        with transaction.atomic():
+            existing = dict(Job.objects.filter(url__in=urls).values_list("url", "simhash"))
+            objs = [_build(job) for job in chunk]
+
+            Job.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=["url"],
+                update_fields=UPSERT_FIELDS,
+            )
+
+            recheck = list(Job.objects.filter(url__in=set(urls) - set(existing)).values_list("id", flat=True))
+
+            edited = [obj.url for obj in objs if obj.url in existing and obj.simhash != existing[obj.url]]
+            if edited:
+                # An edited posting may no longer match the job it was folded
+                # into (or its copies may no longer match it): detach and redo
+                edited_ids = Job.objects.filter(url__in=edited).values_list("id", flat=True)
+                detached = list(
+                    Job.objects.filter(Q(pk__in=edited_ids) | Q(canonical_id__in=edited_ids))
+                    .values_list("id", flat=True)
+                )
+                Job.objects.filter(pk__in=detached).update(canonical=None)
+                recheck += detached
+
+            collapsed = collapse_duplicates(Job.objects, recheck)
+
+        result += IngestResult(
+            inserted=len(chunk) - len(existing),
+            updated=len(existing),
+            collapsed=collapsed,
+        )
+
+    return result
@@ -7,6 +7,11 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         self.stdout.write(self.style.WARNING("🚀 Starting job sync..."))
-        run_all_syncs()
-        self.stdout.write(self.style.SUCCESS("✅ Job sync completed successfully."))
+        logs = run_all_syncs()
+        new_jobs = sum(log.new_jobs for log in logs.values())
+        failed = [name for name, log in logs.items() if log.status == "FAILED"]
+
+        if failed:
+            self.stdout.write(self.style.ERROR(f"❌ Failed sources: {', '.join(failed)}"))
+        self.stdout.write(self.style.SUCCESS(f"✅ Job sync completed ({new_jobs} new jobs)."))
 
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_sync', '0003_alter_job_date_posted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedFetchState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('last_cursor', models.CharField(blank=True, max_length=255)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_changed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Feed Fetch State',
+                'verbose_name_plural': 'Feed Fetch States',
+            },
+        ),
+    ]
@@ -0,0 +1,187 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:44
+
+import hashlib
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils.html import strip_tags
+
+
+# -------------------------------------------------------------------------
+# Frozen copy of jobs_sync.dedupe as of this migration, so later changes
+# to the live hashing cannot change what this backfill computes
+# -------------------------------------------------------------------------
+SIMHASH_BITS = 64
+LSH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // LSH_BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+MAX_HAMMING_DISTANCE = LSH_BANDS - 1
+
+BAND_FIELDS = [f"lsh_{i}" for i in range(LSH_BANDS)]
+
+FIELD_WEIGHTS = {"title": 4, "company": 4, "description": 1}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    return _WORD_RE.findall(strip_tags(text or "").lower())
+
+
+def _features(job):
+    for field, weight in FIELD_WEIGHTS.items():
+        words = normalize(job.get(field))
+        grams = words if len(words) < 8 else [" ".join(p) for p in zip(words, words[1:])]
+        for gram in grams:
+            yield f"{field}:{gram}", weight
+
+
+def _hash64(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def simhash(job):
+    counts = [0] * SIMHASH_BITS
+    for feature, weight in _features(job):
+        h = _hash64(feature)
+        for bit in range(SIMHASH_BITS):
+            counts[bit] += weight if h >> bit & 1 else -weight
+
+    return sum(1 << bit for bit, count in enumerate(counts) if count > 0)
+
+
+def _to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def fingerprint(job):
+    value = simhash(job)
+    fields = {"simhash": _to_signed(value)}
+    for i, name in enumerate(BAND_FIELDS):
+        fields[name] = value >> (i * BAND_BITS) & BAND_MASK
+    return fields
+
+
+def hamming(a, b):
+    return (_to_unsigned(a) ^ _to_unsigned(b)).bit_count()
+
+
+def collapse_duplicates(queryset, pks):
+    fields = ["id", "simhash", *BAND_FIELDS]
+    rows = list(
+        queryset.filter(pk__in=pks, canonical__isnull=True, simhash__isnull=False)
+        .values_list(*fields)
+        .order_by("id")
+    )
+    if not rows:
+        return 0
+
+    lookup = Q()
+    for i, name in enumerate(BAND_FIELDS):
+        lookup |= Q(**{f"{name}__in": {row[2 + i] for row in rows}})
+
+    candidates = (
+        queryset.filter(lookup, canonical__isnull=True, simhash__isnull=False)
+        .exclude(pk__in=[row[0] for row in rows])
+        .values_list(*fields)
+    )
+
+    buckets = {}
+
+    def index(row):
+        for i in range(LSH_BANDS):
+            buckets.setdefault((i, row[2 + i]), []).append(row)
+
+    for row in candidates:
+        index(row)
+
+    merges = {}
+    for row in rows:
+        pk, value = row[0], row[1]
+        seen = set()
+        best = None
+        for i in range(LSH_BANDS):
+            for other in buckets.get((i, row[2 + i]), ()):
+                if other[0] in seen or other[0] >= pk:
+                    continue
+                seen.add(other[0])
+                if hamming(value, other[1]) <= MAX_HAMMING_DISTANCE and (best is None or other[0] < best):
+                    best = other[0]
+
+        if best is None:
+            index(row)
+        else:
+            merges.setdefault(best, []).append(pk)
+
+    for canonical_id, duplicate_ids in merges.items():
+        queryset.filter(pk__in=duplicate_ids).update(canonical_id=canonical_id)
+
+    return sum(len(ids) for ids in merges.values())
+
+
+def backfill_fingerprints(apps, schema_editor):
+    Job = apps.get_model("jobs_sync", "Job")
+    fields = ["simhash", *BAND_FIELDS]
+    batch = []
+    for job in Job.objects.only("id", "title", "company", "description").iterator(chunk_size=2000):
+        values = fingerprint({"title": job.title, "company": job.company, "description": job.description})
+        for name, value in values.items():
+            setattr(job, name, value)
+        batch.append(job)
+        if len(batch) >= 2000:
+            Job.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Job.objects.bulk_update(batch, fields)
+
+    # Oldest first, so the earliest posting of a vacancy stays canonical
+    ids = list(Job.objects.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(ids), 2000):
+        collapse_duplicates(Job.objects, ids[i:i + 2000])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_sync', '0004_feedfetchstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='canonical',
+            field=models.ForeignKey(blank=True, help_text='Set when this posting is a cross-posted copy of another job.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='jobs_sync.job'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='lsh_0',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='lsh_1',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='lsh_2',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='lsh_3',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
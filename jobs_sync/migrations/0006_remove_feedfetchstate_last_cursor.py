@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_sync', '0005_job_near_duplicate_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='feedfetchstate',
+            name='last_cursor',
+        ),
+    ]
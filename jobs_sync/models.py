@@ -2,6 +2,18 @@ from django.db import models
 from django.utils import timezone
 
 
+class JobQuerySet(models.QuerySet):
+    def with_source_urls(self):
+        """
+        Canonical jobs with their cross-posted copies prefetched, as
+        JobSerializer's source_urls expects.
+        """
+        duplicates = models.Prefetch(
+            "duplicates", queryset=Job.objects.only("id", "source", "url", "canonical_id").order_by("id")
+        )
+        return self.filter(canonical__isnull=True).prefetch_related(duplicates)
+
+
 class Job(models.Model):
     """
     External Job Model
@@ -15,6 +27,26 @@ class Job(models.Model):
     url = models.URLField(unique=True)
     date_posted = models.DateTimeField(default=timezone.now)
 
+    # Near-duplicate detection (see jobs_sync.dedupe)
+    simhash = models.BigIntegerField(null=True, blank=True, editable=False)
+    lsh_0 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    lsh_1 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    lsh_2 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    lsh_3 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    canonical = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="duplicates",
+        help_text="Set when this posting is a cross-posted copy of another job.",
+    )
+
+    objects = JobQuerySet.as_manager()
+
+    # Keys accepted from fetched job dicts (see jobs_sync.ingest)
+    SYNC_FIELDS = {"title", "company", "location", "description", "source", "url", "date_posted"}
+
     class Meta:
         ordering = ["-date_posted"]
         verbose_name = "External Job"
@@ -54,3 +86,23 @@ class JobSyncLog(models.Model):
     def __str__(self):
         return f"{self.source} - {self.new_jobs} jobs ({self.status})"
 
+
+class FeedFetchState(models.Model):
+    """
+    Conditional-fetch state per job source: HTTP validators and a hash of
+    the last body we processed, so an unchanged feed is never re-parsed.
+    """
+    source = models.CharField(max_length=50, unique=True)
+    url = models.URLField(max_length=500)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)  # sha256 of the last processed body
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Feed Fetch State"
+        verbose_name_plural = "Feed Fetch States"
+
+    def __str__(self):
+        return f"{self.source} ({self.url})"
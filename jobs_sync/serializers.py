@@ -1,11 +1,29 @@
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
 from .models import Job, JobSyncLog
 
 
 class JobSerializer(serializers.ModelSerializer):
+    """
+    Serialize canonical jobs from Job.objects.with_source_urls(); the
+    duplicates must be prefetched, or every row would cost a query.
+    """
+    # Every place this vacancy was posted, this job's own url first
+    source_urls = serializers.SerializerMethodField()
+
     class Meta:
         model = Job
-        fields = "__all__"
+        exclude = ["simhash", "lsh_0", "lsh_1", "lsh_2", "lsh_3", "canonical"]
+
+    def get_source_urls(self, obj):
+        if "duplicates" not in getattr(obj, "_prefetched_objects_cache", {}):
+            raise ImproperlyConfigured(
+                "JobSerializer needs duplicates prefetched; use Job.objects.with_source_urls()."
+            )
+
+        return [{"source": obj.source, "url": obj.url}] + [
+            {"source": dup.source, "url": dup.url} for dup in obj.duplicates.all()
+        ]
 
 
 class JobSyncLogSerializer(serializers.ModelSerializer):
@@ -1,16 +1,67 @@
-import requests
-from jobs_sync.models import Job
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from typing import Callable
 
+from django.conf import settings
+from django.utils import timezone
 
-def sync_google_jobs():
+from jobs_sync.feeds import parse_indeed_jobs, parse_rss_jobs
+from jobs_sync.fetch import conditional_get
+from jobs_sync.ingest import IngestResult, ingest_jobs
+from jobs_sync.models import FeedFetchState, JobSyncLog
+
+
+# -------------------------------------------------------
+# SOURCE REGISTRY
+# -------------------------------------------------------
+@dataclass
+class JobSource:
+    name: str
+    fetch: Callable  # () -> jobs, or (body) -> jobs for feed sources
+    timeout: float
+    feed_setting: str = None  # settings name holding the feed URL
+
+    @property
+    def feed_url(self):
+        return getattr(settings, self.feed_setting, None) if self.feed_setting else None
+
+
+SOURCES = {}
+
+
+def register_source(name, timeout=None, feed_setting=None):
     """
-    Fetch and store jobs from Google Jobs.
+    Register a fetcher under `name`; it returns an iterable of job dicts
+    for jobs_sync.ingest.ingest_jobs().
+
+    Plain sources: fetch() does its own fetching, in a worker thread, so it
+    must not touch the database.
+    Feed sources (feed_setting given): the runner downloads the configured
+    URL with a conditional GET in a worker thread, then, only if the feed
+    changed, streams fetch(stream) straight into ingest_jobs().
+    """
+    def decorator(fetch):
+        SOURCES[name] = JobSource(
+            name=name,
+            fetch=fetch,
+            timeout=timeout or settings.JOB_SYNC_SOURCE_TIMEOUT,
+            feed_setting=feed_setting,
+        )
+        return fetch
+    return decorator
+
+
+@register_source("Google")
+def fetch_google_jobs():
+    """
+    Fetch jobs from Google Jobs.
     (This is currently a mock example; we'll integrate live APIs or scraping next.)
     """
-    print("🔄 Syncing from Google Jobs...")
+    print("🔄 Fetching from Google Jobs...")
 
     # Example pseudo-fetch data
-    jobs = [
+    return [
         {
             "title": "Backend Developer",
             "company": "Google",
@@ -21,36 +72,112 @@ def sync_google_jobs():
         },
     ]
 
-    for job in jobs:
-        Job.objects.get_or_create(url=job["url"], defaults=job)
 
-    print("✅ Google Jobs synced successfully.")
+@register_source("Jobberman", feed_setting="JOBBERMAN_FEED_URL")
+def fetch_jobberman_jobs(stream):
+    """
+    Parse the Jobberman RSS feed.
+    """
+    return parse_rss_jobs(stream, "Jobberman")
 
 
-def sync_jobberman():
+@register_source("Indeed", feed_setting="INDEED_FEED_URL")
+def fetch_indeed_jobs(stream):
     """
-    Fetch and store jobs from Jobberman (RSS / JSON feed).
+    Parse the Indeed XML feed.
     """
-    print("🔄 Syncing from Jobberman...")
-    # TODO: Implement Jobberman API or RSS parser
-    pass
+    return parse_indeed_jobs(stream, "Indeed")
 
 
-def sync_indeed():
+def _fetch(source, state):
     """
-    Fetch and store jobs from Indeed.
+    Worker-thread half of a sync: network only, no database.
+    Returns (jobs, snapshot). For feed sources jobs is a lazy generator over
+    the downloaded body, or None when the feed is unchanged.
     """
-    print("🔄 Syncing from Indeed...")
-    # TODO: Implement Indeed public search / feed
-    pass
+    if not source.feed_setting:
+        return list(source.fetch()), None
+
+    url = source.feed_url
+    if not url:
+        return [], None
+
+    print(f"🔄 Fetching {source.name} feed...")
+    snapshot = conditional_get(url, state, timeout=source.timeout)
+    if not snapshot.changed:
+        return None, snapshot
 
+    # Parsed lazily on the main thread, chunk by chunk, as ingest_jobs() pulls
+    return source.fetch(snapshot.stream), snapshot
 
-def run_all_syncs():
+
+# -------------------------------------------------------
+# RUNNER
+# -------------------------------------------------------
+def run_all_syncs(names=None):
     """
-    Run all job synchronization sources sequentially.
+    Fetch every registered source (or just `names`) in parallel, then ingest
+    each one and write a JobSyncLog row per source. A slow or failing source
+    only affects its own row.
+    Returns {source name: JobSyncLog}.
     """
-    sync_google_jobs()
-    sync_jobberman()
-    sync_indeed()
-    print("✅ All job sources synced successfully.")
+    sources = [SOURCES[name] for name in (names or SOURCES)]
+    run_time = timezone.now()
+    logs = {}
+
+    if not sources:
+        return logs
+
+    states = FeedFetchState.objects.in_bulk([s.name for s in sources], field_name="source")
+
+    pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="job-sync")
+    started = time.monotonic()
+    futures = {
+        source.name: pool.submit(_fetch, source, states.get(source.name))
+        for source in sources
+    }
+
+    try:
+        for source in sources:
+            result = IngestResult()
+            snapshot = None
+            remaining = max(0, started + source.timeout - time.monotonic())
+
+            try:
+                jobs, snapshot = futures[source.name].result(timeout=remaining)
+
+                if jobs is None:
+                    message = "Feed not modified; skipped."
+                else:
+                    result = ingest_jobs(jobs)
+                    message = (
+                        f"{result.inserted} new, {result.updated} updated, "
+                        f"{result.collapsed} duplicates."
+                    )
+
+                if snapshot is not None:
+                    snapshot.save_state(source.name)
+                status = "SUCCESS"
+            except TimeoutError:
+                status = "FAILED"
+                message = f"Timed out after {source.timeout}s."
+            except Exception as e:
+                status = "FAILED"
+                message = str(e)
+            finally:
+                if snapshot is not None:
+                    snapshot.close()
+
+            print(f"{'✅' if status == 'SUCCESS' else '❌'} {source.name}: {message}")
+            logs[source.name] = JobSyncLog.objects.create(
+                source=source.name,
+                status=status,
+                new_jobs=result.inserted,
+                message=message,
+                run_time=run_time,
+            )
+    finally:
+        # Don't block on a source that overran its timeout
+        pool.shutdown(wait=False, cancel_futures=True)
 
+    return logs
@@ -6,6 +6,10 @@ from datetime import timedelta
 from jobs_sync.sync_jobs import run_all_syncs
 from jobs_sync.models import JobSyncLog
 
+
+class PartialSyncError(Exception):
+    """One or more sources failed; their JobSyncLog rows are already written."""
+
 # -------------------------
 # existing auto_sync_jobs (keep as-is)
 # -------------------------
@@ -17,14 +21,13 @@ def auto_sync_jobs():
     start_time = timezone.now()
     try:
         print("🔁 Running scheduled job sync...")
-        run_all_syncs()
-        log = JobSyncLog.objects.create(
-            source="All",
-            status="SUCCESS",
-            new_jobs=0,
-            message="All job sources synced successfully.",
-            run_time=start_time,
-        )
+        logs = run_all_syncs()
+
+        failed = [log for log in logs.values() if log.status == "FAILED"]
+        if failed:
+            raise PartialSyncError(
+                "; ".join(f"{log.source}: {log.message}" for log in failed)
+            )
         html_content = f"""<html>...SUCCESS HTML (same as your current version)...</html>"""
         # Use the EmailMultiAlternatives version you already have
         msg = EmailMultiAlternatives(
@@ -37,13 +40,14 @@ def auto_sync_jobs():
         msg.send()
         print("✅ HTML report with logo sent successfully.")
     except Exception as e:
-        log = JobSyncLog.objects.create(
-            source="All",
-            status="FAILED",
-            new_jobs=0,
-            message=str(e),
-            run_time=start_time,
-        )
+        if not isinstance(e, PartialSyncError):
+            JobSyncLog.objects.create(
+                source="All",
+                status="FAILED",
+                new_jobs=0,
+                message=str(e),
+                run_time=start_time,
+            )
         html_content = f"""<html>...FAIL HTML (same as your current version)...</html>"""
         msg = EmailMultiAlternatives(
             subject=f"❌ {site_name} Job Sync Failed",
@@ -0,0 +1,358 @@
+import io
+import threading
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from . import sync_jobs
+from .dedupe import collapse_duplicates, fingerprint, hamming, simhash
+from .feeds import iter_elements, parse_indeed_jobs, parse_rss_jobs
+from .fetch import FeedSnapshot, conditional_get
+from .ingest import ingest_jobs
+from .models import FeedFetchState, Job, JobSyncLog
+from .serializers import JobSerializer
+from .views import JobSyncListView
+
+
+DESCRIPTION = (
+    "Build and scale payment APIs in Django and Postgres for merchants "
+    "across Africa. Own services end to end."
+)
+
+
+def posting(url, source="Jobberman", **fields):
+    job = {
+        "title": "Senior Backend Developer",
+        "company": "Paystack",
+        "location": "Lagos",
+        "description": DESCRIPTION,
+        "source": source,
+        "url": url,
+    }
+    job.update(fields)
+    return job
+
+
+# The same vacancy as posted elsewhere: HTML-wrapped, or with a trailer
+CROSS_POSTS = [
+    posting("https://jobberman.example/1"),
+    posting("https://indeed.example/1", source="Indeed", description=f"<p>{DESCRIPTION}</p>"),
+    posting("https://google.example/1", source="Google", description=f"{DESCRIPTION} Apply now."),
+]
+
+UNRELATED = posting(
+    "https://jobberman.example/2", title="Accountant", company="Dangote", description="Prepare monthly reports"
+)
+
+
+class DedupeTests(TestCase):
+    def test_near_duplicates_are_within_the_hamming_threshold(self):
+        base = simhash(CROSS_POSTS[0])
+        for job in CROSS_POSTS[1:]:
+            self.assertLessEqual(hamming(base, simhash(job)), 3)
+
+        self.assertGreater(hamming(base, simhash(UNRELATED)), 3)
+        self.assertGreater(hamming(base, simhash(posting("x", title="Senior Frontend Developer"))), 3)
+
+    def test_fingerprint_round_trips_through_a_signed_column(self):
+        fields = fingerprint(CROSS_POSTS[0])
+        self.assertTrue(-(1 << 63) <= fields["simhash"] < 1 << 63)
+        self.assertEqual(hamming(fields["simhash"], simhash(CROSS_POSTS[0])), 0)
+
+    def test_collapse_attaches_copies_to_the_oldest_posting(self):
+        jobs = [Job.objects.create(**job, **fingerprint(job)) for job in [*CROSS_POSTS, UNRELATED]]
+
+        collapsed = collapse_duplicates(Job.objects, [job.pk for job in jobs])
+
+        self.assertEqual(collapsed, 2)
+        canonical = dict(Job.objects.values_list("url", "canonical_id"))
+        self.assertEqual(
+            [canonical[job.url] for job in jobs],
+            [None, jobs[0].pk, jobs[0].pk, None],
+        )
+
+
+class IngestTests(TestCase):
+    def test_counts_inserts_updates_and_collapsed_copies(self):
+        result = ingest_jobs([*CROSS_POSTS, UNRELATED])
+        self.assertEqual((result.inserted, result.updated, result.collapsed), (4, 0, 2))
+
+        again = ingest_jobs(CROSS_POSTS)
+        self.assertEqual((again.inserted, again.updated, again.collapsed), (0, 3, 0))
+        self.assertEqual(Job.objects.count(), 4)
+        self.assertEqual(Job.objects.filter(canonical__isnull=True).count(), 2)
+
+    def test_streams_in_chunks_and_last_duplicate_url_wins(self):
+        def jobs():
+            yield posting("https://example.com/a", title="Driver")
+            yield posting("https://example.com/a", title="Senior Driver")
+            yield posting("https://example.com/b", title="Cook", company="Chicken Republic")
+
+        result = ingest_jobs(jobs(), chunk_size=2)
+
+        self.assertEqual((result.inserted, result.updated), (2, 0))
+        self.assertEqual(Job.objects.get(url="https://example.com/a").title, "Senior Driver")
+
+    def test_edited_copy_leaves_its_canonical_job(self):
+        ingest_jobs(CROSS_POSTS[:2])
+        copy_url = CROSS_POSTS[1]["url"]
+        self.assertIsNotNone(Job.objects.get(url=copy_url).canonical_id)
+
+        result = ingest_jobs([dict(UNRELATED, url=copy_url)])
+
+        self.assertEqual(result.updated, 1)
+        self.assertIsNone(Job.objects.get(url=copy_url).canonical_id)
+
+    def test_edited_canonical_job_releases_its_copies(self):
+        ingest_jobs(CROSS_POSTS)
+        original_url = CROSS_POSTS[0]["url"]
+
+        ingest_jobs([dict(UNRELATED, url=original_url)])
+
+        # The two remaining copies still match each other: the older leads
+        first, second = (Job.objects.get(url=job["url"]) for job in CROSS_POSTS[1:])
+        self.assertIsNone(Job.objects.get(url=original_url).canonical_id)
+        self.assertIsNone(first.canonical_id)
+        self.assertEqual(second.canonical_id, first.pk)
+
+    def test_posting_edited_into_a_copy_is_collapsed(self):
+        ingest_jobs([CROSS_POSTS[0], UNRELATED])
+
+        result = ingest_jobs([dict(CROSS_POSTS[2], url=UNRELATED["url"])])
+
+        self.assertEqual(result.collapsed, 1)
+        self.assertEqual(
+            Job.objects.get(url=UNRELATED["url"]).canonical_id,
+            Job.objects.get(url=CROSS_POSTS[0]["url"]).pk,
+        )
+
+
+class JobListTests(TestCase):
+    factory = APIRequestFactory()
+
+    def test_source_urls_fold_copies_without_a_query_per_row(self):
+        ingest_jobs(CROSS_POSTS)
+        for i in range(20):
+            ingest_jobs([posting(f"https://example.com/{i}", title=f"Role {i}", company=f"Company {i}")])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = JobSyncListView.as_view()(self.factory.get("/"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 21)
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+
+        vacancy = next(job for job in response.data if job["url"] == CROSS_POSTS[0]["url"])
+        self.assertEqual(
+            [entry["source"] for entry in vacancy["source_urls"]], ["Jobberman", "Indeed", "Google"]
+        )
+
+    def test_serializer_refuses_rows_without_the_prefetch(self):
+        ingest_jobs(CROSS_POSTS[:1])
+
+        with self.assertRaises(ImproperlyConfigured):
+            JobSerializer(Job.objects.all(), many=True).data
+
+
+RSS_FEED = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel>
+    <title>Jobberman</title>
+    <item>
+      <title>Backend Developer at Paystack</title>
+      <link>https://jobberman.example/1</link>
+      <description>&lt;p&gt;Build &lt;b&gt;APIs&lt;/b&gt;&lt;/p&gt;</description>
+      <location>Lagos</location>
+    </item>
+    <item>
+      <title>Accountant</title>
+      <guid>https://jobberman.example/2</guid>
+      <dc:creator>Dangote</dc:creator>
+    </item>
+    <item>
+      <title>No link, skipped</title>
+    </item>
+  </channel>
+</rss>"""
+
+INDEED_FEED = b"""<?xml version="1.0"?>
+<response>
+  <results>
+    <result>
+      <jobtitle>Driver</jobtitle>
+      <company>GIG Logistics</company>
+      <city>Ikeja</city>
+      <state>Lagos</state>
+      <snippet>Deliver &lt;b&gt;parcels&lt;/b&gt;</snippet>
+      <url>https://indeed.example/1</url>
+    </result>
+    <result>
+      <jobtitle>Cook</jobtitle>
+      <formattedLocation>Abuja</formattedLocation>
+      <url>https://indeed.example/2</url>
+    </result>
+  </results>
+</response>"""
+
+
+class FeedParsingTests(TestCase):
+    def test_iter_elements_streams_and_detaches_matches(self):
+        seen = []
+        for item in iter_elements(io.BytesIO(RSS_FEED), "item"):
+            seen.append(item.findtext("title"))
+
+        self.assertEqual(seen, ["Backend Developer at Paystack", "Accountant", "No link, skipped"])
+        # Matched elements were cleared once consumed
+        self.assertEqual(len(item), 0)
+
+    def test_parse_rss_jobs(self):
+        jobs = list(parse_rss_jobs(io.BytesIO(RSS_FEED), "Jobberman"))
+
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(
+            jobs[0],
+            {
+                "title": "Backend Developer",
+                "company": "Paystack",
+                "location": "Lagos",
+                "description": "Build APIs",
+                "source": "Jobberman",
+                "url": "https://jobberman.example/1",
+            },
+        )
+        self.assertEqual((jobs[1]["company"], jobs[1]["url"]), ("Dangote", "https://jobberman.example/2"))
+
+    def test_parse_indeed_jobs(self):
+        jobs = list(parse_indeed_jobs(io.BytesIO(INDEED_FEED)))
+
+        self.assertEqual([job["location"] for job in jobs], ["Ikeja, Lagos", "Abuja"])
+        self.assertEqual(jobs[0]["description"], "Deliver parcels")
+        self.assertEqual(jobs[1]["company"], "Indeed")
+
+
+def http_response(status=200, body=b"", headers=None):
+    response = mock.MagicMock()
+    response.__enter__.return_value = response
+    response.status_code = status
+    response.headers = headers or {}
+    response.iter_content.return_value = [body[i:i + 4] for i in range(0, len(body), 4)]
+    return response
+
+
+class ConditionalGetTests(TestCase):
+    url = "https://jobberman.example/feed"
+
+    def state(self, **fields):
+        return FeedFetchState(source="Jobberman", url=self.url, **fields)
+
+    def test_sends_validators_and_honours_304(self):
+        state = self.state(etag='"v1"', last_modified="Sat, 17 Oct 2026 10:00:00 GMT")
+
+        with mock.patch("jobs_sync.fetch.requests.get", return_value=http_response(304)) as get:
+            snapshot = conditional_get(self.url, state)
+
+        headers = get.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Sat, 17 Oct 2026 10:00:00 GMT")
+        self.assertFalse(snapshot.changed)
+        self.assertIsNone(snapshot.stream)
+
+    def test_validators_from_another_url_are_not_sent(self):
+        state = FeedFetchState(source="Jobberman", url="https://old.example/feed", etag='"v1"')
+
+        with mock.patch("jobs_sync.fetch.requests.get", return_value=http_response(200, b"<rss/>")) as get:
+            conditional_get(self.url, state).close()
+
+        self.assertNotIn("If-None-Match", get.call_args.kwargs["headers"])
+
+    def test_changed_body_is_spooled_and_hashed(self):
+        response = http_response(200, b"<rss>new</rss>", {"ETag": '"v2"'})
+
+        with mock.patch("jobs_sync.fetch.requests.get", return_value=response):
+            snapshot = conditional_get(self.url, self.state(content_hash="stale"))
+
+        self.assertTrue(snapshot.changed)
+        self.assertEqual(snapshot.stream.read(), b"<rss>new</rss>")
+        self.assertEqual(snapshot.etag, '"v2"')
+        snapshot.close()
+
+        snapshot.save_state("Jobberman")
+        state = FeedFetchState.objects.get(source="Jobberman")
+        self.assertEqual((state.etag, state.content_hash), ('"v2"', snapshot.content_hash))
+        self.assertIsNotNone(state.last_changed_at)
+
+    def test_unchanged_body_hash_is_skipped(self):
+        with mock.patch("jobs_sync.fetch.requests.get", return_value=http_response(200, b"<rss/>")):
+            first = conditional_get(self.url)
+            first.close()
+            second = conditional_get(self.url, self.state(content_hash=first.content_hash))
+
+        self.assertFalse(second.changed)
+        self.assertIsNone(second.stream)
+
+
+class RunAllSyncsTests(TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+        patcher = mock.patch.dict(sync_jobs.SOURCES, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def register(self, name, fetch, **kwargs):
+        sync_jobs.register_source(name, **kwargs)(fetch)
+
+    def test_each_source_gets_its_own_log(self):
+        def slow():
+            self.release.wait(5)
+            return [posting("https://slow.example/1")]
+
+        def broken():
+            raise ConnectionError("feed down")
+
+        self.register("Google", lambda: CROSS_POSTS[:2])
+        self.register("Slow", slow, timeout=0.2)
+        self.register("Broken", broken)
+
+        logs = sync_jobs.run_all_syncs()
+
+        self.assertEqual(
+            {name: (log.status, log.new_jobs) for name, log in logs.items()},
+            {"Google": ("SUCCESS", 2), "Slow": ("FAILED", 0), "Broken": ("FAILED", 0)},
+        )
+        self.assertEqual(logs["Google"].message, "2 new, 0 updated, 1 duplicates.")
+        self.assertEqual(logs["Slow"].message, "Timed out after 0.2s.")
+        self.assertEqual(logs["Broken"].message, "feed down")
+        self.assertEqual(JobSyncLog.objects.count(), 3)
+        self.assertFalse(Job.objects.filter(url="https://slow.example/1").exists())
+
+    @override_settings(JOBBERMAN_FEED_URL="https://jobberman.example/feed")
+    def test_unchanged_feed_is_not_parsed(self):
+        parse = mock.Mock()
+        self.register("Jobberman", parse, feed_setting="JOBBERMAN_FEED_URL")
+        snapshot = FeedSnapshot(url="https://jobberman.example/feed", changed=False, etag='"v1"')
+
+        with mock.patch.object(sync_jobs, "conditional_get", return_value=snapshot):
+            logs = sync_jobs.run_all_syncs()
+
+        parse.assert_not_called()
+        self.assertEqual(logs["Jobberman"].message, "Feed not modified; skipped.")
+        self.assertEqual(FeedFetchState.objects.get(source="Jobberman").etag, '"v1"')
+
+    @override_settings(JOBBERMAN_FEED_URL="https://jobberman.example/feed")
+    def test_changed_feed_is_streamed_into_ingest(self):
+        self.register("Jobberman", lambda stream: parse_rss_jobs(stream, "Jobberman"), feed_setting="JOBBERMAN_FEED_URL")
+        snapshot = FeedSnapshot(
+            url="https://jobberman.example/feed", changed=True, stream=io.BytesIO(RSS_FEED), content_hash="abc"
+        )
+
+        with mock.patch.object(sync_jobs, "conditional_get", return_value=snapshot):
+            logs = sync_jobs.run_all_syncs()
+
+        self.assertEqual((logs["Jobberman"].status, logs["Jobberman"].new_jobs), ("SUCCESS", 2))
+        self.assertEqual(FeedFetchState.objects.get(source="Jobberman").content_hash, "abc")
@@ -11,7 +11,8 @@ from .serializers import JobSerializer, JobSyncLogSerializer
 # LIST ALL FETCHED EXTERNAL JOBS
 # -------------------------------------------------------
 class JobSyncListView(generics.ListAPIView):
-    queryset = Job.objects.all()
+    # Cross-posted copies are folded into their canonical job's source_urls
+    queryset = Job.objects.with_source_urls()
     serializer_class = JobSerializer
 
 
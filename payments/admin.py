@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import SavedCard
+
+from .inbox import requeue_events
+from .models import SavedCard, WalletLedgerEntry, WebhookInboxEvent
 
 
 @admin.register(SavedCard)
@@ -24,3 +26,39 @@ class SavedCardAdmin(admin.ModelAdmin):
         "bank",
     )
 
+
+
+@admin.register(WalletLedgerEntry)
+class WalletLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("wallet", "kind", "balance_delta", "locked_delta", "reference", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("reference", "wallet__user__phone_number")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WebhookInboxEvent)
+class WebhookInboxEventAdmin(admin.ModelAdmin):
+    list_display = ("handler", "event", "reference", "status", "attempts", "next_attempt_at", "received_at", "processed_at")
+    list_filter = ("handler", "status", "event")
+    search_fields = ("reference",)
+    readonly_fields = (
+        "handler", "event", "reference", "body", "received_at", "claimed_at", "processed_at", "next_attempt_at",
+    )
+    ordering = ("-id",)
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue failed events")
+    def requeue(self, request, queryset):
+        self.message_user(request, f"Requeued {requeue_events(queryset)} event(s).")
+
+    def has_add_permission(self, request):
+        return False
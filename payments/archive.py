@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from .fields import compress_json
+from .models import ArchivedPayload, PaystackPayload, UtilityTransaction
+
+
+# --------------------------------------------------
+# PAYLOAD ARCHIVE
+# --------------------------------------------------
+# Provider JSON is only read back for support and audits once a row is
+# settled, so after PAYLOAD_ARCHIVE_AFTER_DAYS it is compressed into an
+# ArchivedPayload row and the inline JSON is cleared, leaving the hot row
+# with just the reference in its *_archive column. The model field
+# (fields.ArchivableJSONField) loads and decompresses it lazily on access,
+# so admin, serializers and services need no changes.
+#
+# IdempotencyKey.response is not archived: keys are swept after
+# IDEMPOTENCY_KEY_TTL_HOURS, long before they would turn cold.
+
+# (model, json field, age field, extra filter)
+ARCHIVABLE = [
+    (UtilityTransaction, "provider_response", "created_at", ~Q(status="pending")),
+    (PaystackPayload, "body", "created_at", Q()),
+]
+
+
+def archive_model(model, field, age_field, condition, cutoff, batch_size):
+    """
+    Move `field` into ArchivedPayload rows for rows older than `cutoff`,
+    batch_size rows per transaction (one INSERT and one UPDATE each).
+    Returns the number of rows archived.
+    """
+    archive_field = model._meta.get_field(model._meta.get_field(field).archive_field)
+    rows = (
+        model.objects.filter(condition, **{f"{field}__isnull": False, f"{age_field}__lt": cutoff})
+        .order_by("pk")
+        .values_list("pk", field)
+    )
+
+    last_pk = None
+    total = 0
+
+    while True:
+        batch = rows.filter(pk__gt=last_pk) if last_pk is not None else rows
+        batch = list(batch[:batch_size])
+        if not batch:
+            break
+
+        with transaction.atomic():
+            archives = ArchivedPayload.objects.bulk_create(
+                [ArchivedPayload(blob=compress_json(value)) for _, value in batch]
+            )
+            # The CASE update bulk_update() would build, written directly:
+            # bulk_update() reads values back through ArchivedJSONAttribute
+            links = [When(pk=pk, then=Value(archive.pk)) for (pk, _), archive in zip(batch, archives)]
+            model.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                **{field: None, archive_field.attname: Case(*links)}
+            )
+
+        total += len(batch)
+        last_pk = batch[-1][0]
+
+    return total
+
+
+def archive_payloads(older_than_days, batch_size=500):
+    """
+    Archive every registered payload older than `older_than_days`.
+    Returns {"app_label.model.field": rows archived}.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return {
+        f"{model._meta.label_lower}.{field}": archive_model(model, field, age_field, condition, cutoff, batch_size)
+        for model, field, age_field, condition in ARCHIVABLE
+    }
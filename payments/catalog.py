@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import DataBundle
+
+try:
+    from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+except ImportError:  # pragma: no cover - only the in-memory cache is used then
+    RedisConnectionError = RedisTimeoutError = OSError
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------------
+# Data bundle catalog cache
+# -------------------------------------------------------------------------
+# Serialized catalogs are cached per (network, category) under a version
+# number. Any DataBundle save/delete bumps the version (payments.signals),
+# which orphans every cached catalog at once; old entries just expire.
+# The "default" cache is Redis when configured; if it is unreachable the
+# per-process "local" cache is used with a short TTL instead.
+
+VERSION_KEY = "payments:bundles:version"
+LOCAL_TTL = 60
+
+NETWORKS = {value for value, _ in DataBundle.NETWORK_CHOICES}
+CATEGORIES = {value for value, _ in DataBundle.CATEGORY_CHOICES}
+
+
+# Errors meaning the cache server cannot be reached. Anything else (e.g.
+# the ValueError incr() raises for a missing key) goes to the caller.
+CACHE_UNAVAILABLE = (RedisConnectionError, RedisTimeoutError, OSError)
+
+
+def _call(method, *args, **kwargs):
+    try:
+        return getattr(caches["default"], method)(*args, **kwargs)
+    except CACHE_UNAVAILABLE as e:
+        logger.warning("Bundle cache unavailable, using local cache: %s", e)
+        if method in ("set", "add"):
+            kwargs["timeout"] = min(kwargs.get("timeout") or LOCAL_TTL, LOCAL_TTL)
+        return getattr(caches["local"], method)(*args, **kwargs)
+
+
+def catalog_version():
+    version = _call("get", VERSION_KEY)
+    if version is None:
+        # Millisecond seed so a lost version key never revives stale entries
+        _call("add", VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = _call("get", VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        _call("incr", VERSION_KEY)
+    except ValueError:
+        # Key missing: a fresh seed is as good as an increment
+        _call("set", VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def _build(network, category):
+    bundles = DataBundle.objects.filter(is_active=True)
+    if network:
+        bundles = bundles.filter(network=network)
+    if category:
+        bundles = bundles.filter(category=category)
+
+    rows = bundles.order_by("id").values("id", "network", "name", "volume", "validity", "selling_price")
+    return [
+        {
+            "id": row["id"],
+            "network": row["network"],
+            "name": row["name"],
+            "volume": row["volume"],
+            "validity": row["validity"],
+            "price": float(row["selling_price"]),
+        }
+        for row in rows
+    ]
+
+
+def _etag(data):
+    body = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    return '"{}"'.format(hashlib.sha256(body).hexdigest()[:32])
+
+
+def bundle_catalog(network=None, category=None):
+    """
+    Returns (data, etag) for the active bundles matching network/category,
+    read through the versioned cache. The ETag is derived from the content,
+    so a version bump that changes nothing for this filter keeps it stable.
+    """
+    if (network and network not in NETWORKS) or (category and category not in CATEGORIES):
+        # Unknown filters match nothing; don't let them mint cache keys
+        return [], _etag([])
+
+    key = f"payments:bundles:v{catalog_version()}:{network or '*'}:{category or '*'}"
+    entry = _call("get", key)
+
+    if entry is None:
+        data = _build(network, category)
+        entry = {"data": data, "etag": _etag(data)}
+        _call("set", key, entry, timeout=settings.DATA_BUNDLE_CACHE_TTL)
+
+    return entry["data"], entry["etag"]
@@ -0,0 +1,100 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zlib is used instead
+    zstandard = None
+
+
+# --------------------------------------------------
+# COMPRESSED JSON BLOBS
+# --------------------------------------------------
+# A blob is one codec byte followed by the compressed JSON text, so blobs
+# written with zstd and zlib can live side by side.
+
+CODEC_ZLIB = b"\x01"
+CODEC_ZSTD = b"\x02"
+
+
+def compress_json(value):
+    raw = json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8")
+    if zstandard is not None:
+        return CODEC_ZSTD + zstandard.ZstdCompressor(level=19).compress(raw)
+    return CODEC_ZLIB + zlib.compress(raw, 9)
+
+
+def decompress_json(blob):
+    blob = bytes(blob)  # Postgres returns a memoryview
+    codec, data = blob[:1], blob[1:]
+
+    if codec == CODEC_ZLIB:
+        raw = zlib.decompress(data)
+    elif codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this archived payload")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raise ValueError("Unknown archive codec")
+
+    return json.loads(raw)
+
+
+# --------------------------------------------------
+# ARCHIVABLE JSON FIELD
+# --------------------------------------------------
+class ArchivedJSONAttribute(DeferredAttribute):
+    """
+    Returns the inline JSON when present, otherwise the archived payload,
+    loaded and decompressed on first access (and cached on the instance).
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        value = super().__get__(instance, cls)
+        if value is not None:
+            return value
+
+        archive_field = instance._meta.get_field(self.field.archive_field)
+        archive_id = getattr(instance, archive_field.attname)
+        if archive_id is None:
+            return None
+
+        cache = instance.__dict__.setdefault("_archived_json", {})
+        cached = cache.get(self.field.attname)
+        if cached is None or cached[0] != archive_id:
+            blob = getattr(instance, archive_field.name).blob
+            cached = cache[self.field.attname] = (archive_id, decompress_json(blob))
+        return cached[1]
+
+    def __set__(self, instance, value):
+        # A data descriptor, so __get__ runs even once the value is loaded
+        instance.__dict__[self.field.attname] = value
+
+
+class ArchivableJSONField(models.JSONField):
+    """
+    JSONField whose value can be moved by payments.archive into a
+    compressed ArchivedPayload row, referenced by the model's
+    `archive_field`. Reading the attribute is transparent; assigning a new
+    value stores it inline again.
+
+    Lookups on the JSON (e.g. field__key=...) only see inline values.
+    """
+
+    descriptor_class = ArchivedJSONAttribute
+
+    def __init__(self, *args, archive_field=None, **kwargs):
+        self.archive_field = archive_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["archive_field"] = self.archive_field
+        return name, path, args, kwargs
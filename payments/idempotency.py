@@ -0,0 +1,169 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+# --------------------------------------------------
+# IDEMPOTENCY-KEY REQUESTS
+# --------------------------------------------------
+# A client retrying a POST with the same Idempotency-Key gets the stored
+# response back instead of a second execution. The IdempotencyKey row is
+# the lock: it is inserted (unique per user, key and endpoint) before the
+# view runs, and completed with the response afterwards. A retry costs one
+# indexed lookup. Keys expire after IDEMPOTENCY_KEY_TTL_HOURS
+# (payments.tasks.expire_idempotency_keys).
+#
+# A key left in flight for IDEMPOTENCY_LOCK_TIMEOUT_MINUTES (the worker
+# died before it could complete or release it) is treated as abandoned
+# and the next request with it re-claims it.
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 100
+
+
+class IdempotentReplay(Exception):
+    """
+    Raised from IdempotentMixin.initial() to answer without running the view.
+    """
+
+    def __init__(self, response):
+        self.response = response
+
+
+def claim_key(user, key, endpoint, request_hash):
+    """
+    Returns (record, None) when this request now owns the key, or
+    (None, response) when an earlier request with the key answers it.
+    """
+    lookup = {"user": user, "key": key, "endpoint": endpoint}
+
+    record = IdempotencyKey.objects.filter(**lookup).first()
+    if record is None:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(request_hash=request_hash, **lookup), None
+        except IntegrityError:
+            # A concurrent request claimed it first
+            record = IdempotencyKey.objects.get(**lookup)
+
+    if record.status_code is None and reclaim_key(record, request_hash):
+        return record, None
+
+    return None, replay_response(record, request_hash)
+
+
+def reclaim_key(record, request_hash):
+    """
+    Take over an in-flight key whose lease has run out. The conditional
+    UPDATE lets only one of several concurrent retries win it.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=settings.IDEMPOTENCY_LOCK_TIMEOUT_MINUTES)
+
+    claimed = IdempotencyKey.objects.filter(
+        pk=record.pk, status_code__isnull=True, created_at__lt=cutoff
+    ).update(created_at=now, request_hash=request_hash)
+    if claimed:
+        record.created_at, record.request_hash = now, request_hash
+    return bool(claimed)
+
+
+def replay_response(record, request_hash):
+    if record.request_hash and record.request_hash != request_hash:
+        return Response(
+            {"error": "Idempotency-Key was already used with a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    if record.status_code is None:
+        return Response(
+            {"error": "A request with this Idempotency-Key is still in progress"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    response = Response(record.response, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def complete_key(record, response):
+    """
+    Store a successful response for replay. Any other outcome releases the
+    key, so the client can retry it.
+    """
+    if status.is_success(response.status_code):
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status_code=response.status_code,
+            response=json.loads(JSONRenderer().render(response.data) or "null"),
+        )
+    else:
+        release_key(record)
+
+
+def release_key(record):
+    IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+
+
+class IdempotentMixin:
+    """
+    APIView mixin: POSTs carrying an Idempotency-Key header run at most
+    once per (user, key, endpoint). Duplicates replay the stored response
+    (marked Idempotent-Replayed), get 409 while the first is in flight,
+    and 422 when the key is reused with a different body. Requests without
+    the header are unaffected.
+    """
+
+    idempotency_record = None
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication, permissions and throttling first
+        super().initial(request, *args, **kwargs)
+
+        key = request.headers.get(HEADER)
+        if request.method != "POST" or not key:
+            return
+
+        if len(key) > MAX_KEY_LENGTH:
+            raise IdempotentReplay(Response(
+                {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            ))
+
+        record, replay = claim_key(
+            request.user,
+            key,
+            request.path[:100],
+            hashlib.sha256(request.body).hexdigest(),
+        )
+        if replay is not None:
+            raise IdempotentReplay(replay)
+
+        self.idempotency_record = record
+
+    def handle_exception(self, exc):
+        if isinstance(exc, IdempotentReplay):
+            return exc.response
+
+        if self.idempotency_record is not None:
+            release_key(self.idempotency_record)
+            self.idempotency_record = None
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if self.idempotency_record is not None:
+            complete_key(self.idempotency_record, response)
+            self.idempotency_record = None
+
+        return response
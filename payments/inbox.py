@@ -0,0 +1,190 @@
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import WebhookInboxEvent
+
+
+# --------------------------------------------------
+# WEBHOOK INBOX
+# --------------------------------------------------
+# Webhook views verify the signature, store the raw body with one INSERT
+# and answer 200. Workers (payments.tasks.drain_webhook_inbox) claim events
+# in batches with SKIP LOCKED, so any number of them can drain in
+# parallel. An event is only claimable once every earlier event for the
+# same reference is processed, which keeps per-reference ordering: a
+# failed event keeps blocking its reference until it is requeued from the
+# admin. Failed attempts are retried with exponential backoff.
+
+MAX_ATTEMPTS = 5
+
+# Delay before retry n is RETRY_BASE_DELAY * 2 ** (n - 1), capped
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+# A claimed event whose worker died is retried after this long
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def verify_paystack_signature(request):
+    secret = settings.PAYSTACK_SECRET_KEY or ""
+    expected = hmac.new(secret.encode(), msg=request.body, digestmod=hashlib.sha512).hexdigest()
+    return hmac.compare_digest(request.headers.get("X-Paystack-Signature", ""), expected)
+
+
+def store_event(handler, body):
+    """
+    Record a verified webhook body. Returns the event, or None when the
+    body is not a JSON object (nothing a worker could apply).
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+
+    data = payload.get("data") or {}
+    return WebhookInboxEvent.objects.create(
+        handler=handler,
+        event=str(payload.get("event", ""))[:100],
+        reference=str(data["reference"])[:120] if isinstance(data, dict) and data.get("reference") else None,
+        body=body.decode("utf-8") if isinstance(body, bytes) else body,
+    )
+
+
+def enqueue_drain():
+    """
+    Ask a worker to drain the inbox once the current transaction commits.
+    Best effort: the beat schedule drains it regardless.
+    """
+    def send():
+        from .tasks import drain_webhook_inbox
+
+        try:
+            drain_webhook_inbox.apply_async(retry=False)
+        except Exception as e:
+            print(f"⚠️ Could not queue webhook inbox drain: {e}")
+
+    transaction.on_commit(send)
+
+
+def claim_events(batch_size):
+    """
+    Mark up to batch_size runnable events as processing and return them
+    in arrival order. At most one event per reference is claimed at a time.
+    """
+    now = timezone.now()
+    blocking_statuses = [
+        WebhookInboxEvent.STATUS_PENDING,
+        WebhookInboxEvent.STATUS_PROCESSING,
+        WebhookInboxEvent.STATUS_FAILED,
+    ]
+
+    # Claims older than CLAIM_TIMEOUT belong to a dead worker
+    WebhookInboxEvent.objects.filter(
+        status=WebhookInboxEvent.STATUS_PROCESSING, claimed_at__lt=now - CLAIM_TIMEOUT
+    ).update(status=WebhookInboxEvent.STATUS_PENDING)
+
+    earlier = WebhookInboxEvent.objects.filter(
+        reference=OuterRef("reference"), id__lt=OuterRef("id"), status__in=blocking_statuses
+    )
+
+    with transaction.atomic():
+        ids = list(
+            WebhookInboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookInboxEvent.STATUS_PENDING)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .exclude(Exists(earlier))
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        WebhookInboxEvent.objects.filter(pk__in=ids).update(
+            status=WebhookInboxEvent.STATUS_PROCESSING,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+
+    return list(WebhookInboxEvent.objects.filter(pk__in=ids).order_by("id"))
+
+
+def _handlers():
+    # Imported lazily: users.views_paystack imports this module
+    from users.views_paystack import process_paystack_event
+    from .webhooks import process_paystack_event as process_payments_event
+
+    return {"payments": process_payments_event, "users": process_paystack_event}
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def process_event(event, handlers=None):
+    """
+    Apply one claimed event in its own transaction and record the outcome.
+    Failures go back to pending with a backoff until MAX_ATTEMPTS, then
+    stay failed (blocking later events for the same reference).
+    """
+    handlers = handlers or _handlers()
+
+    try:
+        with transaction.atomic():
+            handlers[event.handler](json.loads(event.body))
+    except Exception as e:
+        if event.attempts >= MAX_ATTEMPTS:
+            status, next_attempt_at = WebhookInboxEvent.STATUS_FAILED, None
+            print(f"⚠️ Webhook inbox event {event.pk} failed after {event.attempts} attempts: {e}")
+        else:
+            status = WebhookInboxEvent.STATUS_PENDING
+            next_attempt_at = timezone.now() + retry_delay(event.attempts)
+
+        WebhookInboxEvent.objects.filter(pk=event.pk).update(
+            status=status, last_error=str(e), next_attempt_at=next_attempt_at
+        )
+        return status
+
+    WebhookInboxEvent.objects.filter(pk=event.pk).update(
+        status=WebhookInboxEvent.STATUS_PROCESSED,
+        processed_at=timezone.now(),
+        next_attempt_at=None,
+        last_error="",
+    )
+    return WebhookInboxEvent.STATUS_PROCESSED
+
+
+def requeue_events(queryset):
+    """
+    Give failed events a fresh set of attempts (admin action after the
+    cause is fixed). Returns the number requeued.
+    """
+    return queryset.filter(status=WebhookInboxEvent.STATUS_FAILED).update(
+        status=WebhookInboxEvent.STATUS_PENDING, attempts=0, next_attempt_at=None
+    )
+
+
+def drain(batch_size, max_batches=None, handlers=None):
+    """
+    Claim and process batches until the inbox has nothing runnable (or
+    max_batches is reached). Returns {status: count}.
+    """
+    handlers = handlers or _handlers()
+    results = {}
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        events = claim_events(batch_size)
+        if not events:
+            break
+        batches += 1
+        for event in events:
+            status = process_event(event, handlers)
+            results[status] = results.get(status, 0) + 1
+
+    return results
@@ -0,0 +1,210 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import PaystackPayload, PaystackTransaction, Wallet, WalletCheckpoint, WalletLedgerEntry
+
+
+# --------------------------------------------------
+# WALLET LEDGER
+# --------------------------------------------------
+# Every change to Wallet.balance / locked_balance goes through post_entry()
+# or post_entries(): one F() UPDATE of the wallet (the materialized
+# snapshot) plus the append-only ledger rows, in one transaction.
+# Periodic checkpoints (checkpoint_wallets) bound historical lookups.
+
+ZERO = Decimal("0")
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+# --------------------------------------------------
+# IDEMPOTENT RECORDS
+# --------------------------------------------------
+# Provider events (webhooks, retries) are applied at most once by letting
+# the unique `reference` column decide: the first INSERT wins and every
+# replay hits ON CONFLICT DO NOTHING. There is no read-then-write window,
+# so concurrent replays cannot both pass the check.
+
+def record_once(model, **fields):
+    """
+    INSERT a `model` row unless one with the same `reference` exists, in
+    one statement (INSERT ... ON CONFLICT (reference) DO NOTHING RETURNING).
+    Returns the new primary key, or None when the reference was already
+    recorded.
+    """
+    connection = connections[router.db_for_write(model)]
+    meta = model._meta
+    obj = model(**fields)
+    columns = [f for f in meta.concrete_fields if not f.primary_key]
+    qn = connection.ops.quote_name
+
+    sql = "INSERT INTO {table} ({cols}) VALUES ({values}) ON CONFLICT ({ref}) DO NOTHING RETURNING {pk}".format(
+        table=qn(meta.db_table),
+        cols=", ".join(qn(f.column) for f in columns),
+        values=", ".join(["%s"] * len(columns)),
+        ref=qn(meta.get_field("reference").column),
+        pk=qn(meta.pk.column),
+    )
+    params = [f.get_db_prep_save(f.pre_save(obj, True), connection) for f in columns]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def credit_once(reference, wallet_id, amount, payload, kind="funding", **fields):
+    """
+    Record a PaystackTransaction (and its raw payload) with record_once()
+    and, only if this call inserted it, credit `amount` to the wallet
+    through the ledger (F() update), all in one transaction. Returns True
+    when the transaction was new.
+    """
+    created_at = timezone.now()
+
+    with transaction.atomic():
+        pk = record_once(
+            PaystackTransaction, reference=reference, amount=amount, created_at=created_at, **fields
+        )
+        if pk is None:
+            return False
+
+        PaystackPayload.objects.create(transaction_id=pk, body=payload, created_at=created_at)
+        if wallet_id is not None:
+            post_entry(wallet_id, kind, balance_delta=amount, reference=reference)
+        return True
+
+
+def post_entries(wallet_id, entries, require_funds=False):
+    """
+    Apply [{"kind", "balance_delta", "locked_delta", "reference"}, ...] to
+    one wallet: a single UPDATE for the summed deltas and a single
+    bulk_create for the entries. With require_funds, the UPDATE only
+    matches while the balance covers a net debit; otherwise
+    InsufficientBalance is raised. Raises Wallet.DoesNotExist for an
+    unknown wallet.
+    """
+    balance_delta = sum((e.get("balance_delta", ZERO) for e in entries), ZERO)
+    locked_delta = sum((e.get("locked_delta", ZERO) for e in entries), ZERO)
+
+    with transaction.atomic():
+        wallet = Wallet.objects.filter(pk=wallet_id)
+        if require_funds and balance_delta < 0:
+            wallet = wallet.filter(balance__gte=-balance_delta)
+
+        updated = wallet.update(
+            balance=F("balance") + balance_delta,
+            locked_balance=F("locked_balance") + locked_delta,
+        )
+        if not updated:
+            if require_funds and Wallet.objects.filter(pk=wallet_id).exists():
+                raise InsufficientBalance("Insufficient wallet balance")
+            raise Wallet.DoesNotExist(f"Wallet {wallet_id} does not exist")
+
+        return WalletLedgerEntry.objects.bulk_create([
+            WalletLedgerEntry(
+                wallet_id=wallet_id,
+                kind=e["kind"],
+                balance_delta=e.get("balance_delta", ZERO),
+                locked_delta=e.get("locked_delta", ZERO),
+                reference=e.get("reference", ""),
+            )
+            for e in entries
+        ])
+
+
+def post_entry(wallet_id, kind, balance_delta=ZERO, locked_delta=ZERO, reference="", require_funds=False):
+    """
+    Single-movement form of post_entries(). Returns the ledger entry.
+    """
+    return post_entries(
+        wallet_id,
+        [{"kind": kind, "balance_delta": balance_delta, "locked_delta": locked_delta, "reference": reference}],
+        require_funds=require_funds,
+    )[0]
+
+
+def balance_at(wallet_id, when=None):
+    """
+    (balance, locked_balance) of a wallet at `when` (default: now), from the
+    nearest checkpoint plus the entries after it.
+    """
+    checkpoints = WalletCheckpoint.objects.filter(wallet_id=wallet_id)
+    entries = WalletLedgerEntry.objects.filter(wallet_id=wallet_id)
+
+    if when is not None:
+        checkpoints = checkpoints.filter(as_of__lte=when)
+        entries = entries.filter(created_at__lte=when)
+
+    checkpoint = checkpoints.order_by("-last_entry_id").first()
+    balance = locked = ZERO
+    if checkpoint is not None:
+        balance, locked = checkpoint.balance, checkpoint.locked_balance
+        entries = entries.filter(id__gt=checkpoint.last_entry_id)
+
+    totals = entries.aggregate(balance=Sum("balance_delta"), locked=Sum("locked_delta"))
+    return balance + (totals["balance"] or ZERO), locked + (totals["locked"] or ZERO)
+
+
+def checkpoint_wallets():
+    """
+    Write a new checkpoint for every wallet with ledger entries since the
+    previous run. Each run covers the id range (last checkpointed id, newest
+    settled id], so it reads only new entries, summed per wallet in one
+    query. Returns the number of checkpoints written.
+    """
+    # Ids are assigned at INSERT but become visible at COMMIT, so a fresh
+    # entry can still be joined by one with a lower id from a transaction
+    # that has not committed yet. A checkpoint past that gap would never
+    # count it; entries younger than LEDGER_CHECKPOINT_SETTLE_SECONDS (far
+    # longer than any ledger transaction) are left for the next run.
+    settled_before = timezone.now() - timedelta(seconds=settings.LEDGER_CHECKPOINT_SETTLE_SECONDS)
+    start = WalletCheckpoint.objects.aggregate(last=Max("last_entry_id"))["last"] or 0
+    end = (
+        WalletLedgerEntry.objects.filter(id__gt=start, created_at__lte=settled_before)
+        .aggregate(last=Max("id"))["last"]
+    )
+    if end is None:
+        return 0
+
+    rows = list(
+        WalletLedgerEntry.objects.filter(id__gt=start, id__lte=end)
+        .values("wallet")
+        .annotate(
+            balance=Sum("balance_delta"),
+            locked=Sum("locked_delta"),
+            last_entry_id=Max("id"),
+            as_of=Max("created_at"),
+        )
+        .order_by()
+    )
+
+    latest = WalletCheckpoint.objects.filter(wallet=OuterRef("wallet")).order_by("-last_entry_id")
+    previous = {
+        cp.wallet_id: cp
+        for cp in WalletCheckpoint.objects.filter(
+            wallet_id__in=[row["wallet"] for row in rows],
+            id=Subquery(latest.values("id")[:1]),
+        )
+    }
+
+    checkpoints = []
+    for row in rows:
+        prev = previous.get(row["wallet"])
+        checkpoints.append(WalletCheckpoint(
+            wallet_id=row["wallet"],
+            last_entry_id=row["last_entry_id"],
+            balance=(prev.balance if prev else ZERO) + row["balance"],
+            locked_balance=(prev.locked_balance if prev else ZERO) + row["locked"],
+            as_of=row["as_of"],
+        ))
+
+    WalletCheckpoint.objects.bulk_create(checkpoints, ignore_conflicts=True)
+    return len(checkpoints)
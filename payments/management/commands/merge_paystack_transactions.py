@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from payments.models import PaystackPayload, PaystackTransaction
+from users.models import PaystackTransaction as LegacyPaystackTransaction
+
+
+class Command(BaseCommand):
+    help = "Copy users.PaystackTransaction rows into the payments Paystack ledger (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of legacy rows copied per transaction (default: 2000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        self.stdout.write("🔁 Merging legacy Paystack transactions...")
+
+        legacy = LegacyPaystackTransaction.objects.order_by("pk")
+        last_id = 0
+        merged = skipped = 0
+
+        while True:
+            batch = list(legacy.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                # References already in the ledger (earlier run, or recorded
+                # by the other handler) are left untouched
+                existing = set(
+                    PaystackTransaction.objects.filter(
+                        reference__in=[row.reference for row in batch]
+                    ).values_list("reference", flat=True)
+                )
+                rows = [row for row in batch if row.reference not in existing]
+
+                PaystackTransaction.objects.bulk_create([
+                    PaystackTransaction(
+                        user_id=row.user_id,
+                        reference=row.reference,
+                        amount=row.amount,
+                        payment_type=row.payment_type,
+                        status=row.status,
+                        source="users",
+                        created_at=row.created_at,
+                    )
+                    for row in rows
+                ])
+
+                ids = dict(
+                    PaystackTransaction.objects.filter(
+                        reference__in=[row.reference for row in rows]
+                    ).values_list("reference", "id")
+                )
+                PaystackPayload.objects.bulk_create([
+                    PaystackPayload(
+                        transaction_id=ids[row.reference],
+                        body=row.raw_payload,
+                        created_at=row.created_at,
+                    )
+                    for row in rows
+                ])
+
+            merged += len(rows)
+            skipped += len(batch) - len(rows)
+            last_id = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Merged {merged} Paystack transactions ({skipped} already in the ledger)."
+        ))
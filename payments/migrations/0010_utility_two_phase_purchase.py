@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_databundle_utilitytransaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utilitytransaction',
+            name='variation_code',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='utilitytransaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='payments_utility_pending_idx'),
+        ),
+    ]
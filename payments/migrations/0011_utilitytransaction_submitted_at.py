@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0010_utility_two_phase_purchase'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utilitytransaction',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
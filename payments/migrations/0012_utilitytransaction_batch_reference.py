@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_utilitytransaction_submitted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='utilitytransaction',
+            name='batch_reference',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=120),
+        ),
+    ]
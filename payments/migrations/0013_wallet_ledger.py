@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def open_ledgers(apps, schema_editor):
+    # One opening entry per funded wallet so every balance equals the sum of its entries
+    Wallet = apps.get_model("payments", "Wallet")
+    WalletLedgerEntry = apps.get_model("payments", "WalletLedgerEntry")
+
+    wallets = Wallet.objects.filter(~Q(balance=0) | ~Q(locked_balance=0)).values_list("id", "balance", "locked_balance")
+    batch = []
+    for wallet_id, balance, locked in wallets.iterator(chunk_size=2000):
+        batch.append(WalletLedgerEntry(
+            wallet_id=wallet_id, kind="opening", balance_delta=balance, locked_delta=locked,
+        ))
+        if len(batch) >= 2000:
+            WalletLedgerEntry.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        WalletLedgerEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0012_utilitytransaction_batch_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_entry_id', models.BigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('locked_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('as_of', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='checkpoints', to='payments.wallet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wallet', 'as_of'], name='payments_wa_wallet__cd8fb3_idx'), models.Index(fields=['last_entry_id'], name='payments_wa_last_en_817e6f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'last_entry_id'), name='payments_checkpoint_unique_entry')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WalletLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening Balance'), ('funding', 'Funding'), ('purchase_reserve', 'Purchase Reserve'), ('purchase_release', 'Purchase Release'), ('purchase_refund', 'Purchase Refund'), ('savings_lock', 'Savings Lock'), ('savings_unlock', 'Savings Unlock'), ('savings_break', 'Savings Early Break')], max_length=30)),
+                ('balance_delta', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('locked_delta', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reference', models.CharField(blank=True, default='', max_length=120)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='payments.wallet')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['wallet', 'id'], name='payments_wa_wallet__06aa3d_idx'), models.Index(fields=['wallet', 'created_at'], name='payments_wa_wallet__e86c12_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0013_wallet_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookInboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handler', models.CharField(choices=[('payments', 'payments.webhooks'), ('users', 'users.views_paystack')], max_length=20)),
+                ('event', models.CharField(blank=True, default='', max_length=100)),
+                ('reference', models.CharField(blank=True, max_length=120, null=True)),
+                ('body', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['reference', 'id'], name='payments_we_referen_43af4a_idx'), models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['id'], name='payments_inbox_open_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+from payments.partitions import install_paystack_storage, uninstall_paystack_storage
+
+
+def install(apps, schema_editor):
+    install_paystack_storage(schema_editor.connection, settings.PAYSTACK_PAYLOAD_PARTITIONS_AHEAD)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_paystack_storage(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0014_webhook_inbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaystackPayload',
+            fields=[
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='payload', serialize=False, to='payments.paystacktransaction')),
+                ('body', models.JSONField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(install, uninstall),
+        migrations.AlterField(
+            model_name='paystacktransaction',
+            name='raw_payload',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='paystacktransaction',
+            name='source',
+            field=models.CharField(choices=[('payments', 'payments.webhooks'), ('users', 'users.views_paystack')], default='payments', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='paystacktransaction',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='paystacktransaction',
+            index=models.Index(fields=['user', '-created_at'], name='payments_paystack_user_idx'),
+        ),
+    ]
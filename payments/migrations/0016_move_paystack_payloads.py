@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+def move_payloads(apps, schema_editor):
+    # raw_payload leaves the hot row for the (partitioned) side table
+    PaystackTransaction = apps.get_model("payments", "PaystackTransaction")
+    PaystackPayload = apps.get_model("payments", "PaystackPayload")
+
+    rows = PaystackTransaction.objects.values_list("id", "raw_payload", "created_at")
+    batch = []
+    for pk, body, created_at in rows.iterator(chunk_size=2000):
+        batch.append(PaystackPayload(transaction_id=pk, body=body, created_at=created_at))
+        if len(batch) >= 2000:
+            PaystackPayload.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PaystackPayload.objects.bulk_create(batch)
+
+    if schema_editor.connection.vendor == "postgresql":
+        # Check the deferred FK now, so no pending trigger events block
+        # the ALTER TABLE that drops raw_payload
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+def restore_payloads(apps, schema_editor):
+    PaystackTransaction = apps.get_model("payments", "PaystackTransaction")
+    PaystackPayload = apps.get_model("payments", "PaystackPayload")
+
+    for pk, body in PaystackPayload.objects.values_list("transaction_id", "body").iterator(chunk_size=2000):
+        PaystackTransaction.objects.filter(pk=pk).update(raw_payload=body)
+
+
+class Migration(migrations.Migration):
+    """
+    Separate from 0015_paystack_ledger_payloads so the payload table (and
+    its foreign key) are fully created and committed before rows go in.
+    """
+
+    dependencies = [
+        ('payments', '0015_paystack_ledger_payloads'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_payloads, restore_payloads),
+        migrations.RemoveField(
+            model_name='paystacktransaction',
+            name='raw_payload',
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:05
+
+import payments.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0016_move_paystack_payloads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='response_archive',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='paystackpayload',
+            name='body_archive',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='utilitytransaction',
+            name='provider_response_archive',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response',
+            field=payments.fields.ArchivableJSONField(archive_field='response_archive', null=True),
+        ),
+        migrations.AlterField(
+            model_name='paystackpayload',
+            name='body',
+            field=payments.fields.ArchivableJSONField(archive_field='body_archive', null=True),
+        ),
+        migrations.AlterField(
+            model_name='utilitytransaction',
+            name='provider_response',
+            field=payments.fields.ArchivableJSONField(archive_field='provider_response_archive', blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0018_idempotency_key_lock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookinboxevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
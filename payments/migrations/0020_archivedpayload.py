@@ -0,0 +1,109 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+
+# (model, blob column the archive used to live in, new reference field)
+ARCHIVED = [
+    ("UtilityTransaction", "provider_response_blob", "provider_response_archive"),
+    ("PaystackPayload", "body_blob", "body_archive"),
+]
+
+
+def move_blobs(apps, schema_editor):
+    # Compressed blobs leave the hot rows for payments_archivedpayload
+    ArchivedPayload = apps.get_model("payments", "ArchivedPayload")
+
+    for model_name, blob_field, archive_field in ARCHIVED:
+        model = apps.get_model("payments", model_name)
+        rows = model.objects.filter(**{f"{blob_field}__isnull": False}).order_by("pk").values_list("pk", blob_field)
+
+        last_pk = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk)[:2000])
+            if not batch:
+                break
+
+            archives = ArchivedPayload.objects.bulk_create(
+                [ArchivedPayload(blob=blob) for _, blob in batch]
+            )
+            links = [When(pk=pk, then=Value(archive.pk)) for (pk, _), archive in zip(batch, archives)]
+            model.objects.filter(pk__in=[pk for pk, _ in batch]).update(**{
+                f"{archive_field}_id": Case(*links),
+                blob_field: None,
+            })
+            last_pk = batch[-1][0]
+
+
+def restore_blobs(apps, schema_editor):
+    ArchivedPayload = apps.get_model("payments", "ArchivedPayload")
+
+    for model_name, blob_field, archive_field in ARCHIVED:
+        model = apps.get_model("payments", model_name)
+        rows = model.objects.filter(**{f"{archive_field}__isnull": False}).values_list("pk", f"{archive_field}__blob")
+        for pk, blob in rows.iterator(chunk_size=2000):
+            model.objects.filter(pk=pk).update(**{blob_field: blob, archive_field: None})
+
+    ArchivedPayload.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Archived provider JSON moves from the *_archive blob columns into its
+    own table; the hot rows keep only a reference. IdempotencyKey stops
+    being archived (keys expire long before they turn cold), so its blob
+    column is dropped outright.
+    """
+
+    dependencies = [
+        ('payments', '0019_webhookinboxevent_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blob', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RenameField(
+            model_name='utilitytransaction',
+            old_name='provider_response_archive',
+            new_name='provider_response_blob',
+        ),
+        migrations.RenameField(
+            model_name='paystackpayload',
+            old_name='body_archive',
+            new_name='body_blob',
+        ),
+        migrations.AddField(
+            model_name='utilitytransaction',
+            name='provider_response_archive',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='payments.archivedpayload'),
+        ),
+        migrations.AddField(
+            model_name='paystackpayload',
+            name='body_archive',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='payments.archivedpayload'),
+        ),
+        migrations.RunPython(move_blobs, restore_blobs),
+        migrations.RemoveField(
+            model_name='utilitytransaction',
+            name='provider_response_blob',
+        ),
+        migrations.RemoveField(
+            model_name='paystackpayload',
+            name='body_blob',
+        ),
+        migrations.RemoveField(
+            model_name='idempotencykey',
+            name='response_archive',
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response',
+            field=models.JSONField(null=True),
+        ),
+    ]
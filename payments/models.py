@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
+from .fields import ArchivableJSONField
+
 User = settings.AUTH_USER_MODEL
 
 
@@ -31,6 +33,77 @@ class Wallet(models.Model):
         return f"Wallet({self.user})"
 
 
+# --------------------------------------------------
+# WALLET LEDGER (APPEND-ONLY)
+# --------------------------------------------------
+class WalletLedgerEntry(models.Model):
+    """
+    One row per movement of Wallet.balance / locked_balance. Written only
+    through payments.ledger, in the same transaction as the balance update,
+    so the wallet's columns are a materialized sum of its entries.
+    """
+    KIND_CHOICES = (
+        ("opening", "Opening Balance"),
+        ("funding", "Funding"),
+        ("purchase_reserve", "Purchase Reserve"),
+        ("purchase_release", "Purchase Release"),
+        ("purchase_refund", "Purchase Refund"),
+        ("savings_lock", "Savings Lock"),
+        ("savings_unlock", "Savings Unlock"),
+        ("savings_break", "Savings Early Break"),
+    )
+
+    wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name="ledger_entries")
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    balance_delta = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    locked_delta = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reference = models.CharField(max_length=120, blank=True, default="")  # utility / paystack / savings ref
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["wallet", "id"]),
+            models.Index(fields=["wallet", "created_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Wallet ledger entries are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Wallet ledger entries are append-only.")
+
+    def __str__(self):
+        return f"{self.kind} • {self.balance_delta} / {self.locked_delta} • wallet {self.wallet_id}"
+
+
+class WalletCheckpoint(models.Model):
+    """
+    Wallet balances as of ledger entry `last_entry_id`, so a historical
+    balance only sums the entries after the nearest checkpoint.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name="checkpoints")
+    last_entry_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    locked_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    as_of = models.DateTimeField()  # created_at of the last included entry
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["wallet", "last_entry_id"], name="payments_checkpoint_unique_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["wallet", "as_of"]),
+            models.Index(fields=["last_entry_id"]),
+        ]
+
+    def __str__(self):
+        return f"Checkpoint(wallet {self.wallet_id} @ {self.last_entry_id})"
+
+
 # --------------------------------------------------
 # SAVED CARD
 # --------------------------------------------------
@@ -63,6 +136,10 @@ class SavedCard(models.Model):
 # IDEMPOTENCY KEYS
 # --------------------------------------------------
 class IdempotencyKey(models.Model):
+    """
+    One Idempotency-Key per (user, key, endpoint); see payments.idempotency.
+    status_code is null while the first request is still in flight.
+    """
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -70,8 +147,10 @@ class IdempotencyKey(models.Model):
     )
     key = models.CharField(max_length=100)
     endpoint = models.CharField(max_length=100)
-    response = models.JSONField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    request_hash = models.CharField(max_length=64, blank=True, default="")  # sha256 of the request body
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # expiry sweep
 
     class Meta:
         unique_together = ("user", "key", "endpoint")
@@ -111,16 +190,43 @@ class SavingsPlan(models.Model):
         return f"{self.plan_type} • {self.amount} • {self.user}"
 
 
+# --------------------------------------------------
+# ARCHIVED PROVIDER PAYLOADS
+# --------------------------------------------------
+class ArchivedPayload(models.Model):
+    """
+    Compressed provider JSON moved out of its row by payments.archive.
+    The row keeps only a reference (its ArchivableJSONField's
+    archive_field), so hot tables stop carrying cold payloads.
+    """
+    blob = models.BinaryField()  # codec byte + compressed JSON (payments.fields)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived payload • {self.pk}"
+
+
 # --------------------------------------------------
 # PAYSTACK TRANSACTIONS (WEBHOOK LEDGER)
 # --------------------------------------------------
 class PaystackTransaction(models.Model):
+    """
+    Every Paystack charge applied by either webhook handler. Kept narrow so
+    recent-transaction scans stay cheap; the raw event lives in
+    PaystackPayload. See payments.partitions for the Postgres layout.
+    """
     STATUS_CHOICES = (
         ("success", "Success"),
         ("failed", "Failed"),
         ("pending", "Pending"),
     )
 
+    # Which webhook handler recorded it
+    SOURCE_CHOICES = (
+        ("payments", "payments.webhooks"),
+        ("users", "users.views_paystack"),
+    )
+
     user = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -132,15 +238,99 @@ class PaystackTransaction(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     payment_type = models.CharField(max_length=50, default="wallet")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="success")
-    raw_payload = models.JSONField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default="payments")
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # not auto_now_add: merged rows keep their date
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="payments_paystack_user_idx"),
+        ]
 
     def __str__(self):
         return f"{self.reference} • {self.status}"
 
+
+class PaystackPayload(models.Model):
+    """
+    Raw Paystack event for a PaystackTransaction. Range-partitioned by
+    created_at on Postgres.
+    """
+    transaction = models.OneToOneField(
+        PaystackTransaction,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="payload",
+    )
+    body = ArchivableJSONField(null=True, archive_field="body_archive")
+    # Not one-to-one: a unique column on the partitioned table would have
+    # to include created_at
+    body_archive = models.ForeignKey(
+        ArchivedPayload,
+        on_delete=models.PROTECT,
+        null=True,
+        editable=False,
+        related_name="+",
+    )  # set by payments.archive
+    created_at = models.DateTimeField(default=timezone.now)  # partition key, copied from the transaction
+
+    def __str__(self):
+        return f"Payload • {self.transaction_id}"
+
+
+# --------------------------------------------------
+# WEBHOOK INBOX
+# --------------------------------------------------
+class WebhookInboxEvent(models.Model):
+    """
+    A verified provider webhook, stored as received and processed later by
+    payments.tasks.drain_webhook_inbox (see payments.inbox).
+    """
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_PROCESSED = "processed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_PROCESSED, "Processed"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    # Which endpoint received it, i.e. which handler applies it
+    HANDLER_CHOICES = (
+        ("payments", "payments.webhooks"),
+        ("users", "users.views_paystack"),
+    )
+
+    handler = models.CharField(max_length=20, choices=HANDLER_CHOICES)
+    event = models.CharField(max_length=100, blank=True, default="")
+    reference = models.CharField(max_length=120, null=True, blank=True)  # events for one reference apply in order
+    body = models.TextField()  # raw request body, exactly as signed
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)  # retry backoff after a failed attempt
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["reference", "id"]),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(status__in=["pending", "processing"]),
+                name="payments_inbox_open_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.handler} • {self.event} • {self.reference} • {self.status}"
+
+
 # --------------------------------------------------
 # DATA BUNDLES (VTU PRODUCTS)
 # --------------------------------------------------
@@ -214,16 +404,38 @@ class UtilityTransaction(models.Model):
 
     network = models.CharField(max_length=20)
     phone_number = models.CharField(max_length=20)
+    variation_code = models.CharField(max_length=100, blank=True, default="")  # VTpass data plan
 
     amount = models.DecimalField(max_digits=12, decimal_places=2)
 
     reference = models.CharField(max_length=120, unique=True)
+    batch_reference = models.CharField(max_length=120, blank=True, default="", db_index=True)  # batch disbursements
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
 
-    provider_response = models.JSONField(null=True, blank=True)
+    provider_response = ArchivableJSONField(null=True, blank=True, archive_field="provider_response_archive")
+    provider_response_archive = models.ForeignKey(
+        ArchivedPayload,
+        on_delete=models.PROTECT,
+        null=True,
+        editable=False,
+        related_name="+",
+    )  # set by payments.archive
+
+    # Set when a worker claims the purchase and sends it to VTpass
+    submitted_at = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Reconciliation only scans purchases still awaiting an outcome
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status="pending"),
+                name="payments_utility_pending_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.transaction_type} • ₦{self.amount} • {self.status}"
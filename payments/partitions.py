@@ -0,0 +1,133 @@
+import logging
+from datetime import date
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------------
+# Paystack transaction storage (PostgreSQL)
+# -------------------------------------------------------------------------
+# payments_paystacktransaction stays one unpartitioned table: its unique
+# `reference` is what makes webhook processing idempotent (ledger.record_once),
+# and Postgres cannot enforce a unique column across partitions unless the
+# partition key is part of it. It is narrow and append-mostly, so a BRIN
+# index on created_at plus the (user, created_at) btree keep recent-range
+# queries cheap as history grows.
+#
+# The bulky raw events live in payments_paystackpayload, range-partitioned
+# by month on created_at. Old months can be detached or archived without
+# touching the ledger. Rows outside every monthly partition land in the
+# DEFAULT partition (e.g. history merged from before the cut-over).
+#
+# Its primary key has to include the partition key, so on its own
+# (transaction_id, created_at) would allow two payloads per transaction.
+# The composite foreign key below pins created_at to the transaction's
+# own created_at, which makes the primary key unique on transaction_id
+# alone and keeps the one-to-one link enforced.
+
+PAYLOAD_TABLE = "payments_paystackpayload"
+TRANSACTION_TABLE = "payments_paystacktransaction"
+
+PG_INSTALL_SQL = [
+    # Re-create the (empty) Django table as a partitioned one with the same
+    # columns. Django adds the transaction_id foreign key itself at the end
+    # of the migration (deferred SQL), so it lands on the partitioned table.
+    f"ALTER TABLE {PAYLOAD_TABLE} RENAME TO {PAYLOAD_TABLE}_plain;",
+    f"""
+    CREATE TABLE {PAYLOAD_TABLE} (LIKE {PAYLOAD_TABLE}_plain INCLUDING DEFAULTS)
+    PARTITION BY RANGE (created_at);
+    """,
+    f"DROP TABLE {PAYLOAD_TABLE}_plain;",
+    # A partitioned table's primary key must include the partition key
+    f"ALTER TABLE {PAYLOAD_TABLE} ADD PRIMARY KEY (transaction_id, created_at);",
+    f"CREATE TABLE {PAYLOAD_TABLE}_default PARTITION OF {PAYLOAD_TABLE} DEFAULT;",
+    f"ALTER TABLE {TRANSACTION_TABLE} ADD CONSTRAINT {TRANSACTION_TABLE}_id_created_uniq UNIQUE (id, created_at);",
+    f"""
+    ALTER TABLE {PAYLOAD_TABLE} ADD CONSTRAINT {PAYLOAD_TABLE}_transaction_created_fk
+    FOREIGN KEY (transaction_id, created_at) REFERENCES {TRANSACTION_TABLE} (id, created_at)
+    ON DELETE CASCADE;
+    """,
+    f"CREATE INDEX IF NOT EXISTS {TRANSACTION_TABLE}_created_brin ON {TRANSACTION_TABLE} USING BRIN (created_at);",
+]
+
+PG_UNINSTALL_SQL = [
+    f"DROP INDEX IF EXISTS {TRANSACTION_TABLE}_created_brin;",
+    f"ALTER TABLE {PAYLOAD_TABLE} DROP CONSTRAINT IF EXISTS {PAYLOAD_TABLE}_transaction_created_fk;",
+    f"ALTER TABLE {TRANSACTION_TABLE} DROP CONSTRAINT IF EXISTS {TRANSACTION_TABLE}_id_created_uniq;",
+]
+
+
+def _month_start(day, offset=0):
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def install_paystack_storage(connection, months_ahead=3):
+    """
+    Partition the payload table and index the ledger. A no-op on backends
+    other than PostgreSQL, where both tables stay plain.
+    """
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        for sql in PG_INSTALL_SQL:
+            cursor.execute(sql)
+
+    ensure_payload_partitions(connection, months_ahead)
+
+
+def uninstall_paystack_storage(connection):
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        for sql in PG_UNINSTALL_SQL:
+            cursor.execute(sql)
+
+
+def ensure_payload_partitions(connection, months_ahead=3):
+    """
+    Create the monthly payload partitions from the current month through
+    `months_ahead` months ahead. Idempotent. Returns the partitions created.
+    """
+    if connection.vendor != "postgresql":
+        return []
+
+    # Only importable where a PostgreSQL driver is installed
+    from django.db.backends.postgresql.psycopg_any import sql
+
+    today = timezone.now().date()
+    created = []
+
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        name = f"{PAYLOAD_TABLE}_p{start:%Y%m}"
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+
+            # DDL takes no bind parameters, so the bounds are quoted as literals
+            ddl = sql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+                sql.Identifier(name),
+                sql.Identifier(PAYLOAD_TABLE),
+                sql.Literal(start.isoformat()),
+                sql.Literal(end.isoformat()),
+            )
+            try:
+                with transaction.atomic(using=connection.alias):
+                    cursor.execute(ddl)
+            except DatabaseError:
+                # The DEFAULT partition already holds rows for this month
+                logger.warning("Could not create payload partition %s", name, exc_info=True)
+                continue
+
+        created.append(name)
+
+    return created
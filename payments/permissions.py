@@ -0,0 +1,15 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsCompanyUser(BasePermission):
+    """
+    Allows access only to authenticated users with the COMPANY role.
+    """
+    message = "Only company accounts can perform this action."
+
+    def has_permission(self, request, view):
+        return bool(
+            request.user
+            and request.user.is_authenticated
+            and request.user.role == "COMPANY"
+        )
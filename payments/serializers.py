@@ -1,6 +1,10 @@
+from decimal import Decimal
+
 from rest_framework import serializers
+from django.conf import settings
 from django.utils import timezone
-from .models import SavedCard, Wallet, SavingsPlan
+from .ledger import post_entry
+from .models import SavedCard, Wallet, SavingsPlan, UtilityTransaction, DataBundle
 
 
 # --------------------------------------------------
@@ -50,11 +54,6 @@ class SavingsPlanCreateSerializer(serializers.Serializer):
 
         locked_until = timezone.now() + timezone.timedelta(days=duration_days)
 
-        # 🔒 LOCK FUNDS
-        wallet.balance -= amount
-        wallet.locked_balance += amount
-        wallet.save(update_fields=["balance", "locked_balance"])
-
         savings = SavingsPlan.objects.create(
             user=wallet.user,
             wallet=wallet,
@@ -64,6 +63,13 @@ class SavingsPlanCreateSerializer(serializers.Serializer):
             status="locked",
         )
 
+        # 🔒 LOCK FUNDS
+        post_entry(
+            wallet.pk, "savings_lock",
+            balance_delta=-amount, locked_delta=amount,
+            reference=f"savings:{savings.pk}", require_funds=True,
+        )
+
         return savings
 
 
@@ -86,3 +92,71 @@ class SavingsWithdrawSerializer(serializers.Serializer):
 
         return data
 
+
+# --------------------------------------------------
+# UTILITY PURCHASE STATUS
+# --------------------------------------------------
+class UtilityTransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UtilityTransaction
+        fields = [
+            "reference",
+            "batch_reference",
+            "transaction_type",
+            "network",
+            "phone_number",
+            "amount",
+            "status",
+            "created_at",
+        ]
+
+
+# --------------------------------------------------
+# BATCH DISBURSEMENT (COMPANY WALLETS)
+# --------------------------------------------------
+class BatchLineSerializer(serializers.Serializer):
+    """
+    One line: airtime needs network + amount; data needs bundle_id.
+    """
+    transaction_type = serializers.ChoiceField(choices=["airtime", "data"])
+    phone = serializers.CharField(max_length=20)
+    network = serializers.ChoiceField(choices=DataBundle.NETWORK_CHOICES, required=False)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("1"), required=False)
+    bundle_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs["transaction_type"] == "airtime":
+            if not attrs.get("network") or not attrs.get("amount"):
+                raise serializers.ValidationError("Airtime lines need network and amount.")
+        elif not attrs.get("bundle_id"):
+            raise serializers.ValidationError("Data lines need bundle_id.")
+        return attrs
+
+
+class BatchPurchaseSerializer(serializers.Serializer):
+    lines = BatchLineSerializer(many=True, allow_empty=False)
+
+    def validate_lines(self, lines):
+        if len(lines) > settings.UTILITY_BATCH_MAX_LINES:
+            raise serializers.ValidationError(
+                f"A batch can hold at most {settings.UTILITY_BATCH_MAX_LINES} lines."
+            )
+
+        # Resolve every bundle in one query and price data lines from it
+        bundle_ids = {line["bundle_id"] for line in lines if line["transaction_type"] == "data"}
+        bundles = DataBundle.objects.filter(is_active=True).in_bulk(bundle_ids)
+
+        missing = bundle_ids - set(bundles)
+        if missing:
+            raise serializers.ValidationError(f"Unknown or inactive bundles: {sorted(missing)}")
+
+        for line in lines:
+            if line["transaction_type"] == "data":
+                bundle = bundles[line["bundle_id"]]
+                line.update(
+                    network=bundle.network,
+                    amount=bundle.selling_price,
+                    variation_code=bundle.vtpass_code,
+                )
+
+        return lines
@@ -1,6 +1,7 @@
-import requests
 from django.conf import settings
 
+from core.utils import http_clients
+
 PAYSTACK_BASE_URL = "https://api.paystack.co"
 
 def charge_authorization(*, email, amount, authorization_code):
@@ -17,6 +18,6 @@ def charge_authorization(*, email, amount, authorization_code):
         "authorization_code": authorization_code,
     }
 
-    response = requests.post(url, json=payload, headers=headers, timeout=30)
+    response = http_clients.post("paystack", url, json=payload, headers=headers)
     return response.json()
 
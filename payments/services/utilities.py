@@ -1,52 +1,302 @@
-import uuid
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
+import requests
 from django.db import transaction
+from django.utils import timezone
 
+from payments.ledger import InsufficientBalance, post_entries, post_entry
 from payments.models import Wallet, UtilityTransaction
-from payments.vtpass_service import purchase_data
+from payments.vtpass_service import (
+    new_request_id,
+    purchase_airtime,
+    purchase_data,
+    requery_transaction,
+)
 
 
-def purchase_data_bundle(user, bundle, phone):
+# --------------------------------------------------
+# TWO-PHASE UTILITY PURCHASES
+# --------------------------------------------------
+# 1. reserve_purchase(): one short transaction moves the amount from
+#    balance to locked_balance and records a pending UtilityTransaction.
+# 2. execute_purchase(): claims the purchase (submitted_at) and calls VTpass
+#    with no transaction or row lock held. Runs in a Celery worker
+#    (payments.tasks.execute_utility_purchase).
+# 3. settle_purchase(): one short transaction releases the reservation
+#    (success) or refunds it (failed). Ambiguous outcomes stay pending and
+#    are resolved by payments.tasks.reconcile_pending_utility_purchases.
+
+def reserve_purchase(user, *, transaction_type, network, phone, amount, variation_code=""):
+    """
+    Reserve `amount` from the user's wallet and create the pending
+    UtilityTransaction. Raises InsufficientBalance (or Wallet.DoesNotExist).
+    """
+    wallet = Wallet.objects.only("id").get(user=user)
+    reference = new_request_id()
+
+    with transaction.atomic():
+        # Conditional UPDATE: the balance check and the debit are one statement
+        post_entry(
+            wallet.pk, "purchase_reserve",
+            balance_delta=-amount, locked_delta=amount,
+            reference=reference, require_funds=True,
+        )
+
+        return UtilityTransaction.objects.create(
+            user=user,
+            wallet=wallet,
+            transaction_type=transaction_type,
+            network=network,
+            phone_number=phone,
+            amount=amount,
+            variation_code=variation_code,
+            reference=reference,
+            status="pending",
+        )
+
+
+# VTpass response codes with a final meaning; anything else (auth errors,
+# rate limits, 5xx bodies, unknown codes) leaves the purchase pending
+VTPASS_OK = "000"
+VTPASS_FAILED = "016"
+VTPASS_REQUEST_ID_NOT_FOUND = "015"
+
+
+def provider_status(response):
     """
-    Handles wallet deduction + VTpass data purchase.
+    Map a VTpass pay/requery response to success / failed / pending.
+    Only an explicit failure refunds; everything unrecognised stays
+    pending for reconciliation to retry.
     """
+    code = str(response.get("code", ""))
+
+    if code == VTPASS_OK:
+        txn_status = (
+            (response.get("content") or {}).get("transactions", {}).get("status", "")
+        ).lower()
+        if txn_status == "delivered":
+            return "success"
+        if txn_status in ("failed", "reversed"):
+            return "failed"
+        return "pending"
+
+    if code == VTPASS_FAILED:
+        return "failed"
+
+    return "pending"
 
-    wallet = Wallet.objects.select_for_update().get(user=user)
 
-    amount = Decimal(bundle.selling_price)
+def accepted_by_provider(provider_response):
+    """
+    True when a stored pay response shows VTpass created a transaction.
+    """
+    content = (provider_response or {}).get("content") or {}
+    return bool((content.get("transactions") or {}).get("transactionId"))
 
-    if wallet.balance < amount:
-        raise Exception("Insufficient wallet balance")
 
-    # Deduct wallet
-    wallet.balance -= amount
-    wallet.save(update_fields=["balance"])
+def settle_purchase(txn_id, new_status, provider_response=None):
+    """
+    Apply a provider outcome to a pending purchase. Idempotent: a purchase
+    that is already settled is returned unchanged.
+    """
+    with transaction.atomic():
+        txn = UtilityTransaction.objects.select_for_update().get(pk=txn_id)
+        if txn.status != "pending":
+            return txn
 
-    # Call VTpass
-    response, reference = purchase_data(
-        phone=phone,
-        service_id=bundle.network,
-        billers_code=phone,
-        variation_code=bundle.vtpass_code,
-        amount=float(amount),
-    )
+        if provider_response is not None:
+            txn.provider_response = provider_response
 
-    # Save transaction
-    UtilityTransaction.objects.create(
-        user=user,
-        wallet=wallet,
-        transaction_type="data",
-        network=bundle.network,
-        phone_number=phone,
-        amount=amount,
-        reference=reference,
-        status="success",
-        provider_response=response,
-    )
+        if new_status in ("success", "failed"):
+            post_entries(txn.wallet_id, [settlement_entry(txn, new_status)])
 
+        txn.status = new_status
+        txn.save(update_fields=["status", "provider_response"])
+        return txn
+
+
+def call_provider(txn):
+    """
+    Send one purchase to VTpass. Returns (status, provider_response).
+    No database access, so it is safe to run in worker threads.
+    """
+    try:
+        if txn.transaction_type == "data":
+            response, _ = purchase_data(
+                phone=txn.phone_number,
+                service_id=txn.network,
+                billers_code=txn.phone_number,
+                variation_code=txn.variation_code,
+                amount=float(txn.amount),
+                reference=txn.reference,
+            )
+        else:
+            response, _ = purchase_airtime(
+                phone=txn.phone_number,
+                network=txn.network,
+                amount=float(txn.amount),
+                reference=txn.reference,
+            )
+        return provider_status(response), response
+
+    except requests.ConnectTimeout as e:
+        # Never reached VTpass; safe to refund right away
+        return "failed", {"error": str(e)}
+
+    except Exception as e:
+        # VTpass may or may not have processed it; reconciliation decides
+        return "pending", {"error": str(e)}
+
+
+def settlement_entry(txn, new_status):
+    """
+    Ledger entry releasing (success) or refunding (failed) a reservation.
+    """
+    if new_status == "success":
+        return {"kind": "purchase_release", "locked_delta": -txn.amount, "reference": txn.reference}
     return {
-        "reference": reference,
-        "amount": float(amount),
-        "wallet_balance": float(wallet.balance),
+        "kind": "purchase_refund",
+        "balance_delta": txn.amount,
+        "locked_delta": -txn.amount,
+        "reference": txn.reference,
     }
+
+
+def execute_purchase(txn):
+    """
+    Send a reserved purchase to VTpass (outside any transaction) and settle
+    it. A purchase is only ever sent once: if it was already claimed or
+    settled, it is returned as is. Returns the refreshed UtilityTransaction.
+    """
+    claimed = UtilityTransaction.objects.filter(
+        pk=txn.pk, status="pending", submitted_at__isnull=True
+    ).update(submitted_at=timezone.now())
+    if not claimed:
+        return UtilityTransaction.objects.get(pk=txn.pk)
+
+    new_status, response = call_provider(txn)
+    return settle_purchase(txn.pk, new_status, response)
+
+
+def reconcile_purchase(txn):
+    """
+    Ask VTpass for the outcome of a stuck pending purchase and settle it.
+    "Request id not found" only refunds a purchase VTpass never accepted
+    (no transaction id in the stored pay response).
+    """
+    response = requery_transaction(txn.reference)
+    new_status = provider_status(response)
+
+    if (
+        str(response.get("code", "")) == VTPASS_REQUEST_ID_NOT_FOUND
+        and not accepted_by_provider(txn.provider_response)
+    ):
+        new_status = "failed"
+
+    if new_status == "pending":
+        # Keep the original pay response; it is the evidence checked above
+        return settle_purchase(txn.pk, new_status)
+    return settle_purchase(txn.pk, new_status, response)
+
+
+# --------------------------------------------------
+# BATCH DISBURSEMENTS
+# --------------------------------------------------
+# One reservation for the whole batch, one bulk_create for its lines, VTpass
+# calls fanned out over a bounded thread pool, and one settlement that
+# releases delivered lines and refunds failed ones together.
+
+def reserve_batch(user, lines):
+    """
+    Reserve the total of `lines` (dicts with transaction_type, network,
+    phone, amount[, variation_code]) and create one pending
+    UtilityTransaction per line under a shared batch reference.
+    Returns (batch_reference, transactions).
+    """
+    total = sum(line["amount"] for line in lines)
+    wallet = Wallet.objects.only("id").get(user=user)
+    batch_reference = new_request_id()
+
+    with transaction.atomic():
+        post_entry(
+            wallet.pk, "purchase_reserve",
+            balance_delta=-total, locked_delta=total,
+            reference=batch_reference, require_funds=True,
+        )
+
+        txns = UtilityTransaction.objects.bulk_create([
+            UtilityTransaction(
+                user=user,
+                wallet=wallet,
+                batch_reference=batch_reference,
+                transaction_type=line["transaction_type"],
+                network=line["network"],
+                phone_number=line["phone"],
+                amount=line["amount"],
+                variation_code=line.get("variation_code", ""),
+                reference=new_request_id(),
+                status="pending",
+            )
+            for line in lines
+        ])
+
+    return batch_reference, txns
+
+
+def settle_batch(outcomes):
+    """
+    Apply [(txn, status, provider_response), ...] in one transaction: a
+    single wallet UPDATE (plus one ledger bulk_create) releases successful
+    lines and refunds failed ones.
+    Lines already settled elsewhere are skipped; pending ones only record
+    the provider response.
+    """
+    by_id = {txn.pk: (new_status, response) for txn, new_status, response in outcomes}
+
+    with transaction.atomic():
+        txns = list(
+            UtilityTransaction.objects.select_for_update()
+            .filter(pk__in=by_id, status="pending")
+            .order_by("pk")
+        )
+
+        entries = {}
+        for txn in txns:
+            txn.status, txn.provider_response = by_id[txn.pk]
+            if txn.status != "pending":
+                entries.setdefault(txn.wallet_id, []).append(settlement_entry(txn, txn.status))
+
+        for wallet_id, wallet_entries in entries.items():
+            post_entries(wallet_id, wallet_entries)
+
+        UtilityTransaction.objects.bulk_update(txns, ["status", "provider_response"])
+
+    return txns
+
+
+def execute_batch(batch_reference, max_workers):
+    """
+    Claim every unsent line of a batch, call VTpass for them with at most
+    `max_workers` requests in flight, then settle them together.
+    Returns {status: count} for the lines settled by this call.
+    """
+    with transaction.atomic():
+        txns = list(
+            UtilityTransaction.objects.select_for_update()
+            .filter(batch_reference=batch_reference, status="pending", submitted_at__isnull=True)
+            .order_by("pk")
+        )
+        UtilityTransaction.objects.filter(pk__in=[t.pk for t in txns]).update(submitted_at=timezone.now())
+
+    if not txns:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vtpass-batch") as pool:
+        results = list(pool.map(call_provider, txns))
+
+    settled = settle_batch([(txn, *result) for txn, result in zip(txns, results)])
+
+    summary = {}
+    for txn in settled:
+        summary[txn.status] = summary.get(txn.status, 0) + 1
+    return summary
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from payments.catalog import bump_catalog_version
+from payments.models import DataBundle
+
+
+@receiver(post_save, sender=DataBundle)
+@receiver(post_delete, sender=DataBundle)
+def invalidate_bundle_catalog(sender, **kwargs):
+    """
+    Drop every cached data bundle catalog once the change commits, so no
+    reader can cache pre-commit rows under the new version. Queryset
+    .update() skips signals; call payments.catalog.bump_catalog_version()
+    after bulk edits.
+    """
+    transaction.on_commit(bump_catalog_version)
@@ -1,8 +1,16 @@
+from datetime import timedelta
+
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
-from django.db import transaction
+from django.db import connection, transaction
 
-from .models import SavingsPlan
+from . import inbox
+from .archive import archive_payloads
+from .ledger import checkpoint_wallets, post_entry
+from .models import IdempotencyKey, SavingsPlan, UtilityTransaction
+from .partitions import ensure_payload_partitions
+from .services.utilities import execute_batch, execute_purchase, reconcile_purchase
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
@@ -17,12 +25,12 @@ def unlock_savings_plan(self, savings_id):
             if timezone.now() < savings.locked_until:
                 return "Too early to unlock"
 
-            wallet = savings.wallet
-
             # 🔓 RELEASE FUNDS
-            wallet.locked_balance -= savings.amount
-            wallet.balance += savings.amount
-            wallet.save(update_fields=["balance", "locked_balance"])
+            post_entry(
+                savings.wallet_id, "savings_unlock",
+                balance_delta=savings.amount, locked_delta=-savings.amount,
+                reference=f"savings:{savings.pk}",
+            )
 
             savings.status = "unlocked"
             savings.unlocked_at = timezone.now()
@@ -33,3 +41,110 @@ def unlock_savings_plan(self, savings_id):
     except SavingsPlan.DoesNotExist:
         return "Savings plan not found"
 
+
+@shared_task(ignore_result=True)
+def execute_utility_purchase(txn_id):
+    """
+    Send a reserved airtime/data purchase to VTpass and settle it.
+    """
+    try:
+        txn = UtilityTransaction.objects.get(pk=txn_id)
+    except UtilityTransaction.DoesNotExist:
+        return "Purchase not found"
+
+    return execute_purchase(txn).status
+
+
+@shared_task(ignore_result=True)
+def execute_utility_batch(batch_reference):
+    """
+    Send a batch disbursement's lines to VTpass with bounded concurrency
+    and settle them in one go.
+    """
+    return execute_batch(batch_reference, max_workers=settings.UTILITY_BATCH_CONCURRENCY)
+
+
+@shared_task
+def reconcile_pending_utility_purchases(batch_size=100):
+    """
+    Resolve purchases left pending: ones never handed to VTpass (lost queue
+    message) are executed now; ones VTpass received (timeouts, "processing"
+    responses, crashed workers) are requeried and settled or refunded.
+    Scheduled by Celery Beat.
+    """
+    cutoff = timezone.now() - timedelta(minutes=settings.UTILITY_RECONCILE_AFTER_MINUTES)
+    stuck = UtilityTransaction.objects.filter(status="pending", created_at__lte=cutoff).order_by("created_at")[:batch_size]
+
+    results = {"success": 0, "failed": 0, "pending": 0, "errors": 0}
+    for txn in stuck:
+        try:
+            if txn.submitted_at is None:
+                txn = execute_purchase(txn)
+            else:
+                txn = reconcile_purchase(txn)
+            results[txn.status] += 1
+        except Exception as e:
+            print(f"⚠️ Could not reconcile {txn.reference}: {e}")
+            results["errors"] += 1
+
+    return results
+
+
+@shared_task
+def checkpoint_wallet_ledgers():
+    """
+    Snapshot wallet balances at the newest settled ledger entry so
+    historical balances never sum more than one period of entries.
+    Scheduled by Celery Beat.
+    """
+    return {"checkpoints": checkpoint_wallets()}
+
+
+@shared_task(ignore_result=True)
+def drain_webhook_inbox(batch_size=None, max_batches=20):
+    """
+    Apply stored webhooks (payments.inbox). Queued by each webhook request
+    and scheduled by Celery Beat as a safety net; concurrent runs claim
+    disjoint batches.
+    """
+    return inbox.drain(batch_size or settings.WEBHOOK_INBOX_BATCH_SIZE, max_batches=max_batches)
+
+
+@shared_task
+def ensure_paystack_payload_partitions():
+    """
+    Keep monthly PaystackPayload partitions created ahead of time
+    (payments.partitions). Scheduled daily by Celery Beat.
+    """
+    created = ensure_payload_partitions(connection, settings.PAYSTACK_PAYLOAD_PARTITIONS_AHEAD)
+    return {"created": created}
+
+
+@shared_task
+def archive_cold_payloads():
+    """
+    Compress provider JSON older than PAYLOAD_ARCHIVE_AFTER_DAYS
+    (payments.archive). Scheduled daily by Celery Beat.
+    """
+    return archive_payloads(settings.PAYLOAD_ARCHIVE_AFTER_DAYS, settings.PAYLOAD_ARCHIVE_BATCH_SIZE)
+
+
+@shared_task
+def expire_idempotency_keys(chunk_size=None):
+    """
+    Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL_HOURS,
+    chunk_size rows per DELETE. Scheduled hourly by Celery Beat.
+    """
+    chunk_size = chunk_size or settings.IDEMPOTENCY_SWEEP_CHUNK_SIZE
+    cutoff = timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    expired = IdempotencyKey.objects.filter(created_at__lt=cutoff).order_by("id")
+    total = 0
+
+    while True:
+        ids = list(expired.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            break
+        deleted, _ = IdempotencyKey.objects.filter(pk__in=ids).delete()
+        total += deleted
+
+    return {"deleted": total}
@@ -1,3 +1,867 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from users.models import PaystackTransaction as LegacyPaystackTransaction, User
+from users.views_paystack import process_paystack_event
+
+from . import catalog, inbox
+from .archive import archive_model, archive_payloads
+from .idempotency import IdempotentMixin
+from .ledger import InsufficientBalance, balance_at, checkpoint_wallets, post_entries, post_entry
+from .models import (
+    ArchivedPayload,
+    DataBundle,
+    IdempotencyKey,
+    PaystackPayload,
+    PaystackTransaction,
+    UtilityTransaction,
+    Wallet,
+    WalletCheckpoint,
+    WalletLedgerEntry,
+    WebhookInboxEvent,
+)
+from .serializers import BatchPurchaseSerializer
+from .services.utilities import (
+    execute_batch,
+    provider_status,
+    reconcile_purchase,
+    reserve_batch,
+    reserve_purchase,
+    settle_batch,
+    settle_purchase,
+)
+from .webhooks import handle_successful_payment
+
+
+REPLAYS = 32
+
+
+def replay(target, times=REPLAYS):
+    """
+    Call target() from `times` threads released at once. Returns the
+    exceptions raised, if any.
+    """
+    barrier = threading.Barrier(times)
+    errors = []
+
+    def run():
+        try:
+            barrier.wait()
+            target()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run) for _ in range(times)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def serves_concurrent_writers():
+    """
+    Whether the test database lets 32 threads write at once without
+    "database is locked" errors. SQLite only does with a file database and
+    BEGIN IMMEDIATE transactions (writers then wait on the busy timeout).
+    """
+    if connection.vendor == "postgresql":
+        return True
+    return (
+        connection.vendor == "sqlite"
+        and not connection.is_in_memory_db()
+        and connection.settings_dict["OPTIONS"].get("transaction_mode") == "IMMEDIATE"
+    )
+
+
+class WebhookIdempotencyStressTests(TransactionTestCase):
+    """
+    The same Paystack event delivered concurrently must be recorded and
+    credited exactly once.
+    """
+
+    def setUp(self):
+        # Evaluated here: the test database only exists once tests run
+        if not serves_concurrent_writers():
+            self.skipTest("needs PostgreSQL, or file-backed SQLite with transaction_mode IMMEDIATE")
+
+        self.user = User.objects.create(
+            phone_number="+2348000000101",
+            full_name="Stress Test",
+            email="stress@spectrum.ng",
+        )
+        self.wallet = Wallet.objects.create(user=self.user)
+
+    def assertCreditedOnce(self, reference, source):
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("2500.00"))
+        self.assertEqual(PaystackTransaction.objects.filter(reference=reference, source=source).count(), 1)
+        self.assertEqual(PaystackPayload.objects.filter(transaction__reference=reference).count(), 1)
+        self.assertEqual(
+            WalletLedgerEntry.objects.filter(wallet=self.wallet, kind="funding", reference=reference).count(), 1
+        )
+
+    def test_payments_webhook_replayed_from_32_threads(self):
+        data = {
+            "reference": "STRESS-PAYMENTS-1",
+            "amount": 250000,
+            "metadata": {"user_id": self.user.id, "payment_type": "wallet"},
+        }
+
+        errors = replay(lambda: handle_successful_payment(data))
+
+        self.assertEqual(errors, [])
+        self.assertCreditedOnce("STRESS-PAYMENTS-1", "payments")
+
+    def test_users_webhook_replayed_from_32_threads(self):
+        payload = {
+            "event": "charge.success",
+            "data": {
+                "reference": "STRESS-USERS-1",
+                "amount": 250000,
+                "customer": {"email": self.user.email},
+                "metadata": {"payment_type": "wallet"},
+            },
+        }
+
+        errors = replay(lambda: process_paystack_event(payload))
+
+        self.assertEqual(errors, [])
+        self.assertCreditedOnce("STRESS-USERS-1", "users")
+
+
+class LedgerConcurrencyStressTests(TransactionTestCase):
+    """
+    Concurrent debits against one wallet must never overdraw it.
+    """
+
+    def setUp(self):
+        if not serves_concurrent_writers():
+            self.skipTest("needs PostgreSQL, or file-backed SQLite with transaction_mode IMMEDIATE")
+
+        self.user, self.wallet = make_wallet("+2348000000102", Decimal("1000"))
+
+    def test_concurrent_debits_stop_at_zero(self):
+        errors = replay(lambda: post_entry(
+            self.wallet.pk, "purchase_reserve",
+            balance_delta=Decimal("-100"), locked_delta=Decimal("100"), require_funds=True,
+        ))
+
+        self.assertEqual(len(errors), REPLAYS - 10)
+        self.assertTrue(all(isinstance(e, InsufficientBalance) for e in errors), errors)
+        self.wallet.refresh_from_db()
+        self.assertEqual((self.wallet.balance, self.wallet.locked_balance), (Decimal("0"), Decimal("1000")))
+        self.assertEqual(balance_at(self.wallet.pk), (Decimal("0"), Decimal("1000")))
+
+
+def make_wallet(phone, balance=Decimal("0")):
+    user = User.objects.create(phone_number=phone, full_name="Test User")
+    wallet = Wallet.objects.create(user=user)
+    if balance:
+        post_entry(wallet.pk, "funding", balance_delta=balance, reference=f"FUND-{phone}")
+    return user, wallet
+
+
+class WalletLedgerTests(TestCase):
+    def setUp(self):
+        self.user, self.wallet = make_wallet("+2348000000207", Decimal("1000"))
+
+    def backdate(self, entry, when):
+        WalletLedgerEntry.objects.filter(pk=entry.pk).update(created_at=when)
+
+    def test_post_entries_applies_the_net_delta_once(self):
+        entries = post_entries(self.wallet.pk, [
+            {"kind": "purchase_reserve", "balance_delta": Decimal("-100"), "locked_delta": Decimal("100"), "reference": "A"},
+            {"kind": "purchase_refund", "balance_delta": Decimal("50"), "reference": "B"},
+            {"kind": "savings_lock", "balance_delta": Decimal("-200"), "reference": "C"},
+        ])
+        self.wallet.refresh_from_db()
+
+        self.assertEqual([e.kind for e in entries], ["purchase_reserve", "purchase_refund", "savings_lock"])
+        self.assertEqual((self.wallet.balance, self.wallet.locked_balance), (Decimal("750"), Decimal("100")))
+        self.assertEqual(balance_at(self.wallet.pk), (self.wallet.balance, self.wallet.locked_balance))
+
+    def test_require_funds_rejects_an_overdraft(self):
+        with self.assertRaises(InsufficientBalance):
+            post_entry(self.wallet.pk, "purchase_reserve", balance_delta=Decimal("-1000.01"), require_funds=True)
+
+        post_entry(self.wallet.pk, "purchase_reserve", balance_delta=Decimal("-1000"), require_funds=True)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("0"))
+        self.assertEqual(WalletLedgerEntry.objects.filter(wallet=self.wallet).count(), 2)
+
+    def test_require_funds_checks_the_net_of_the_entries(self):
+        post_entries(self.wallet.pk, [
+            {"kind": "purchase_refund", "balance_delta": Decimal("500")},
+            {"kind": "purchase_reserve", "balance_delta": Decimal("-1500")},
+        ], require_funds=True)
+        self.wallet.refresh_from_db()
+
+        self.assertEqual(self.wallet.balance, Decimal("0"))
+
+    def test_unknown_wallet(self):
+        with self.assertRaises(Wallet.DoesNotExist):
+            post_entry(0, "funding", balance_delta=Decimal("1"))
+        with self.assertRaises(Wallet.DoesNotExist):
+            post_entry(0, "purchase_reserve", balance_delta=Decimal("-1"), require_funds=True)
+
+    def test_balance_at_replays_entries_up_to_a_time(self):
+        now = timezone.now()
+        opening = WalletLedgerEntry.objects.get(wallet=self.wallet)
+        self.backdate(opening, now - timedelta(days=3))
+        self.backdate(post_entry(self.wallet.pk, "savings_lock", balance_delta=Decimal("-400")), now - timedelta(days=2))
+        self.backdate(
+            post_entry(self.wallet.pk, "purchase_reserve", balance_delta=Decimal("-100"), locked_delta=Decimal("100")),
+            now - timedelta(days=1),
+        )
+
+        self.assertEqual(balance_at(self.wallet.pk, now - timedelta(days=4)), (Decimal("0"), Decimal("0")))
+        self.assertEqual(balance_at(self.wallet.pk, now - timedelta(days=3)), (Decimal("1000"), Decimal("0")))
+        self.assertEqual(balance_at(self.wallet.pk, now - timedelta(hours=36)), (Decimal("600"), Decimal("0")))
+        self.assertEqual(balance_at(self.wallet.pk), (Decimal("500"), Decimal("100")))
+
+    @override_settings(LEDGER_CHECKPOINT_SETTLE_SECONDS=300)
+    def test_checkpoint_then_balance_at_round_trip(self):
+        now = timezone.now()
+        _, other = make_wallet("+2348000000208", Decimal("70"))
+        for entry in WalletLedgerEntry.objects.all():
+            self.backdate(entry, now - timedelta(days=2))
+        self.backdate(post_entry(self.wallet.pk, "savings_lock", balance_delta=Decimal("-400")), now - timedelta(days=1))
+
+        self.assertEqual(checkpoint_wallets(), 2)
+        checkpoint = WalletCheckpoint.objects.get(wallet=self.wallet)
+        self.assertEqual((checkpoint.balance, checkpoint.as_of), (Decimal("600"), now - timedelta(days=1)))
+
+        # Too fresh to checkpoint: it stays out of the next run
+        post_entry(self.wallet.pk, "funding", balance_delta=Decimal("25"))
+        self.assertEqual(checkpoint_wallets(), 0)
+
+        self.assertEqual(balance_at(self.wallet.pk), (Decimal("625"), Decimal("0")))
+        self.assertEqual(balance_at(self.wallet.pk, now - timedelta(hours=12)), (Decimal("600"), Decimal("0")))
+        self.assertEqual(balance_at(self.wallet.pk, now - timedelta(hours=36)), (Decimal("1000"), Decimal("0")))
+        self.assertEqual(balance_at(other.pk), (Decimal("70"), Decimal("0")))
+
+        # The next checkpoint builds on the previous one
+        with override_settings(LEDGER_CHECKPOINT_SETTLE_SECONDS=0):
+            self.assertEqual(checkpoint_wallets(), 1)
+        latest = WalletCheckpoint.objects.filter(wallet=self.wallet).latest("last_entry_id")
+        self.assertEqual(latest.balance, Decimal("625"))
+        self.assertEqual(balance_at(self.wallet.pk), (Decimal("625"), Decimal("0")))
+
+    def test_opening_entries_backfill(self):
+        open_ledgers = importlib.import_module("payments.migrations.0013_wallet_ledger").open_ledgers
+        WalletLedgerEntry.objects.all().delete()
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal("300"), locked_balance=Decimal("20"))
+        _, empty = make_wallet("+2348000000209")
+        _, locked_only = make_wallet("+2348000000210")
+        Wallet.objects.filter(pk=locked_only.pk).update(locked_balance=Decimal("5"))
+
+        open_ledgers(django_apps, None)
+
+        self.assertEqual(
+            sorted(WalletLedgerEntry.objects.values_list("wallet_id", "kind")),
+            [(self.wallet.pk, "opening"), (locked_only.pk, "opening")],
+        )
+        for wallet in Wallet.objects.all():
+            self.assertEqual(balance_at(wallet.pk), (wallet.balance, wallet.locked_balance))
+
+
+class UtilityReconciliationTests(TestCase):
+    """
+    Only an explicit VTpass failure refunds a purchase; anything ambiguous
+    stays pending.
+    """
+
+    def setUp(self):
+        self.user, self.wallet = make_wallet("+2348000000201", Decimal("1000"))
+        self.txn = reserve_purchase(
+            self.user, transaction_type="airtime", network="mtn", phone="08011111111", amount=Decimal("100")
+        )
+
+    def reconcile(self, response):
+        with mock.patch("payments.services.utilities.requery_transaction", return_value=response):
+            txn = reconcile_purchase(self.txn)
+        self.wallet.refresh_from_db()
+        return txn
+
+    def test_provider_status_only_fails_on_explicit_failure(self):
+        delivered = {"code": "000", "content": {"transactions": {"status": "delivered"}}}
+        reversed_ = {"code": "000", "content": {"transactions": {"status": "reversed"}}}
+
+        self.assertEqual(provider_status(delivered), "success")
+        self.assertEqual(provider_status(reversed_), "failed")
+        self.assertEqual(provider_status({"code": "016"}), "failed")
+        for ambiguous in ({"code": "099"}, {"code": "087"}, {"code": "030"}, {"detail": "Too many requests"}, {}):
+            self.assertEqual(provider_status(ambiguous), "pending")
+
+    def test_ambiguous_requery_keeps_the_reservation(self):
+        txn = self.reconcile({"code": "087", "response_description": "INVALID CREDENTIALS"})
+
+        self.assertEqual(txn.status, "pending")
+        self.assertEqual(self.wallet.balance, Decimal("900"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("100"))
+
+    def test_not_found_refunds_a_purchase_vtpass_never_accepted(self):
+        self.txn.provider_response = {"error": "Read timed out"}
+        txn = self.reconcile({"code": "015", "response_description": "INVALID REQUEST ID"})
+
+        self.assertEqual(txn.status, "failed")
+        self.assertEqual(self.wallet.balance, Decimal("1000"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("0"))
+
+    def test_not_found_keeps_a_purchase_vtpass_accepted(self):
+        accepted = {"code": "099", "content": {"transactions": {"status": "pending", "transactionId": "1741"}}}
+        self.txn.provider_response = accepted
+        self.txn.save(update_fields=["provider_response"])
+
+        txn = self.reconcile({"code": "015"})
+
+        self.assertEqual(txn.status, "pending")
+        self.assertEqual(txn.provider_response, accepted)
+        self.assertEqual(self.wallet.locked_balance, Decimal("100"))
+
+
+@override_settings(UTILITY_STATUS_RETRY_AFTER=3)
+class UtilityStatusViewTests(TestCase):
+    def setUp(self):
+        self.user, self.wallet = make_wallet("+2348000000202", Decimal("500"))
+        self.txn = reserve_purchase(
+            self.user, transaction_type="airtime", network="mtn", phone="08011111111", amount=Decimal("100")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/payments/utilities/{self.txn.reference}/"
+
+    def test_pending_purchase_answers_at_once_with_retry_after(self):
+        response = self.client.get(self.url, {"wait": 20})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "pending")
+        self.assertEqual(response["Retry-After"], "3")
+
+    def test_settled_purchase_has_no_retry_after(self):
+        UtilityTransaction.objects.filter(pk=self.txn.pk).update(status="success")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["status"], "success")
+        self.assertFalse(response.has_header("Retry-After"))
+
+
+class UtilityBatchTests(TestCase):
+    """
+    Batch disbursements: one reservation for the total, lines sent with
+    bounded concurrency, and one settlement that refunds failed lines.
+    """
+
+    url = "/api/payments/utilities/batch/"
+
+    def setUp(self):
+        self.user, self.wallet = make_wallet("+2348000000206", Decimal("1000"))
+        self.user.role = "COMPANY"
+        self.user.save(update_fields=["role"])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.bundle = DataBundle.objects.create(
+            network="glo",
+            category="monthly",
+            name="2GB",
+            volume="2GB",
+            validity="30 days",
+            provider_price=Decimal("180"),
+            selling_price=Decimal("200"),
+            vtpass_code="glo-2gb",
+        )
+
+    def airtime(self, phone, amount):
+        return {"transaction_type": "airtime", "network": "mtn", "phone": phone, "amount": Decimal(amount)}
+
+    def execute(self, outcomes):
+        """
+        Run the batch with VTpass answering per phone number from `outcomes`.
+        """
+        def call_provider(txn):
+            new_status = outcomes[txn.phone_number]
+            return new_status, {"code": "000" if new_status == "success" else "016"}
+
+        with mock.patch("payments.services.utilities.call_provider", side_effect=call_provider) as provider:
+            summary = execute_batch(self.batch_reference, max_workers=2)
+        self.wallet.refresh_from_db()
+        return summary, provider
+
+    def reserve(self, *lines):
+        self.batch_reference, self.txns = reserve_batch(self.user, list(lines))
+        return self.txns
+
+    def test_serializer_prices_data_lines_from_the_bundle(self):
+        serializer = BatchPurchaseSerializer(data={"lines": [
+            {"transaction_type": "data", "bundle_id": self.bundle.pk, "phone": "08011111111"},
+            {"transaction_type": "airtime", "network": "mtn", "phone": "08022222222", "amount": "50"},
+        ]})
+
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        data_line = serializer.validated_data["lines"][0]
+        self.assertEqual(
+            (data_line["network"], data_line["amount"], data_line["variation_code"]),
+            ("glo", Decimal("200"), "glo-2gb"),
+        )
+
+    @override_settings(UTILITY_BATCH_MAX_LINES=2)
+    def test_serializer_rejects_invalid_batches(self):
+        airtime = {"transaction_type": "airtime", "network": "mtn", "phone": "08011111111", "amount": "50"}
+        self.bundle.is_active = False
+        self.bundle.save()
+
+        for lines in (
+            [],
+            [airtime] * 3,
+            [{"transaction_type": "airtime", "network": "mtn", "phone": "08011111111"}],
+            [{"transaction_type": "data", "bundle_id": self.bundle.pk, "phone": "08011111111"}],
+        ):
+            self.assertFalse(BatchPurchaseSerializer(data={"lines": lines}).is_valid(), lines)
+
+    def test_reserve_batch_debits_the_total_once(self):
+        txns = self.reserve(self.airtime("08011111111", "100"), self.airtime("08022222222", "200"))
+        self.wallet.refresh_from_db()
+
+        self.assertEqual((self.wallet.balance, self.wallet.locked_balance), (Decimal("700"), Decimal("300")))
+        self.assertEqual(
+            WalletLedgerEntry.objects.filter(wallet=self.wallet, kind="purchase_reserve").count(), 1
+        )
+        self.assertEqual(
+            UtilityTransaction.objects.filter(batch_reference=self.batch_reference, status="pending").count(), 2
+        )
+        self.assertEqual(len({t.reference for t in txns}), 2)
+
+    def test_reserve_batch_rejects_insufficient_funds(self):
+        with self.assertRaises(InsufficientBalance):
+            self.reserve(self.airtime("08011111111", "600"), self.airtime("08022222222", "600"))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual((self.wallet.balance, self.wallet.locked_balance), (Decimal("1000"), Decimal("0")))
+        self.assertFalse(UtilityTransaction.objects.filter(user=self.user).exists())
+
+    def test_partial_failure_refunds_only_the_failed_lines(self):
+        self.reserve(
+            self.airtime("08011111111", "100"),
+            self.airtime("08022222222", "200"),
+            self.airtime("08033333333", "300"),
+        )
+
+        summary, provider = self.execute(
+            {"08011111111": "success", "08022222222": "failed", "08033333333": "pending"}
+        )
+
+        self.assertEqual(summary, {"success": 1, "failed": 1, "pending": 1})
+        self.assertEqual(provider.call_count, 3)
+        # 100 delivered, 200 refunded, 300 still reserved for reconciliation
+        self.assertEqual((self.wallet.balance, self.wallet.locked_balance), (Decimal("600"), Decimal("300")))
+        self.assertEqual(
+            dict(UtilityTransaction.objects.filter(batch_reference=self.batch_reference).values_list("phone_number", "status")),
+            {"08011111111": "success", "08022222222": "failed", "08033333333": "pending"},
+        )
+
+    def test_lines_are_only_sent_once(self):
+        self.reserve(self.airtime("08011111111", "100"))
+        self.execute({"08011111111": "pending"})
+
+        summary, provider = self.execute({"08011111111": "success"})
+
+        self.assertEqual(summary, {})
+        provider.assert_not_called()
+
+    def test_settle_batch_skips_lines_settled_elsewhere(self):
+        first, second = self.reserve(self.airtime("08011111111", "100"), self.airtime("08022222222", "200"))
+        settle_purchase(first.pk, "failed")
+
+        settled = settle_batch([(first, "failed", {}), (second, "failed", {})])
+        self.wallet.refresh_from_db()
+
+        self.assertEqual([t.pk for t in settled], [second.pk])
+        self.assertEqual((self.wallet.balance, self.wallet.locked_balance), (Decimal("1000"), Decimal("0")))
+        self.assertEqual(
+            WalletLedgerEntry.objects.filter(wallet=self.wallet, kind="purchase_refund").count(), 2
+        )
+
+    def test_view_reserves_and_queues_the_batch(self):
+        body = {"lines": [
+            {"transaction_type": "data", "bundle_id": self.bundle.pk, "phone": "08011111111"},
+            {"transaction_type": "airtime", "network": "mtn", "phone": "08022222222", "amount": "50"},
+        ]}
+
+        with mock.patch("payments.views_utilities.execute_utility_batch") as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, body, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.data["lines"], response.data["amount"]), (2, 250.0))
+        self.assertEqual(response.data["wallet_balance"], 750.0)
+        task.apply_async.assert_called_once_with((response.data["batch_reference"],), retry=False)
+
+    def test_view_rejects_insufficient_funds(self):
+        body = {"lines": [{"transaction_type": "airtime", "network": "mtn", "phone": "08011111111", "amount": "1500"}]}
+
+        with mock.patch("payments.views_utilities.execute_utility_batch") as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, body, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UtilityTransaction.objects.filter(user=self.user).exists())
+        task.apply_async.assert_not_called()
+
+    def test_view_is_for_company_accounts(self):
+        self.user.role = "CLIENT"
+        self.user.save(update_fields=["role"])
+
+        response = self.client.post(self.url, {"lines": [self.airtime("08011111111", "100")]}, format="json")
+
+        self.assertEqual(response.status_code, 403)
+
+
+class MergePaystackTransactionsTests(TestCase):
+    def setUp(self):
+        self.user, self.wallet = make_wallet("+2348000000211")
+        self.old = timezone.now() - timedelta(days=400)
+        for n in range(3):
+            LegacyPaystackTransaction.objects.create(
+                user=self.user,
+                reference=f"LEGACY-{n}",
+                amount=Decimal("100") * (n + 1),
+                payment_type="wallet",
+                status="success",
+                raw_payload={"event": "charge.success", "n": n},
+            )
+        LegacyPaystackTransaction.objects.update(created_at=self.old)
+
+    def merge(self):
+        out = io.StringIO()
+        call_command("merge_paystack_transactions", batch_size=2, stdout=out)
+        return out.getvalue()
+
+    def test_copies_legacy_rows_with_their_payloads(self):
+        # Already recorded by the payments handler: left as it is
+        PaystackTransaction.objects.create(reference="LEGACY-1", amount=Decimal("200"), source="payments")
+
+        self.assertIn("Merged 2 Paystack transactions (1 already in the ledger)", self.merge())
+
+        merged = PaystackTransaction.objects.filter(source="users").order_by("reference")
+        self.assertEqual(
+            [(t.reference, t.amount, t.user_id, t.created_at) for t in merged],
+            [("LEGACY-0", Decimal("100"), self.user.pk, self.old), ("LEGACY-2", Decimal("300"), self.user.pk, self.old)],
+        )
+        payload = PaystackPayload.objects.get(transaction__reference="LEGACY-2")
+        self.assertEqual((payload.body, payload.created_at), ({"event": "charge.success", "n": 2}, self.old))
+        self.assertFalse(PaystackPayload.objects.filter(transaction__reference="LEGACY-1").exists())
+
+    def test_rerun_is_a_no_op(self):
+        self.merge()
+
+        self.assertIn("Merged 0 Paystack transactions (3 already in the ledger)", self.merge())
+        self.assertEqual(PaystackTransaction.objects.count(), 3)
+        self.assertEqual(PaystackPayload.objects.count(), 3)
+
+
+class PayloadArchiveTests(TestCase):
+    def setUp(self):
+        self.user, self.wallet = make_wallet("+2348000000203", Decimal("500"))
+        self.txn = reserve_purchase(
+            self.user, transaction_type="airtime", network="mtn", phone="08011111111", amount=Decimal("100")
+        )
+        self.response = {"code": "000", "content": {"transactions": {"status": "delivered"}}}
+        UtilityTransaction.objects.filter(pk=self.txn.pk).update(
+            status="success",
+            provider_response=self.response,
+            created_at=timezone.now() - timedelta(days=120),
+        )
+
+    def test_archiving_moves_the_json_out_of_the_row(self):
+        result = archive_payloads(older_than_days=90)
+
+        self.assertEqual(result["payments.utilitytransaction.provider_response"], 1)
+        self.assertNotIn("payments.idempotencykey.response", result)
+        inline, archive_id = UtilityTransaction.objects.values_list(
+            "provider_response", "provider_response_archive"
+        ).get(pk=self.txn.pk)
+        self.assertIsNone(inline)
+        self.assertTrue(ArchivedPayload.objects.filter(pk=archive_id).exists())
+        self.assertEqual(UtilityTransaction.objects.get(pk=self.txn.pk).provider_response, self.response)
+
+        self.assertEqual(archive_payloads(older_than_days=90)["payments.utilitytransaction.provider_response"], 0)
+        self.assertEqual(ArchivedPayload.objects.count(), 1)
+
+    def test_each_batch_is_one_insert_and_one_update(self):
+        for n in range(4):
+            PaystackPayload.objects.create(
+                transaction=PaystackTransaction.objects.create(reference=f"ARCHIVE-{n}", amount=Decimal("1")),
+                body={"n": n},
+                created_at=timezone.now() - timedelta(days=120),
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            archived = archive_model(
+                PaystackPayload, "body", "created_at", Q(), timezone.now() - timedelta(days=90), batch_size=2
+            )
+
+        self.assertEqual(archived, 4)
+        writes = [q["sql"].split()[0] for q in queries if not q["sql"].startswith(("SELECT", "SAVEPOINT", "RELEASE"))]
+        self.assertEqual(writes, ["INSERT", "UPDATE", "INSERT", "UPDATE"])
+        for payload in PaystackPayload.objects.select_related("transaction"):
+            self.assertEqual(payload.body, {"n": int(payload.transaction.reference.split("-")[1])})
+
+    def test_pending_purchases_stay_inline(self):
+        UtilityTransaction.objects.filter(pk=self.txn.pk).update(status="pending")
+
+        self.assertEqual(archive_payloads(older_than_days=90)["payments.utilitytransaction.provider_response"], 0)
+        self.assertIsNone(
+            UtilityTransaction.objects.values_list("provider_response_archive", flat=True).get(pk=self.txn.pk)
+        )
+
+
+class CountingView(IdempotentMixin, APIView):
+    """
+    Answers with the status asked for in the body, or raises.
+    """
+    calls = 0
+
+    def post(self, request):
+        CountingView.calls += 1
+        if request.data.get("raise"):
+            raise RuntimeError("view crashed")
+        return Response({"call": CountingView.calls}, status=int(request.data.get("status", 201)))
+
+
+class IdempotentMixinTests(TestCase):
+    path = "/api/payments/test/"
+
+    def setUp(self):
+        CountingView.calls = 0
+        self.user, self.wallet = make_wallet("+2348000000204")
+        self.factory = APIRequestFactory()
+
+    def post(self, body, key="KEY-1"):
+        request = self.factory.post(self.path, body, format="json", HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.user)
+        return CountingView.as_view()(request)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post({"amount": 100})
+        retry = self.post({"amount": 100})
+
+        self.assertEqual(CountingView.calls, 1)
+        self.assertEqual((retry.status_code, retry.data), (201, {"call": 1}))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+
+    def test_key_reused_with_a_different_body_is_rejected(self):
+        self.post({"amount": 100})
+
+        self.assertEqual(self.post({"amount": 200}).status_code, 422)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_key_still_in_flight_conflicts(self):
+        IdempotencyKey.objects.create(user=self.user, key="KEY-1", endpoint=self.path)
+
+        self.assertEqual(self.post({"amount": 100}).status_code, 409)
+        self.assertEqual(CountingView.calls, 0)
+
+    def test_client_error_releases_the_key(self):
+        self.assertEqual(self.post({"status": 400}).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.assertEqual(self.post({"status": 400}).status_code, 400)
+        self.assertEqual(CountingView.calls, 2)
+
+    def test_exception_releases_the_key(self):
+        with self.assertRaises(RuntimeError):
+            self.post({"raise": True})
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT_MINUTES=5)
+    def test_abandoned_key_is_reclaimed(self):
+        record = IdempotencyKey.objects.create(user=self.user, key="KEY-1", endpoint=self.path)
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(minutes=6))
+
+        response = self.post({"amount": 100})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CountingView.calls, 1)
+        record.refresh_from_db()
+        self.assertEqual(record.status_code, 201)
+        self.assertEqual(self.post({"amount": 100})["Idempotent-Replayed"], "true")
+
+
+class BundleCatalogTests(TestCase):
+    url = "/api/payments/data/bundles/"
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        self.user, self.wallet = make_wallet("+2348000000205")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.bundle = self.make_bundle("1GB")
+
+    def make_bundle(self, name, network="mtn"):
+        return DataBundle.objects.create(
+            network=network,
+            category="monthly",
+            name=name,
+            volume=name,
+            validity="30 days",
+            provider_price=Decimal("280"),
+            selling_price=Decimal("300"),
+            vtpass_code=f"{network}-{name}",
+        )
+
+    def test_matching_etag_gets_304(self):
+        first = self.client.get(self.url, {"network": "mtn"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([b["name"] for b in first.data], ["1GB"])
+
+        again = self.client.get(self.url, {"network": "mtn"}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+
+    def test_saving_a_bundle_bumps_the_version_on_commit(self):
+        etag = self.client.get(self.url, {"network": "mtn"})["ETag"]
+        version = catalog.catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_bundle("2GB")
+
+        self.assertEqual(catalog.catalog_version(), version + 1)
+        response = self.client.get(self.url, {"network": "mtn"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([b["name"] for b in response.data], ["1GB", "2GB"])
+
+    def test_change_to_another_network_keeps_the_etag(self):
+        etag = self.client.get(self.url, {"network": "mtn"})["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_bundle("1GB", network="glo")
+
+        response = self.client.get(self.url, {"network": "mtn"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_bump_reseeds_a_missing_version_without_a_cache_warning(self):
+        caches["default"].delete(catalog.VERSION_KEY)
+
+        with self.assertNoLogs("payments.catalog", level="WARNING"):
+            catalog.bump_catalog_version()
+
+        self.assertIsNotNone(caches["default"].get(catalog.VERSION_KEY))
+        self.assertIsNone(caches["local"].get(catalog.VERSION_KEY))
+
+    def test_unreachable_cache_falls_back_to_local(self):
+        default = caches["default"]
+        with mock.patch.object(default, "get", side_effect=catalog.RedisConnectionError("down")), \
+                mock.patch.object(default, "add", side_effect=catalog.RedisConnectionError("down")), \
+                mock.patch.object(default, "set", side_effect=catalog.RedisConnectionError("down")), \
+                self.assertLogs("payments.catalog", level="WARNING"):
+            data, etag = catalog.bundle_catalog("mtn")
+
+        self.assertEqual([b["name"] for b in data], ["1GB"])
+        self.assertIsNotNone(caches["local"].get(catalog.VERSION_KEY))
+
+
+def store(reference, event="charge.success"):
+    body = json.dumps({"event": event, "data": {"reference": reference}}).encode()
+    return inbox.store_event("payments", body)
+
+
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        self.applied = []
+
+    def handlers(self, fail=()):
+        def apply(payload):
+            if payload["event"] in fail:
+                raise RuntimeError("handler failed")
+            self.applied.append((payload["data"]["reference"], payload["event"]))
+
+        return {"payments": apply}
+
+    def test_claims_one_event_per_reference_in_arrival_order(self):
+        first = store("REF-A", "charge.success")
+        second = store("REF-A", "charge.refund")
+        other = store("REF-B")
+
+        claimed = inbox.claim_events(10)
+
+        self.assertEqual([e.pk for e in claimed], [first.pk, other.pk])
+        self.assertEqual(inbox.claim_events(10), [])
+
+        for event in claimed:
+            inbox.process_event(event, self.handlers())
+        self.assertEqual([e.pk for e in inbox.claim_events(10)], [second.pk])
+
+    def test_drain_applies_events_per_reference_in_order(self):
+        store("REF-A", "charge.success")
+        store("REF-A", "charge.refund")
+
+        result = inbox.drain(10, handlers=self.handlers())
+
+        self.assertEqual(result, {"processed": 2})
+        self.assertEqual(self.applied, [("REF-A", "charge.success"), ("REF-A", "charge.refund")])
+
+    def test_failed_attempt_backs_off_instead_of_retrying_at_once(self):
+        event = store("REF-A", "charge.bad")
+
+        result = inbox.drain(10, handlers=self.handlers(fail={"charge.bad"}))
+
+        event.refresh_from_db()
+        self.assertEqual(result, {"pending": 1})
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.status, "pending")
+        self.assertGreater(event.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(inbox.claim_events(10), [])
+
+        WebhookInboxEvent.objects.filter(pk=event.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual([e.pk for e in inbox.claim_events(10)], [event.pk])
+
+    def test_exhausted_event_blocks_its_reference_until_requeued(self):
+        bad = store("REF-A", "charge.bad")
+        later = store("REF-A", "charge.success")
+        handlers = self.handlers(fail={"charge.bad"})
+
+        for _ in range(inbox.MAX_ATTEMPTS):
+            WebhookInboxEvent.objects.filter(pk=bad.pk).update(next_attempt_at=None)
+            inbox.drain(10, handlers=handlers)
+
+        bad.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(bad.status, "failed")
+        self.assertEqual(later.status, "pending")
+        self.assertEqual(inbox.claim_events(10), [])
+
+        self.assertEqual(inbox.requeue_events(WebhookInboxEvent.objects.all()), 1)
+        self.assertEqual([e.pk for e in inbox.claim_events(10)], [bad.pk])
+
+    def test_stale_claims_are_released(self):
+        event = store("REF-A")
+        inbox.claim_events(10)
+        WebhookInboxEvent.objects.filter(pk=event.pk).update(
+            claimed_at=timezone.now() - inbox.CLAIM_TIMEOUT - timedelta(seconds=1)
+        )
+
+        self.assertEqual([e.pk for e in inbox.claim_events(10)], [event.pk])
@@ -16,6 +16,10 @@ from .views_utilities import (
     DataBundleListView,
     PurchaseDataView,
     PurchaseAirtimeView,
+    UtilityTransactionStatusView,
+    BatchPurchaseView,
+    BatchStatusView,
+    ProviderMetricsView,
 )
 
 
@@ -82,6 +86,30 @@ urlpatterns = [
         name="airtime-purchase",
     ),
 
+    path(
+        "utilities/batch/",
+        BatchPurchaseView.as_view(),
+        name="utility-batch",
+    ),
+
+    path(
+        "utilities/batch/<str:batch_reference>/",
+        BatchStatusView.as_view(),
+        name="utility-batch-status",
+    ),
+
+    path(
+        "utilities/<str:reference>/",
+        UtilityTransactionStatusView.as_view(),
+        name="utility-status",
+    ),
+
+    path(
+        "providers/metrics/",
+        ProviderMetricsView.as_view(),
+        name="provider-metrics",
+    ),
+
     # --------------------------------------------------
     # WEBHOOKS
     # --------------------------------------------------
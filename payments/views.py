@@ -10,6 +10,8 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
+from .idempotency import IdempotentMixin
+from .ledger import post_entry
 from .models import SavedCard, Wallet, SavingsPlan
 from .serializers import (
     SavedCardSerializer,
@@ -65,7 +67,7 @@ class InitWalletFundingView(APIView):
     responses={201: OpenApiResponse(description="Savings created & locked")},
     tags=["Savings"],
 )
-class CreateSavingsPlanView(APIView):
+class CreateSavingsPlanView(IdempotentMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @transaction.atomic
@@ -112,25 +114,29 @@ class WithdrawSavingsView(APIView):
         )
         serializer.is_valid(raise_exception=True)
 
-        wallet = savings.wallet
         amount = savings.amount
 
         if savings.status == "locked":
             penalty = (Decimal("0.10") * amount).quantize(Decimal("0.01"))
             payout = amount - penalty
 
-            wallet.balance += payout
+            # Locked funds leave the lock; the penalty is forfeited
+            post_entry(
+                savings.wallet_id, "savings_break",
+                balance_delta=payout, locked_delta=-amount,
+                reference=f"savings:{savings.pk}",
+            )
             savings.penalty_amount = penalty
             savings.status = "broken"
             savings.broken_at = timezone.now()
 
         else:
-            wallet.balance += amount
+            # unlock_savings_plan already moved the funds back to the balance
             savings.status = "unlocked"
-            savings.unlocked_at = timezone.now()
+            savings.unlocked_at = savings.unlocked_at or timezone.now()
 
-        wallet.save(update_fields=["balance"])
         savings.save()
+        wallet = Wallet.objects.get(pk=savings.wallet_id)
 
         return Response({
             "message": "Savings withdrawn.",
@@ -1,58 +1,104 @@
-import uuid
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from core.utils.http_clients import provider_metrics
+
+from .catalog import bundle_catalog
+from .idempotency import IdempotentMixin
 from .models import Wallet, DataBundle, UtilityTransaction
-from .vtpass_service import purchase_data, purchase_airtime
+from .permissions import IsCompanyUser
+from .serializers import BatchPurchaseSerializer, UtilityTransactionSerializer
+from .services.utilities import InsufficientBalance, reserve_batch, reserve_purchase
+from .tasks import execute_utility_batch, execute_utility_purchase
 
 
 # --------------------------------------------------
 # LIST DATA BUNDLES
 # --------------------------------------------------
 class DataBundleListView(APIView):
+    """
+    Active bundles, optionally filtered by ?network= and ?category=.
+    Served from the versioned catalog cache (payments.catalog); clients
+    sending a matching If-None-Match get 304 Not Modified.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        network = request.query_params.get("network")
-        category = request.query_params.get("category")
+        data, etag = bundle_catalog(
+            network=request.query_params.get("network"),
+            category=request.query_params.get("category"),
+        )
 
-        bundles = DataBundle.objects.filter(is_active=True)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
 
-        if network:
-            bundles = bundles.filter(network=network)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
-        if category:
-            bundles = bundles.filter(category=category)
 
-        data = []
+# --------------------------------------------------
+# PURCHASE HELPERS
+# --------------------------------------------------
+PURCHASE_MESSAGES = {
+    "success": "{} purchase successful",
+    "failed": "{} purchase failed",
+    "pending": "{} purchase is processing",
+}
+
+
+def accept_purchase(txn, label):
+    """
+    Queue a reserved purchase for a Celery worker and answer 202 straight
+    away; clients follow it on UtilityTransactionStatusView.
+    """
+    transaction.on_commit(lambda: enqueue_purchase(txn.pk))
+
+    wallet = Wallet.objects.only("balance").get(pk=txn.wallet_id)
+    return Response(
+        {
+            "message": PURCHASE_MESSAGES[txn.status].format(label),
+            "status": txn.status,
+            "reference": txn.reference,
+            "amount": float(txn.amount),
+            "wallet_balance": float(wallet.balance),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
 
-        for b in bundles:
-            data.append({
-                "id": b.id,
-                "network": b.network,
-                "name": b.name,
-                "volume": b.volume,
-                "validity": b.validity,
-                "price": float(b.selling_price),
-            })
 
-        return Response(data)
+def enqueue_purchase(txn_id):
+    try:
+        # No publish retries: a broker outage must not stall the request
+        execute_utility_purchase.apply_async((txn_id,), retry=False)
+    except Exception as e:
+        # Stays pending and unsubmitted; reconciliation executes it
+        print(f"⚠️ Could not queue utility purchase {txn_id}: {e}")
 
 
 # --------------------------------------------------
 # PURCHASE DATA BUNDLE
 # --------------------------------------------------
-class PurchaseDataView(APIView):
+class PurchaseDataView(IdempotentMixin, APIView):
+    """
+    Funds are reserved and the purchase recorded as pending; a Celery
+    worker then calls VTpass and settles or refunds the reservation
+    (payments.services.utilities). Poll GET utilities/<reference>/.
+    """
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def post(self, request):
 
         bundle_id = request.data.get("bundle_id")
@@ -66,62 +112,30 @@ class PurchaseDataView(APIView):
 
         bundle = get_object_or_404(DataBundle, id=bundle_id, is_active=True)
 
-        wallet = Wallet.objects.select_for_update().get(user=request.user)
-
-        amount = Decimal(bundle.selling_price)
-
-        if wallet.balance < amount:
-            return Response(
-                {"error": "Insufficient wallet balance"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        wallet.balance -= amount
-        wallet.save(update_fields=["balance"])
-
         try:
-            response, reference = purchase_data(
+            txn = reserve_purchase(
+                request.user,
+                transaction_type="data",
+                network=bundle.network,
                 phone=phone,
-                service_id=bundle.network,
-                billers_code=phone,
+                amount=Decimal(bundle.selling_price),
                 variation_code=bundle.vtpass_code,
-                amount=float(amount),
             )
+        except InsufficientBalance as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            status_flag = "success"
-
-        except Exception as e:
-            status_flag = "failed"
-            response = {"error": str(e)}
-            reference = str(uuid.uuid4())
-
-        UtilityTransaction.objects.create(
-            user=request.user,
-            wallet=wallet,
-            transaction_type="data",
-            network=bundle.network,
-            phone_number=phone,
-            amount=amount,
-            reference=reference,
-            status=status_flag,
-            provider_response=response,
-        )
-
-        return Response({
-            "message": "Data purchase successful" if status_flag == "success" else "Data purchase failed",
-            "reference": reference,
-            "amount": float(amount),
-            "wallet_balance": float(wallet.balance),
-        })
+        return accept_purchase(txn, "Data")
 
 
 # --------------------------------------------------
 # PURCHASE AIRTIME
 # --------------------------------------------------
-class PurchaseAirtimeView(APIView):
+class PurchaseAirtimeView(IdempotentMixin, APIView):
+    """
+    Queued purchase; see PurchaseDataView.
+    """
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def post(self, request):
 
         network = request.data.get("network")
@@ -134,47 +148,128 @@ class PurchaseAirtimeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        amount = Decimal(amount)
-
-        wallet = Wallet.objects.select_for_update().get(user=request.user)
-
-        if wallet.balance < amount:
-            return Response(
-                {"error": "Insufficient wallet balance"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        try:
+            amount = Decimal(str(amount))
+        except InvalidOperation:
+            return Response({"error": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST)
 
-        wallet.balance -= amount
-        wallet.save(update_fields=["balance"])
+        if amount <= 0:
+            return Response({"error": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            response, reference = purchase_airtime(
-                phone=phone,
+            txn = reserve_purchase(
+                request.user,
+                transaction_type="airtime",
                 network=network,
-                amount=float(amount),
+                phone=phone,
+                amount=amount,
             )
+        except InsufficientBalance as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return accept_purchase(txn, "Airtime")
+
 
-            status_flag = "success"
-
-        except Exception as e:
-            status_flag = "failed"
-            response = {"error": str(e)}
-            reference = str(uuid.uuid4())
-
-        UtilityTransaction.objects.create(
-            user=request.user,
-            wallet=wallet,
-            transaction_type="airtime",
-            network=network,
-            phone_number=phone,
-            amount=amount,
-            reference=reference,
-            status=status_flag,
-            provider_response=response,
+# --------------------------------------------------
+# BATCH DISBURSEMENT (COMPANY WALLETS)
+# --------------------------------------------------
+class BatchPurchaseView(IdempotentMixin, APIView):
+    """
+    POST /api/payments/utilities/batch/
+    {"lines": [{"transaction_type": "airtime", "network": "mtn", "phone": "...", "amount": 500},
+               {"transaction_type": "data", "bundle_id": 12, "phone": "..."}]}
+
+    Debits the wallet once for the total, records every line as a pending
+    UtilityTransaction, and queues the batch; failed lines are refunded
+    together when the batch settles.
+    """
+    permission_classes = [IsCompanyUser]
+
+    def post(self, request):
+        serializer = BatchPurchaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        lines = serializer.validated_data["lines"]
+
+        try:
+            batch_reference, txns = reserve_batch(request.user, lines)
+        except InsufficientBalance as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        transaction.on_commit(lambda: enqueue_batch(batch_reference))
+
+        wallet = Wallet.objects.only("balance").get(user=request.user)
+        return Response(
+            {
+                "message": "Batch is processing",
+                "batch_reference": batch_reference,
+                "lines": len(txns),
+                "amount": float(sum(t.amount for t in txns)),
+                "wallet_balance": float(wallet.balance),
+            },
+            status=status.HTTP_202_ACCEPTED,
         )
 
+
+def enqueue_batch(batch_reference):
+    try:
+        execute_utility_batch.apply_async((batch_reference,), retry=False)
+    except Exception as e:
+        # Lines stay pending and unsubmitted; reconciliation executes them
+        print(f"⚠️ Could not queue utility batch {batch_reference}: {e}")
+
+
+class BatchStatusView(APIView):
+    """
+    GET /api/payments/utilities/batch/<batch_reference>/
+    """
+    permission_classes = [IsCompanyUser]
+
+    def get(self, request, batch_reference):
+        txns = UtilityTransaction.objects.filter(
+            user=request.user, batch_reference=batch_reference
+        ).order_by("pk")
+
+        summary = dict(txns.order_by().values_list("status").annotate(n=Count("pk")))
+        if not summary:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
         return Response({
-            "message": "Airtime purchase successful" if status_flag == "success" else "Airtime purchase failed",
-            "reference": reference,
-            "wallet_balance": float(wallet.balance),
+            "batch_reference": batch_reference,
+            "summary": summary,
+            "lines": UtilityTransactionSerializer(txns, many=True).data,
         })
+
+
+# --------------------------------------------------
+# UTILITY PURCHASE STATUS
+# --------------------------------------------------
+class UtilityTransactionStatusView(APIView):
+    """
+    GET /api/payments/utilities/<reference>/
+    Answers immediately; while the purchase is pending the response
+    carries Retry-After (UTILITY_STATUS_RETRY_AFTER seconds) so clients
+    poll without holding a sync worker.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, reference):
+        txn = get_object_or_404(UtilityTransaction, user=request.user, reference=reference)
+
+        response = Response(UtilityTransactionSerializer(txn).data)
+        if txn.status == "pending":
+            response["Retry-After"] = str(settings.UTILITY_STATUS_RETRY_AFTER)
+        return response
+
+
+# --------------------------------------------------
+# PROVIDER LATENCY METRICS (ADMIN)
+# --------------------------------------------------
+class ProviderMetricsView(APIView):
+    """
+    Per-provider call counts and latency for the serving process.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(provider_metrics())
@@ -1,23 +1,20 @@
-import json
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
+from .inbox import enqueue_drain, store_event, verify_paystack_signature
 from .webhooks import handle_successful_payment
 
 
 @csrf_exempt
 def paystack_webhook(request):
-    try:
-        payload = json.loads(request.body.decode("utf-8"))
-    except Exception:
-        return HttpResponse(status=400)
-
-    event = payload.get("event")
-    data = payload.get("data", {})
+    if not verify_paystack_signature(request):
+        return HttpResponse(status=401)
 
-    if event == "charge.success":
-        handle_successful_payment(data)
+    # Persist and acknowledge; payments.tasks.drain_webhook_inbox applies it
+    if store_event("payments", request.body) is None:
+        return HttpResponse(status=400)
 
+    enqueue_drain()
     return HttpResponse(status=200)
 
 
@@ -38,4 +35,3 @@ def simulate_webhook(request):
     }
     handle_successful_payment(fake_data)
     return HttpResponse("Simulated webhook event processed.", status=200)
-
@@ -1,20 +1,31 @@
-import requests
 import uuid
 from django.conf import settings
+from django.utils import timezone
+
+from core.utils import http_clients
 
 
 # --------------------------------------------------
 # VTPASS BASE URL
 # --------------------------------------------------
 VTPASS_BASE_URL = "https://api-service.vtpass.com/api/pay"
+VTPASS_REQUERY_URL = "https://api-service.vtpass.com/api/requery"
+
+
+def new_request_id():
+    """
+    VTpass request_id: must start with the Africa/Lagos date-time
+    (YYYYMMDDHHII); a random suffix keeps it unique.
+    """
+    return timezone.localtime().strftime("%Y%m%d%H%M") + uuid.uuid4().hex[:16]
 
 
 # --------------------------------------------------
 # PURCHASE DATA BUNDLE
 # --------------------------------------------------
-def purchase_data(phone, service_id, billers_code, variation_code, amount):
+def purchase_data(phone, service_id, billers_code, variation_code, amount, reference=None):
 
-    reference = str(uuid.uuid4())
+    reference = reference or new_request_id()
 
     payload = {
         "request_id": reference,
@@ -25,7 +36,8 @@ def purchase_data(phone, service_id, billers_code, variation_code, amount):
         "phone": phone,
     }
 
-    response = requests.post(
+    response = http_clients.post(
+        "vtpass",
         VTPASS_BASE_URL,
         json=payload,
         auth=(settings.VTPASS_EMAIL, settings.VTPASS_API_KEY),
@@ -37,9 +49,9 @@ def purchase_data(phone, service_id, billers_code, variation_code, amount):
 # --------------------------------------------------
 # PURCHASE AIRTIME
 # --------------------------------------------------
-def purchase_airtime(phone, network, amount):
+def purchase_airtime(phone, network, amount, reference=None):
 
-    reference = str(uuid.uuid4())
+    reference = reference or new_request_id()
 
     payload = {
         "request_id": reference,
@@ -49,10 +61,26 @@ def purchase_airtime(phone, network, amount):
         "phone": phone,
     }
 
-    response = requests.post(
+    response = http_clients.post(
+        "vtpass",
         VTPASS_BASE_URL,
         json=payload,
         auth=(settings.VTPASS_EMAIL, settings.VTPASS_API_KEY),
     )
 
     return response.json(), reference
+
+
+# --------------------------------------------------
+# REQUERY A TRANSACTION
+# --------------------------------------------------
+def requery_transaction(reference):
+
+    response = http_clients.post(
+        "vtpass",
+        VTPASS_REQUERY_URL,
+        json={"request_id": reference},
+        auth=(settings.VTPASS_EMAIL, settings.VTPASS_API_KEY),
+    )
+
+    return response.json()
@@ -1,9 +1,12 @@
 from decimal import Decimal
+from django.db import transaction
 from django.utils import timezone
 
-from .models import PaystackTransaction, Wallet, SavingsPlan
+from .ledger import credit_once
+from .models import Wallet, SavingsPlan
 
 
+@transaction.atomic
 def handle_successful_payment(data):
     """
     Handles Paystack charge.success webhook events.
@@ -23,38 +26,31 @@ def handle_successful_payment(data):
     # Convert Paystack amount (kobo -> naira)
     amount = Decimal(amount_kobo) / 100
 
-    # Prevent duplicate webhook processing
-    trx, created = PaystackTransaction.objects.get_or_create(
-        reference=reference,
-        defaults={
-            "user_id": user_id,
-            "payment_type": payment_type,
-            "amount": amount,
-            "status": "success",
-            "raw_payload": data,
-        }
+    wallet_id = None
+    if payment_type == "wallet":
+        wallet_id = Wallet.objects.filter(user_id=user_id).values_list("id", flat=True).first()
+
+    # Prevent duplicate webhook processing: the unique reference INSERT
+    # decides, and the wallet is credited (via the ledger) only if it won
+    created = credit_once(
+        reference,
+        wallet_id,
+        amount,
+        data,
+        user_id=user_id,
+        payment_type=payment_type,
+        status="success",
+        source="payments",
     )
 
     if not created:
         # Already processed
         return
 
-    # -------------------------------------------
-    # WALLET FUNDING
-    # -------------------------------------------
-    if payment_type == "wallet":
-        try:
-            wallet = Wallet.objects.get(user_id=user_id)
-        except Wallet.DoesNotExist:
-            return  # user deleted or inconsistency
-
-        wallet.balance += amount
-        wallet.save(update_fields=["balance"])
-
     # -------------------------------------------
     # SAVINGS FUNDING (OPTIONAL FUTURE USE)
     # -------------------------------------------
-    elif payment_type == "savings" and savings_id:
+    if payment_type == "savings" and savings_id:
         try:
             savings = SavingsPlan.objects.get(id=savings_id, wallet__user_id=user_id)
         except SavingsPlan.DoesNotExist:
@@ -70,3 +66,10 @@ def handle_successful_payment(data):
     # -------------------------------------------
     return
 
+
+def process_paystack_event(payload):
+    """
+    Inbox handler for events received by payments.views_webhook.
+    """
+    if payload.get("event") == "charge.success":
+        handle_successful_payment(payload.get("data") or {})
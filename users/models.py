@@ -142,6 +142,11 @@ class Transaction(models.Model):
 # Paystack Transaction Model (Wallet / Savings / Utilities)
 # -------------------------------------------------------------------------
 class PaystackTransaction(models.Model):
+    """
+    Legacy: no longer written. Webhooks record into
+    payments.PaystackTransaction; existing rows are copied there by
+    `manage.py merge_paystack_transactions`.
+    """
     STATUS_CHOICES = [
         ("success", "Success"),
         ("failed", "Failed"),
@@ -1,6 +1,8 @@
 import requests
 from django.conf import settings
 
+from core.utils import http_clients
+
 TERMII_TOKEN_URL = f"{settings.TERMII_BASE_URL}/api/sms/otp/send"
 
 def send_termii_sms(phone, otp):
@@ -19,7 +21,7 @@ def send_termii_sms(phone, otp):
     }
 
     try:
-        response = requests.post(TERMII_TOKEN_URL, json=payload, timeout=10)
+        response = http_clients.post("termii", TERMII_TOKEN_URL, json=payload)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.HTTPError as e:
@@ -1,6 +1,7 @@
-import requests
 import os
 
+from core.utils import http_clients
+
 TERMII_API_KEY = os.getenv("TERMII_API_KEY")
 TERMII_BASE_URL = os.getenv("TERMII_BASE_URL", "https://api.ng.termii.com")
 TERMII_SENDER_ID = os.getenv("TERMII_SENDER_ID", "Spectrum")
@@ -35,7 +36,7 @@ def send_sms_otp(phone_number, otp):
     }
 
     try:
-        resp = requests.post(url, json=payload)
+        resp = http_clients.post("termii", url, json=payload)
         data = resp.json()
         print("TERMII RESPONSE:", data)
 
@@ -1,16 +1,15 @@
-import hashlib
-import hmac
-import json
 from decimal import Decimal
 
-from django.conf import settings
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
+from django.db.models import F
 
-from users.models import User, PaystackTransaction
+from users.models import User
 from savings.models import Savings
-from payments.models import SavedCard
+from payments.inbox import enqueue_drain, store_event, verify_paystack_signature
+from payments.ledger import credit_once
+from payments.models import SavedCard, Wallet
 
 
 @csrf_exempt
@@ -18,27 +17,33 @@ def paystack_webhook(request):
     # --------------------------------------------------
     # 1. VERIFY PAYSTACK SIGNATURE
     # --------------------------------------------------
-    signature = request.headers.get("X-Paystack-Signature")
-    body = request.body
+    if not verify_paystack_signature(request):
+        return HttpResponse(status=401)
 
-    computed_signature = hmac.new(
-        key=settings.PAYSTACK_SECRET_KEY.encode(),
-        msg=body,
-        digestmod=hashlib.sha512,
-    ).hexdigest()
+    # --------------------------------------------------
+    # 2. STORE IN THE INBOX AND ACKNOWLEDGE
+    # --------------------------------------------------
+    # Applied by payments.tasks.drain_webhook_inbox via process_paystack_event
+    if store_event("users", request.body) is None:
+        return HttpResponse(status=400)
 
-    if signature != computed_signature:
-        return HttpResponse(status=401)
+    enqueue_drain()
+    return HttpResponse(status=200)
 
-    payload = json.loads(body)
+
+def process_paystack_event(payload):
+    """
+    Inbox handler: apply a verified Paystack event. Runs inside the
+    worker's transaction.
+    """
     event = payload.get("event")
     data = payload.get("data", {})
 
     # --------------------------------------------------
-    # 2. PROCESS ONLY SUCCESSFUL CHARGES
+    # 1. PROCESS ONLY SUCCESSFUL CHARGES
     # --------------------------------------------------
     if event != "charge.success":
-        return HttpResponse(status=200)
+        return
 
     reference = data.get("reference")
     amount = Decimal(data.get("amount", 0)) / 100  # kobo → naira
@@ -53,36 +58,37 @@ def paystack_webhook(request):
     authorization = data.get("authorization")
 
     # --------------------------------------------------
-    # 3. RESOLVE USER
+    # 2. RESOLVE USER
     # --------------------------------------------------
     try:
         user = User.objects.get(email=email)
     except User.DoesNotExist:
-        # Never fail webhook retries
-        return HttpResponse(status=200)
-
-    # --------------------------------------------------
-    # 4. IDEMPOTENCY CHECK (CRITICAL)
-    # --------------------------------------------------
-    if PaystackTransaction.objects.filter(reference=reference).exists():
-        return HttpResponse(status=200)
+        return
 
     # --------------------------------------------------
-    # 5. ATOMIC TRANSACTION (ALL OR NOTHING)
+    # 3. ATOMIC TRANSACTION (ALL OR NOTHING)
     # --------------------------------------------------
     with transaction.atomic():
 
         # ----------------------------------------------
-        # RECORD PAYSTACK TRANSACTION
+        # RECORD PAYSTACK TRANSACTION + WALLET FUNDING
         # ----------------------------------------------
-        PaystackTransaction.objects.create(
+        # Idempotency: the unique reference INSERT decides; replays stop here
+        wallet_id = None
+        if payment_type == "wallet":
+            wallet_id = Wallet.objects.filter(user=user).values_list("id", flat=True).first()
+
+        if not credit_once(
+            reference,
+            wallet_id,
+            amount,
+            payload,
             user=user,
-            reference=reference,
-            amount=amount,
             payment_type=payment_type,
             status="success",
-            raw_payload=payload,
-        )
+            source="users",
+        ):
+            return
 
         # ----------------------------------------------
         # SAVE CARD (REUSABLE AUTHORIZATION)
@@ -106,26 +112,5 @@ def paystack_webhook(request):
         # SAVINGS FUNDING
         # ----------------------------------------------
         if payment_type == "savings" and savings_id:
-            try:
-                savings = Savings.objects.select_for_update().get(
-                    id=savings_id,
-                    user=user,
-                )
-                savings.balance += amount
-                savings.save(update_fields=["balance"])
-            except Savings.DoesNotExist:
-                # Never break webhook
-                pass
-
-        # ----------------------------------------------
-        # WALLET FUNDING
-        # ----------------------------------------------
-        elif payment_type == "wallet":
-            user.wallet_balance += amount
-            user.save(update_fields=["wallet_balance"])
-
-    # --------------------------------------------------
-    # 6. ACKNOWLEDGE WEBHOOK
-    # --------------------------------------------------
-    return HttpResponse(status=200)
-
+            # Unknown plans are ignored (never break webhook)
+            Savings.objects.filter(id=savings_id, user=user).update(amount=F("amount") + amount)